@@ -0,0 +1,86 @@
+# Benchmark de carga: servicio sync vs async detrás de FastAPI
+# Necesita un Postgres con datos (DB_CONFIG), por ejemplo el de init_database
+#
+# Uso:
+#   python -m benchmarks.bench_async_api --clients 50 --requests 20
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from src.config.settings import CACHE_CONFIG
+
+# Sin caché para medir la base de datos y no el diccionario
+CACHE_CONFIG["enabled"] = False
+
+from src.services.data_service import DataService
+from src.services.async_data_service import AsyncDataService
+
+def build_sync_app() -> FastAPI:
+    """Así estaba la API antes: handlers async llamando al servicio sync"""
+    app = FastAPI()
+    service = DataService()
+
+    @app.get("/top-clientes")
+    async def top_clientes(limit: int = 5):
+        return service.get_top_clients(limit)
+
+    return app
+
+def build_async_app() -> FastAPI:
+    """La API nueva: el handler espera al servicio async"""
+    app = FastAPI()
+    service = AsyncDataService()
+
+    @app.get("/top-clientes")
+    async def top_clientes(limit: int = 5):
+        return await service.get_top_clients(limit)
+
+    return app
+
+async def run_load(app: FastAPI, clients: int, requests: int) -> list:
+    """Lanza `clients` clientes concurrentes, cada uno con `requests` peticiones"""
+    latencies = []
+
+    async def client_loop(client: httpx.AsyncClient, worker: int):
+        for i in range(requests):
+            # Cada cliente pide un limit distinto para que no haya dos queries iguales seguidas
+            start = time.perf_counter()
+            response = await client.get("/top-clientes", params={"limit": (worker + i) % 100 + 1})
+            latencies.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        await asyncio.gather(*(client_loop(client, w) for w in range(clients)))
+    return latencies
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia p50/p99 sync vs async")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, builder in [("sync", build_sync_app), ("async", build_async_app)]:
+        app = builder()
+        start = time.perf_counter()
+        latencies = asyncio.run(run_load(app, args.clients, args.requests))
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:>5}: {len(latencies)} requests, {args.clients} clientes | "
+            f"p50={percentile(latencies, 50):.1f}ms "
+            f"p99={percentile(latencies, 99):.1f}ms "
+            f"media={statistics.mean(latencies):.1f}ms "
+            f"rps={len(latencies) / elapsed:.0f}"
+        )
+
+if __name__ == "__main__":
+    main()
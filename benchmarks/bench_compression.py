@@ -0,0 +1,42 @@
+# Micro-benchmark de compresión: ratio y CPU por MB para cada nivel de gzip y zstd
+# Sirve para elegir API_GZIP_LEVEL / API_ZSTD_LEVEL: cuánto egress se ahorra por cada ms de CPU
+#
+# Uso:
+#   python -m benchmarks.bench_compression --rows 10000 --repeat 20
+
+import argparse
+import time
+
+from benchmarks.bench_json_response import build_payload
+from src.api.compression import _GzipEncoder, _ZstdEncoder, _zstandard
+from src.api.responses import dumps
+
+def measure(encoder_factory, body: bytes, repeat: int):
+    """(ratio, ms de CPU por MB de entrada) comprimiendo `body` entero `repeat` veces"""
+    size = 0
+    start = time.thread_time()
+    for _ in range(repeat):
+        size = len(encoder_factory().compress(body, final=True))
+    cpu = time.thread_time() - start
+    mb = len(body) * repeat / (1024 * 1024)
+    return len(body) / size, cpu * 1000 / mb
+
+def main():
+    parser = argparse.ArgumentParser(description="Ratio y CPU por MB de gzip y zstd por nivel")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    body = dumps({"status": "success", "message": "OK", "data": build_payload(args.rows)})
+    print(f"payload: {len(body) / 1024:.0f} KiB")
+
+    candidates = [("gzip", level, lambda level=level: _GzipEncoder(level)) for level in (1, 3, 6, 9)]
+    if _zstandard() is not None:
+        candidates += [("zstd", level, lambda level=level: _ZstdEncoder(level)) for level in (1, 3, 6, 10, 19)]
+
+    for encoding, level, factory in candidates:
+        ratio, cpu_ms_per_mb = measure(factory, body, args.repeat)
+        print(f"{encoding:>5} nivel {level:>2}: ratio={ratio:5.2f} cpu={cpu_ms_per_mb:7.2f}ms/MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# Tiempo de import en frío de los puntos de entrada (APIs, Lambda batch, monitoreo)
+# Guarda contra regresiones del arranque: que nadie vuelva a crear clientes de AWS
+# o de Redis al importar. Corre cada import en un proceso nuevo con -X importtime
+# y sin credenciales ni región de AWS.
+#
+# Uso:
+#   python -m benchmarks.bench_import_time --repeat 5 --max-ms 2000
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+MODULES = (
+    "src.api.main",
+    "src.api.app",
+    "src.batch.daily_processor",
+    "src.utils.monitoring",
+    "src.utils.cache",
+)
+
+# Ninguno de estos tiene que cargarse solo por importar los módulos de arriba
+LAZY_MODULES = ("boto3", "botocore", "redis")
+
+def _offline_env() -> Dict[str, str]:
+    env = {k: v for k, v in os.environ.items() if not k.startswith("AWS_")}
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+def measure(module: str) -> Tuple[float, List[Tuple[float, str]], List[str]]:
+    """(ms acumulados de `module`, imports más pesados, módulos perezosos que se cargaron)"""
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=_offline_env(), check=True
+    )
+    total = 0.0
+    heavy: List[Tuple[float, str]] = []
+    children: List[Tuple[float, str]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        ms = int(cumulative) / 1000
+        # -X importtime imprime los hijos antes que el padre, con dos espacios más por nivel
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((ms, name.strip()))
+        elif depth == 0:
+            if name.strip() == module:
+                total, heavy = ms, children
+            children = []
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return total, sorted(heavy, reverse=True)[:5], loaded
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de import en frío de los puntos de entrada")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="Falla si la mediana de algún módulo lo supera")
+    parser.add_argument("--modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        runs = [measure(module) for _ in range(args.repeat)]
+        median = statistics.median(total for total, _, _ in runs)
+        _, heavy, loaded = runs[-1]
+        print(f"{module:<30} mediana {median:8.1f} ms")
+        for ms, name in heavy:
+            print(f"    {ms:8.1f} ms  {name}")
+        if loaded:
+            print(f"    ERROR: se importó {', '.join(loaded)} al importar {module}")
+            failed = True
+        if args.max_ms is not None and median > args.max_ms:
+            print(f"    ERROR: supera el máximo de {args.max_ms:.0f} ms")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# Micro-benchmark de serialización: respuesta por defecto de FastAPI vs orjson
+# No necesita base: arma un payload de /transacciones con la forma real (to_dict de un DataFrame)
+#
+# Uso:
+#   python -m benchmarks.bench_json_response --rows 10000 --requests 200
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+
+import httpx
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI
+
+from src.api.responses import FastJSONResponse
+
+def build_payload(rows: int) -> dict:
+    """Lo que devuelve get_daily_transactions para un producto con `rows` clientes"""
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame({
+        "cliente": [f"Cliente {i}" for i in range(rows)],
+        "cantidad_transacciones": rng.integers(1, 50, rows),
+        "monto_total": rng.lognormal(4, 1, rows).round(2)
+    })
+    return {
+        "producto": "PRODUCTO_1",
+        "fecha": "2024-03-21",
+        "transacciones": df.to_dict(orient="records")
+    }
+
+def build_app(payload: dict) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/default")
+    async def default():
+        # Antes: dict -> jsonable_encoder -> json.dumps
+        return {"status": "success", "message": "OK", "data": payload, "timestamp": datetime.now().isoformat()}
+
+    @app.get("/orjson")
+    async def fast():
+        # Ahora: _format_response devuelve la respuesta ya armada
+        return FastJSONResponse({"status": "success", "message": "OK", "data": payload, "timestamp": datetime.now().isoformat()})
+
+    return app
+
+async def run(app: FastAPI, path: str, requests: int) -> list:
+    latencies = []
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await client.get(path)
+            latencies.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+    return latencies
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput y latencia de la serialización JSON")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    app = build_app(build_payload(args.rows))
+    for path in ["/default", "/orjson"]:
+        # Una vuelta corta para calentar
+        asyncio.run(run(app, path, 5))
+        start = time.perf_counter()
+        latencies = asyncio.run(run(app, path, args.requests))
+        elapsed = time.perf_counter() - start
+        print(
+            f"{path:>9}: {args.rows} filas | "
+            f"p50={percentile(latencies, 50):.1f}ms "
+            f"p99={percentile(latencies, 99):.1f}ms "
+            f"media={statistics.mean(latencies):.1f}ms "
+            f"rps={args.requests / elapsed:.0f}"
+        )
+
+if __name__ == "__main__":
+    main()
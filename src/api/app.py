@@ -1,13 +1,20 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import APIKeyHeader
-from typing import Dict, List
-import boto3
+from typing import Dict, List, Optional
 from datetime import datetime
 import os
 import logging
 from pydantic import BaseModel
 import json
-from boto3.dynamodb.conditions import Key
+from ..config.settings import MONITORING_CONFIG
+from ..utils.aws import get_resource
+from .compression import CompressionMiddleware, compression_stats
+from ..utils.metrics import MEDIA_TYPE, REGISTRY, MetricsMiddleware
+from ..utils.monitoring import publisher
+from .rate_limit import RateLimiter, RateLimitMiddleware
+from ..utils.admission import AdmissionController, Overloaded
+from .pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, validate_page_size
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO)
@@ -20,6 +27,23 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Latencia y status por ruta, para /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Token bucket por API key
+rate_limiter = RateLimiter()
+app.add_middleware(
+    RateLimitMiddleware,
+    limiter=rate_limiter,
+    authenticate=lambda key: key in API_KEYS
+)
+
+# Tope de queries a DynamoDB en vuelo, tomado solo alrededor de la query
+admission = AdmissionController()
+
+# Las métricas de un proveedor pueden ser miles de filas: gzip o zstd según Accept-Encoding
+app.add_middleware(CompressionMiddleware)
+
 # Configuración de seguridad
 API_KEY_NAME = "X-API-Key"
 api_key_header = APIKeyHeader(name=API_KEY_NAME)
@@ -36,9 +60,10 @@ class ErrorResponse(BaseModel):
     detail: str
 
 # Configuración de AWS
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.getenv('DYNAMODB_TABLE'))
-elasticache_client = boto3.client('elasticache')
+# El resource se crea en el primer request, no al importar: arranca sin credenciales y más rápido
+def get_table():
+    """Tabla de métricas en DynamoDB"""
+    return get_resource('dynamodb').Table(os.getenv('DYNAMODB_TABLE'))
 
 # Mapeo de API keys a provider_ids
 API_KEYS = {
@@ -60,30 +85,54 @@ def get_cache_key(provider_id: int, fecha: str) -> str:
     """Genera la clave para el caché"""
     return f"metricas:{provider_id}:{fecha}"
 
+def get_start_key(cursor: Optional[str], provider_id: int, fecha: str) -> Optional[Dict]:
+    """ExclusiveStartKey a partir del cursor, solo si es de este proveedor y fecha"""
+    if not cursor:
+        return None
+    start_key = decode_cursor(cursor)
+    if not str(start_key.get('id', '')).startswith(f"{provider_id}#") or start_key.get('fecha') != fecha:
+        raise ValueError("El cursor no corresponde a este proveedor y fecha")
+    return start_key
+
 @app.get(
     "/metricas",
     response_model=List[MetricasResponse],
     responses={
         200: {"description": "Métricas obtenidas exitosamente"},
+        400: {"model": ErrorResponse, "description": "page_size o cursor inválidos"},
         403: {"model": ErrorResponse, "description": "API key inválida"},
-        500: {"model": ErrorResponse, "description": "Error interno del servidor"}
+        500: {"model": ErrorResponse, "description": "Error interno del servidor"},
+        503: {"model": ErrorResponse, "description": "Demasiadas consultas en curso"}
     }
 )
 async def get_metricas(
+    response: Response,
     fecha: str = None,
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None,
     provider_id: int = Depends(get_api_key)
 ):
     """
     Obtiene las métricas de ventas para un proveedor específico
     
     - **fecha**: Fecha opcional en formato YYYY-MM-DD. Si no se proporciona, se usa la fecha actual
+    - **page_size**: Opcional. Con page_size se devuelve una página ordenada por cliente_id
+      y el cursor de la siguiente en el header X-Next-Cursor. Sin page_size se recorren
+      todas las páginas de DynamoDB y no se corta nada
+    - **cursor**: El X-Next-Cursor de la respuesta anterior
     - **provider_id**: Se obtiene automáticamente de la API key
     """
+    # Validar y establecer la fecha
+    if not fecha:
+        fecha = datetime.now().strftime('%Y-%m-%d')
+
+    try:
+        page_size = validate_page_size(page_size)
+        start_key = get_start_key(cursor, provider_id, fecha)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
-        # Validar y establecer la fecha
-        if not fecha:
-            fecha = datetime.now().strftime('%Y-%m-%d')
-            
         logger.info(f"Consultando métricas para proveedor {provider_id} en fecha {fecha}")
         
         # Intentar obtener del caché primero
@@ -91,13 +140,37 @@ async def get_metricas(
         # TODO: Implementar lógica de caché con ElastiCache
         
         # Consultar DynamoDB
-        response = table.query(
-            KeyConditionExpression=Key('id').begins_with(f"{provider_id}#") & Key('fecha').eq(fecha)
-        )
+        from boto3.dynamodb.conditions import Key
+        table = get_table()
+        # Cada query trae como mucho page_size items (o 1 MB); LastEvaluatedKey dice dónde
+        # seguir. El orden es el de la clave (proveedor#cliente#fecha), o sea por cliente_id
+        query = {
+            "KeyConditionExpression": Key('id').begins_with(f"{provider_id}#") & Key('fecha').eq(fecha)
+        }
+        if page_size:
+            query["Limit"] = page_size
+        if start_key:
+            query["ExclusiveStartKey"] = start_key
+
+        items = []
+        while True:
+            # boto3 bloquea: cada query va a un thread para no frenar el event loop mientras tiene el lugar
+            async with admission.slot():
+                page = await run_in_threadpool(table.query, **query)
+            items.extend(page['Items'])
+            last_key = page.get('LastEvaluatedKey')
+            if page_size or not last_key:
+                break
+            query["ExclusiveStartKey"] = last_key
+
+        # Con Limit DynamoDB puede devolver LastEvaluatedKey justo en la última página;
+        # en ese caso la siguiente viene vacía y sin cursor
+        if page_size and last_key:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last_key)
         
         # Transformar resultados
         metricas = []
-        for item in response['Items']:
+        for item in items:
             # Parsear la clave compuesta
             _, cliente_id, fecha = item['id'].split('#')
             
@@ -112,6 +185,9 @@ async def get_metricas(
         logger.info(f"Se encontraron {len(metricas)} registros")
         return metricas
         
+    except Overloaded as e:
+        logger.warning(f"Sin lugar para la query a DynamoDB: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Error obteniendo métricas: {str(e)}")
         raise HTTPException(
@@ -119,10 +195,30 @@ async def get_metricas(
             detail=f"Error interno del servidor: {str(e)}"
         )
 
+@app.on_event("startup")
+async def startup():
+    """Con el monitoreo activo arranca el envío a CloudWatch"""
+    if MONITORING_CONFIG["enabled"]:
+        publisher.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Manda a CloudWatch lo que quedó acumulado"""
+    publisher.stop()
+
+@app.get("/metrics")
+async def metrics():
+    """Métricas en formato Prometheus"""
+    return Response(REGISTRY.render(), media_type=MEDIA_TYPE)
+
 @app.get("/health")
 async def health_check():
     """Endpoint para verificar el estado de la API"""
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "compression": compression_stats.snapshot(),
+        "admission": {**admission.stats(), "rate_limited": rate_limiter.rejected}
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,146 @@
+# Respuestas columnares (Arrow IPC y Parquet) para los proveedores que bajan todo
+# Se arman directo desde las filas del cursor, sin pandas ni dicts ni JSON en el medio
+
+import io
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+from .streaming import close_when_done
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+
+# Lo que aceptamos en Accept para cada formato
+MEDIA_TYPES = {
+    ARROW_STREAM: ARROW_STREAM,
+    PARQUET: PARQUET,
+    "application/x-parquet": PARQUET,
+}
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """Formato columnar pedido en Accept, o None para seguir con JSON.
+
+    Se respeta el orden y los q del header; q=0 descarta el tipo.
+    """
+    if not accept:
+        return None
+    candidates = []
+    for position, part in enumerate(accept.split(",")):
+        media, *params = [p.strip() for p in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            candidates.append((-quality, position, media.lower()))
+    for _, _, media in sorted(candidates):
+        if media in MEDIA_TYPES:
+            return MEDIA_TYPES[media]
+        if media in ("application/json", "*/*", "application/*"):
+            return None
+    return None
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise HTTPException(status_code=406, detail="Formato columnar no disponible en este servidor")
+    return pa
+
+def record_batch(keys: Sequence[str], rows: Sequence[Tuple]):
+    """Un RecordBatch desde filas del cursor, columna por columna.
+
+    Los Numeric llegan como Decimal y se pasan a float64, igual que en el JSON.
+    """
+    pa = _pyarrow()
+    columns = list(zip(*rows)) if rows else [() for _ in keys]
+    arrays = []
+    for values in columns:
+        array = pa.array(values)
+        if pa.types.is_decimal(array.type):
+            array = array.cast(pa.float64())
+        arrays.append(array)
+    return pa.RecordBatch.from_arrays(arrays, names=list(keys))
+
+class _ChunkSink(io.RawIOBase):
+    """Destino de escritura que junta bytes hasta que alguien los saca"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+def _conform(batch, schema):
+    """Un lote con todos nulos puede inferir otro tipo; lo llevamos al schema del primero"""
+    if schema is None or batch.schema == schema:
+        return batch
+    pa = _pyarrow()
+    return pa.RecordBatch.from_arrays(
+        [col.cast(field.type) for col, field in zip(batch.columns, schema)],
+        schema=schema
+    )
+
+async def _arrow_stream(first, batches: AsyncIterator[Tuple[List[str], List[Tuple]]]) -> AsyncIterator[bytes]:
+    pa = _pyarrow()
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, first.schema)
+    writer.write_batch(first)
+    yield sink.drain()
+    async for keys, rows in batches:
+        writer.write_batch(_conform(record_batch(keys, rows), first.schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+async def columnar_response(media_type: str, batches: AsyncIterator[Tuple[List[str], List[Tuple]]]):
+    """Respuesta Arrow IPC (en streaming, lote por lote) o Parquet (un archivo entero).
+
+    El primer lote se lee antes de contestar, así una query que falla de
+    entrada todavía da un 500 normal. Parquet necesita el footer al final y
+    se arma con la tabla completa; para resultados muy grandes conviene Arrow.
+    """
+    pa = _pyarrow()
+    iterator = batches.__aiter__()
+    try:
+        keys, rows = await iterator.__anext__()
+        first = record_batch(keys, rows)
+    except BaseException:
+        await iterator.aclose()
+        raise
+
+    if media_type == ARROW_STREAM:
+        return StreamingResponse(
+            _arrow_stream(first, iterator),
+            media_type=ARROW_STREAM,
+            background=close_when_done(iterator)
+        )
+
+    record_batches = [first]
+    try:
+        async for keys, rows in iterator:
+            record_batches.append(_conform(record_batch(keys, rows), first.schema))
+    finally:
+        await iterator.aclose()
+    buffer = pa.BufferOutputStream()
+    pa.parquet.write_table(pa.Table.from_batches(record_batches), buffer, compression="zstd")
+    return Response(buffer.getvalue().to_pybytes(), media_type=PARQUET)
+
+async def single_batch(records: List[Dict]) -> AsyncIterator[Tuple[List[str], List[Tuple]]]:
+    """Adapta un resultado que ya está en memoria (top clientes, ticket) al formato de lotes"""
+    keys = list(records[0].keys()) if records else []
+    yield keys, [tuple(r[k] for k in keys) for r in records]
@@ -0,0 +1,241 @@
+# Compresión de respuestas (gzip o zstd) como middleware ASGI
+# Funciona también con las respuestas en streaming: cada lote sale comprimido con un flush
+
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from ..config.settings import API_CONFIG
+
+# Lo que vale la pena comprimir; Parquet ya viene comprimido por columna
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/vnd.apache.arrow.stream",
+    "text/",
+)
+
+def _zstandard():
+    """zstandard es opcional: sin el paquete se negocia solo gzip"""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        # wbits=31 es el formato gzip (cabecera y CRC), no deflate pelado
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class _ZstdEncoder:
+    def __init__(self, level: int):
+        zstandard = _zstandard()
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.compress(data)
+        return out + (self._compressor.flush() if final else self._compressor.flush(self._flush_block))
+
+class CompressionStats:
+    """Bytes de entrada y salida y CPU gastada por encoding, para elegir el nivel.
+
+    La CPU se mide con thread_time alrededor de cada llamada al compresor,
+    así no cuenta lo que hacen otras corrutinas del mismo worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+
+    def record(self, encoding: str, level: int, bytes_in: int, bytes_out: int, cpu_seconds: float, finished: bool):
+        with self._lock:
+            stats = self._stats.setdefault(encoding, {
+                "level": level, "responses": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0
+            })
+            stats["bytes_in"] += bytes_in
+            stats["bytes_out"] += bytes_out
+            stats["cpu_seconds"] += cpu_seconds
+            if finished:
+                stats["responses"] += 1
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            stats = {encoding: dict(values) for encoding, values in self._stats.items()}
+        report = {}
+        for encoding, values in stats.items():
+            mb_in = values["bytes_in"] / (1024 * 1024)
+            report[encoding] = {
+                "level": values["level"],
+                "responses": values["responses"],
+                "mb_in": round(mb_in, 3),
+                "mb_out": round(values["bytes_out"] / (1024 * 1024), 3),
+                "ratio": round(values["bytes_in"] / values["bytes_out"], 2) if values["bytes_out"] else None,
+                "cpu_ms_per_mb": round(values["cpu_seconds"] * 1000 / mb_in, 2) if mb_in else None
+            }
+        return report
+
+# Una por proceso, la comparten las dos apps
+compression_stats = CompressionStats()
+
+def choose_encoding(accept_encoding: Optional[str], zstd_available: bool = True) -> Optional[str]:
+    """Encoding a usar según Accept-Encoding y sus q; a igual q preferimos zstd"""
+    if not accept_encoding:
+        return None
+    offered = {}
+    for part in accept_encoding.split(","):
+        coding, *params = [p.strip() for p in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        offered[coding.lower()] = quality
+
+    supported = ["zstd", "gzip"] if zstd_available else ["gzip"]
+    best, best_quality = None, 0.0
+    for coding in supported:
+        quality = offered.get(coding, offered.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+def _variant_etag(etag: str, encoding: str) -> str:
+    """El ETag de la versión comprimida tiene que ser distinto del de la original"""
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else etag
+
+class CompressionMiddleware:
+    """Comprime con gzip o zstd las respuestas de más de `minimum_size` bytes.
+
+    Si la respuesta viene en streaming se junta hasta pasar el mínimo y
+    después cada lote se comprime y se manda con un flush, así el cliente
+    sigue recibiendo de a lotes. Las respuestas con ETag llevan el encoding
+    como sufijo, y el If-None-Match que llega se lo saca antes de pasarlo a
+    la app, así los 304 siguen funcionando.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: Optional[int] = None,
+        gzip_level: Optional[int] = None,
+        zstd_level: Optional[int] = None
+    ):
+        self.app = app
+        self.minimum_size = API_CONFIG["compression_min_size"] if minimum_size is None else minimum_size
+        self.levels = {
+            "gzip": API_CONFIG["gzip_level"] if gzip_level is None else gzip_level,
+            "zstd": API_CONFIG["zstd_level"] if zstd_level is None else zstd_level
+        }
+        self.zstd_available = _zstandard() is not None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"), self.zstd_available)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(self, encoding, send)
+        await self.app(responder.rewrite_scope(scope), receive, responder.send)
+
+class _CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.encoding = encoding
+        self.level = middleware.levels[encoding]
+        self.minimum_size = middleware.minimum_size
+        self._send = send
+        self.start = None
+        self.buffer = b""
+        self.encoder = None
+        self.passthrough = False
+        self.stripped_etag = False
+
+    def rewrite_scope(self, scope):
+        """Saca el sufijo del encoding de los ETag de If-None-Match"""
+        headers = MutableHeaders(scope=dict(scope, headers=list(scope["headers"])))
+        if_none_match = headers.get("if-none-match")
+        suffix = f'-{self.encoding}"'
+        if if_none_match and suffix in if_none_match:
+            headers["if-none-match"] = if_none_match.replace(suffix, '"')
+            self.stripped_etag = True
+            return dict(scope, headers=headers.raw)
+        return scope
+
+    def _compressible(self, start) -> bool:
+        headers = Headers(raw=start["headers"])
+        if start["status"] < 200 or start["status"] in (204, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            if message["status"] == 304 and self.stripped_etag:
+                # El cliente tenía la versión comprimida: el 304 tiene que nombrar esa
+                headers = MutableHeaders(scope=message)
+                if "etag" in headers:
+                    headers["etag"] = _variant_etag(headers["etag"], self.encoding)
+                headers.add_vary_header("Accept-Encoding")
+            if not self._compressible(message):
+                self.passthrough = True
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            self.buffer += body
+            if len(self.buffer) < self.minimum_size:
+                if more_body:
+                    return
+                # Chica: no vale la pena, sale como vino
+                self.passthrough = True
+                await self._send(self.start)
+                await self._send({"type": "http.response.body", "body": self.buffer, "more_body": False})
+                return
+            body, self.buffer = self.buffer, b""
+            self.encoder = _ZstdEncoder(self.level) if self.encoding == "zstd" else _GzipEncoder(self.level)
+            compressed = self._compress(body, final=not more_body)
+
+            headers = MutableHeaders(scope=self.start)
+            headers["content-encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if "etag" in headers:
+                headers["etag"] = _variant_etag(headers["etag"], self.encoding)
+            if more_body:
+                del headers["content-length"]
+            else:
+                headers["content-length"] = str(len(compressed))
+            await self._send(self.start)
+            await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+            return
+
+        compressed = self._compress(body, final=not more_body)
+        await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    def _compress(self, data: bytes, final: bool) -> bytes:
+        start = time.thread_time()
+        compressed = self.encoder.compress(data, final)
+        compression_stats.record(
+            self.encoding, self.level, len(data), len(compressed), time.thread_time() - start, final
+        )
+        return compressed
@@ -0,0 +1,69 @@
+# Requests condicionales (ETag / Last-Modified) para lo que cambia solo con el batch
+# Si el cliente ya tiene la versión se contesta 304 sin armar ni serializar nada
+
+import hashlib
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request
+from fastapi.responses import Response
+from ..config.settings import CACHE_CONFIG
+
+# La respuesta cambia con el formato pedido y con la API key (un proxy no debe mezclarlas)
+VARY = "Accept, X-API-Key"
+
+def strong_etag(*parts) -> str:
+    """ETag fuerte a partir de la versión de los datos y de lo que cambia el cuerpo (limit, formato)"""
+    digest = hashlib.blake2b("\x1f".join(str(p) for p in parts).encode(), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match usa comparación débil: W/"x" coincide con "x" (RFC 9110, 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+def _not_modified_since(if_modified_since: Optional[str], last_modified: datetime) -> bool:
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since is None or since.tzinfo is None:
+        return False
+    return last_modified <= since
+
+def cache_headers(etag: str, last_modified: datetime) -> dict:
+    return {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": (
+            f"public, max-age={CACHE_CONFIG['http_max_age']}, "
+            f"stale-while-revalidate={CACHE_CONFIG['http_stale_while_revalidate']}"
+        ),
+        "Vary": VARY,
+    }
+
+def not_modified(request: Request, etag: str, last_modified: datetime) -> Optional[Response]:
+    """304 si el cliente ya tiene esta versión, o None para seguir con la respuesta completa.
+
+    Si viene If-None-Match manda ese; If-Modified-Since solo se mira cuando
+    no hay ETag en el request, como dice el RFC.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = etag_matches(if_none_match, etag)
+    else:
+        fresh = _not_modified_since(request.headers.get("if-modified-since"), last_modified)
+    if not fresh:
+        return None
+    return Response(status_code=304, headers=cache_headers(etag, last_modified))
+
+def with_cache_headers(response: Response, etag: str, last_modified: datetime) -> Response:
+    """Le pone ETag, Last-Modified y Cache-Control a una respuesta ya armada"""
+    response.headers.update(cache_headers(etag, last_modified))
+    return response
@@ -1,15 +1,29 @@
 # API principal para el análisis de ventas
 # TODO: Agregar autenticación y validaciones
 
-from fastapi import FastAPI, HTTPException, Security, Depends
+from fastapi import FastAPI, HTTPException, Security, Depends, Header, Request
 from fastapi.security.api_key import APIKeyHeader, APIKey
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict
+from fastapi.responses import Response
+from typing import List, Dict, Optional
 import logging
-from datetime import datetime
+from datetime import date, datetime
+from pydantic import BaseModel, Field
 
-from ..services.data_service import DataService
-from ..config.settings import API_CONFIG, LOG_CONFIG
+from ..services.async_data_service import AsyncDataService
+from ..database.engine import pool_stats
+from ..utils.deadline import DeadlineExceeded, DeadlineMiddleware
+from ..utils.admission import AdmissionController, Overloaded
+from ..utils.metrics import MEDIA_TYPE, REGISTRY, MetricsMiddleware, start_metrics_server
+from ..utils.monitoring import log_api_request, publisher
+from .streaming import streaming_json_response
+from .responses import FastJSONResponse
+from .columnar import columnar_response, negotiate, single_batch
+from .conditional import not_modified, strong_etag, with_cache_headers
+from .compression import CompressionMiddleware, compression_stats
+from .rate_limit import RateLimiter, RateLimitMiddleware
+from .pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, validate_page_size
+from ..config.settings import API_CONFIG, LOG_CONFIG, MONITORING_CONFIG, SECURITY_CONFIG
 
 # Configuración básica de logs
 logging.basicConfig(
@@ -24,7 +38,7 @@ api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=True)
 
 async def get_api_key(api_key_header: str = Security(api_key_header)):
     """Valida la API key proporcionada"""
-    if api_key_header == API_CONFIG["api_key"]:
+    if api_key_header == SECURITY_CONFIG["api_key"]:
         return api_key_header
     raise HTTPException(
         status_code=403,
@@ -45,52 +59,130 @@ app = FastAPI(
     Toda petición requiere autenticación mediante API Key en el header 'X-API-Key'.
     """,
     version="1.0.0",
+    default_response_class=FastJSONResponse,
     contact={
         "name": "Equipo de Desarrollo PuntoRed",
         "email": "dev@puntored.com"
     }
 )
 
+# Latencia y status por ruta; va primero para quedar más adentro y ver la ruta que resolvió el router.
+# Con el monitoreo activo cada request también va a CloudWatch, en lotes desde otro thread
+app.add_middleware(
+    MetricsMiddleware,
+    on_request=log_api_request if MONITORING_CONFIG["enabled"] else None
+)
+
+# Deadline por request: lo lee DataService para el statement_timeout y los reintentos
+app.add_middleware(DeadlineMiddleware, timeout=API_CONFIG["request_timeout"])
+
+# Límite por API key; va adentro de CORS así los 429 llevan sus headers
+rate_limiter = RateLimiter()
+app.add_middleware(
+    RateLimitMiddleware,
+    limiter=rate_limiter,
+    authenticate=lambda key: key == SECURITY_CONFIG["api_key"]
+)
+
 # Configuración de CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=API_CONFIG["allowed_origins"],
+    allow_origins=SECURITY_CONFIG["allowed_origins"],
     allow_credentials=True,
-    allow_methods=["GET"],
+    allow_methods=["GET", "POST"],
     allow_headers=["*"],
 )
 
+# gzip o zstd según Accept-Encoding, también para /transacciones en streaming
+app.add_middleware(CompressionMiddleware)
+
 # Servicio de datos
-data_service = DataService()
+# Es async para que una query lenta no frene al resto de requests del worker
+# El tope de queries en vuelo lo aplica el servicio alrededor de cada query
+admission = AdmissionController()
+data_service = AsyncDataService(admission=admission)
 
-def _format_response(data: any, message: str = "OK") -> Dict:
-    """Formatea la respuesta de la API"""
-    return {
+@app.on_event("startup")
+async def startup():
+    """Con el monitoreo activo, las métricas salen por su propio puerto y a CloudWatch"""
+    if MONITORING_CONFIG["enabled"]:
+        start_metrics_server(MONITORING_CONFIG["metrics_port"])
+        publisher.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Cierra el pool de conexiones al apagar la API y manda a CloudWatch lo que quedó acumulado"""
+    await data_service.close()
+    publisher.stop()
+
+def _format_response(data: any, message: str = "OK", timestamp: Optional[datetime] = None) -> FastJSONResponse:
+    """Formatea la respuesta de la API.
+    
+    Devuelve la respuesta ya armada para que FastAPI no haga la pasada de
+    jsonable_encoder: orjson serializa directo los valores de numpy y Decimal.
+    Las respuestas con ETag pasan la fecha de la versión como timestamp, así
+    el mismo ETag es siempre el mismo cuerpo.
+    """
+    return FastJSONResponse({
         "status": "success",
         "message": message,
         "data": data,
-        "timestamp": datetime.now().isoformat()
-    }
+        "timestamp": (timestamp or datetime.now()).isoformat()
+    })
 
 @app.get("/health", tags=["Monitoreo"])
 async def health_check():
     """
-    Verifica que la API esté funcionando correctamente.
+    Liveness: verifica que el proceso responde, sin tocar la base.
+    
+    Lo consulta el balanceador en cada probe, por eso no corre ninguna query.
     
     Returns:
         dict: Estado de salud de la API
     """
+    return _format_response({"status": "healthy"})
+
+@app.get("/metrics", tags=["Monitoreo"])
+async def metrics():
+    """
+    Métricas en formato Prometheus: latencia por ruta y por método de
+    DataService, pool de conexiones y caché. Sin API key, como el health.
+    """
+    return Response(REGISTRY.render(), media_type=MEDIA_TYPE)
+
+@app.get("/health/ready", tags=["Monitoreo"])
+async def readiness_check():
+    """
+    Readiness: verifica que la base de datos responde.
+    
+    Returns:
+        dict: Estado de la API y de la base de datos
+        
+    Raises:
+        503: La base de datos no responde
+    """
     try:
-        data_service.get_average_ticket()
-        return _format_response({"status": "healthy"})
+        await data_service.ping()
+        return _format_response({
+            "status": "ready",
+            "database": "ok",
+            "pool": pool_stats(),
+            "compression": compression_stats.snapshot(),
+            "admission": {**admission.stats(), "rate_limited": rate_limiter.rejected},
+            "cloudwatch": publisher.stats()
+        })
     except Exception as e:
-        logger.error(f"Error en health check: {e}")
-        raise HTTPException(status_code=500, detail="Service unhealthy")
+        logger.error(f"Error en readiness check: {e}")
+        raise HTTPException(status_code=503, detail="Service not ready")
 
 @app.get("/transacciones", tags=["Consultas"])
 async def get_transacciones(
     producto: str,
     fecha: str = None,
+    stream: bool = False,
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None,
+    accept: Optional[str] = Header(default=None),
     api_key: APIKey = Depends(get_api_key)
 ):
     """
@@ -99,6 +191,15 @@ async def get_transacciones(
     Args:
         producto: Identificador del producto
         fecha: Fecha en formato YYYY-MM-DD (opcional, default: fecha actual)
+        stream: Si es true la lista se manda en chunks desde un cursor del
+            servidor, sin caché; para productos con muchísimos clientes
+        page_size: Clientes por página (default y máximo en API_CONFIG); con
+            page_size o cursor la respuesta se pagina por cliente_id
+        cursor: El next_cursor de la página anterior (también viene en el
+            header X-Next-Cursor); no trae más páginas cuando es null
+        accept: Con application/vnd.apache.arrow.stream o
+            application/vnd.apache.parquet se devuelven las columnas en ese
+            formato, armadas directo desde el cursor
         
     Returns:
         dict: Lista de transacciones con sus detalles
@@ -106,26 +207,164 @@ async def get_transacciones(
     Raises:
         400: Parámetros inválidos
         403: API Key inválida
+        406: Formato columnar no disponible
         500: Error interno del servidor
+        503: Servicio saturado, sin lugar para otra query
+        504: Se agotó el tiempo del request
     """
     try:
-        data = data_service.get_daily_transactions(producto, fecha)
+        _validate_fecha(fecha)
+        columnar = negotiate(accept)
+        if page_size is not None or cursor is not None:
+            if stream:
+                raise ValueError("stream no se puede combinar con page_size ni cursor")
+            return await _transactions_page(producto, fecha, page_size, cursor, columnar)
+        if columnar:
+            return await columnar_response(
+                columnar,
+                data_service.stream_daily_transaction_rows(producto, fecha)
+            )
+        if stream:
+            return await streaming_json_response(
+                {"producto": producto, "fecha": fecha},
+                "transacciones",
+                data_service.stream_daily_transactions(producto, fecha)
+            )
+        data = await data_service.get_daily_transactions(producto, fecha)
         return _format_response(data)
+    except HTTPException:
+        raise
     except ValueError as e:
         logger.warning(f"Error de validación: {e}")
         raise HTTPException(status_code=400, detail=str(e))
+    except Overloaded as e:
+        logger.warning(f"Sin lugar para la query: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except DeadlineExceeded as e:
+        logger.warning(f"Deadline en transacciones: {e}")
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.error(f"Error en transacciones: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _validate_fecha(fecha: Optional[str]):
+    """ValueError (400) si la fecha no es YYYY-MM-DD, antes de que llegue a la query"""
+    if fecha is None:
+        return
+    try:
+        datetime.strptime(fecha, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"fecha debe tener el formato YYYY-MM-DD: {fecha!r}")
+
+def _cursor_after(cursor: Optional[str], producto: str, fecha: Optional[str]) -> int:
+    """El último cliente_id de la página anterior, validando que el cursor sea de esta consulta"""
+    if cursor is None:
+        return 0
+    key = decode_cursor(cursor)
+    if key.get("producto") != producto or key.get("fecha") != fecha or not isinstance(key.get("cliente_id"), int):
+        raise ValueError("El cursor no corresponde a este producto y fecha")
+    return key["cliente_id"]
+
+async def _transactions_page(
+    producto: str,
+    fecha: Optional[str],
+    page_size: Optional[int],
+    cursor: Optional[str],
+    columnar: Optional[str]
+):
+    """Una página de /transacciones, en JSON o en el formato columnar pedido"""
+    page = await data_service.get_daily_transactions_page(
+        producto,
+        fecha,
+        validate_page_size(page_size) or API_CONFIG["default_page_size"],
+        _cursor_after(cursor, producto, fecha)
+    )
+    siguiente = page["siguiente_cliente_id"]
+    next_cursor = None
+    if siguiente is not None:
+        next_cursor = encode_cursor({"producto": producto, "fecha": fecha, "cliente_id": siguiente})
+
+    if columnar:
+        response = await columnar_response(columnar, single_batch(page["transacciones"]))
+    else:
+        response = _format_response({
+            "producto": producto,
+            "fecha": fecha,
+            "transacciones": page["transacciones"],
+            "next_cursor": next_cursor
+        })
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+class ConsultaTransacciones(BaseModel):
+    producto: str
+    fecha: date
+
+class TransaccionesBatchRequest(BaseModel):
+    consultas: List[ConsultaTransacciones] = Field(..., min_length=1)
+
+@app.post("/transacciones/batch", tags=["Consultas"])
+async def get_transacciones_batch(
+    request: TransaccionesBatchRequest,
+    api_key: APIKey = Depends(get_api_key)
+):
+    """
+    Transacciones de varios pares (producto, fecha) en un solo request.
+    
+    En vez de un /transacciones por par, todos los que no están en caché
+    salen de una misma query con (producto, fecha) IN (...).
+    
+    Args:
+        request: {"consultas": [{"producto": "...", "fecha": "YYYY-MM-DD"}, ...]}
+        
+    Returns:
+        dict: {"resultados": {producto: {fecha: [transacciones]}}}
+        
+    Raises:
+        400: Demasiados pares
+        403: API Key inválida
+        422: Cuerpo inválido
+        500: Error interno del servidor
+        503: Servicio saturado, sin lugar para otra query
+        504: Se agotó el tiempo del request
+    """
+    try:
+        pairs = [(c.producto, c.fecha.isoformat()) for c in request.consultas]
+        if len(set(pairs)) > API_CONFIG["max_batch_pairs"]:
+            raise ValueError(f"Como máximo {API_CONFIG['max_batch_pairs']} pares por request")
+        results = await data_service.get_daily_transactions_batch(pairs)
+
+        resultados: Dict[str, Dict[str, List]] = {}
+        for (producto, fecha), data in results.items():
+            resultados.setdefault(producto, {})[fecha] = data["transacciones"]
+        return _format_response({"resultados": resultados})
+    except ValueError as e:
+        logger.warning(f"Error de validación: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Overloaded as e:
+        logger.warning(f"Sin lugar para la query: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except DeadlineExceeded as e:
+        logger.warning(f"Deadline en batch de transacciones: {e}")
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error en batch de transacciones: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/top-clientes", tags=["Consultas"])
 async def get_top_clientes(
+    request: Request,
     limit: int = 5,
+    accept: Optional[str] = Header(default=None),
     api_key: APIKey = Depends(get_api_key)
 ):
     """
     Obtiene los mejores clientes por monto de ventas.
     
+    Responde con ETag y Last-Modified; con If-None-Match de la versión
+    vigente contesta 304 sin serializar el ranking.
+    
     Args:
         limit: Número de clientes a retornar (1-100, default: 5)
         
@@ -133,37 +372,86 @@ async def get_top_clientes(
         dict: Lista de clientes con sus montos totales
         
     Raises:
+        304: El cliente ya tiene esta versión
         400: Límite fuera de rango
         403: API Key inválida
         500: Error interno del servidor
+        503: Servicio saturado, sin lugar para otra query
+        504: Se agotó el tiempo del request
     """
     try:
         if limit < 1 or limit > 100:
             raise ValueError("El límite debe estar entre 1 y 100")
-        data = data_service.get_top_clients(limit)
-        return _format_response(data)
+        columnar = negotiate(accept)
+        # Versión y datos de la misma foto: un refresco en el medio no puede mezclarlos
+        version, data = await data_service.get_top_clients_versioned(limit)
+        etag = strong_etag("top-clientes", version["version"], limit, columnar or "json")
+        cached = not_modified(request, etag, version["actualizado"])
+        if cached is not None:
+            return cached
+
+        if columnar:
+            response = await columnar_response(columnar, single_batch(data))
+        else:
+            response = _format_response(data, timestamp=version["actualizado"])
+        return with_cache_headers(response, etag, version["actualizado"])
+    except HTTPException:
+        raise
     except ValueError as e:
         logger.warning(f"Error de validación: {e}")
         raise HTTPException(status_code=400, detail=str(e))
+    except Overloaded as e:
+        logger.warning(f"Sin lugar para la query: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except DeadlineExceeded as e:
+        logger.warning(f"Deadline en top clientes: {e}")
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.error(f"Error en top clientes: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/ticket-promedio", tags=["Consultas"])
-async def get_ticket_promedio(api_key: APIKey = Depends(get_api_key)):
+async def get_ticket_promedio(
+    request: Request,
+    accept: Optional[str] = Header(default=None),
+    api_key: APIKey = Depends(get_api_key)
+):
     """
     Calcula el ticket promedio de ventas.
     
+    Igual que /top-clientes, responde 304 si el cliente ya tiene la versión.
+    
     Returns:
         dict: Ticket promedio y métricas relacionadas
         
     Raises:
+        304: El cliente ya tiene esta versión
         403: API Key inválida
         500: Error interno del servidor
+        503: Servicio saturado, sin lugar para otra query
+        504: Se agotó el tiempo del request
     """
     try:
-        data = data_service.get_average_ticket()
-        return _format_response(data)
+        columnar = negotiate(accept)
+        version, data = await data_service.get_average_ticket_versioned()
+        etag = strong_etag("ticket-promedio", version["version"], columnar or "json")
+        cached = not_modified(request, etag, version["actualizado"])
+        if cached is not None:
+            return cached
+
+        if columnar:
+            response = await columnar_response(columnar, single_batch([data]))
+        else:
+            response = _format_response(data, timestamp=version["actualizado"])
+        return with_cache_headers(response, etag, version["actualizado"])
+    except HTTPException:
+        raise
+    except Overloaded as e:
+        logger.warning(f"Sin lugar para la query: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except DeadlineExceeded as e:
+        logger.warning(f"Deadline en ticket promedio: {e}")
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.error(f"Error en ticket promedio: {e}")
         raise HTTPException(status_code=500, detail=str(e))
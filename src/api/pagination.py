@@ -0,0 +1,34 @@
+# Cursores opacos para la paginación por clave (keyset)
+# El cliente solo los devuelve tal cual; adentro va la última clave de la página
+
+import base64
+import json
+from typing import Dict, Optional
+from ..config.settings import API_CONFIG
+
+# Header con el cursor de la página siguiente (también en /metricas, que responde una lista)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(key: Dict) -> str:
+    """Cursor url-safe a partir de la última clave de la página"""
+    raw = json.dumps(key, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def decode_cursor(cursor: str) -> Dict:
+    """La clave que va dentro del cursor; ValueError si no es un cursor nuestro"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+    if not isinstance(key, dict):
+        raise ValueError("Cursor inválido")
+    return key
+
+def validate_page_size(page_size: Optional[int]) -> Optional[int]:
+    """page_size entre 1 y el máximo configurado (None = sin paginar)"""
+    if page_size is None:
+        return None
+    if page_size < 1 or page_size > API_CONFIG["max_page_size"]:
+        raise ValueError(f"page_size debe estar entre 1 y {API_CONFIG['max_page_size']}")
+    return page_size
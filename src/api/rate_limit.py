@@ -0,0 +1,125 @@
+# Límite de requests por proveedor
+# Un proveedor no puede agotar el pool de conexiones y dejar esperando al resto;
+# el tope de queries en vuelo está en utils/admission.py, alrededor de cada query
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from starlette.datastructures import Headers
+from ..config.settings import SECURITY_CONFIG
+from .responses import dumps
+
+# Sin límite: health checks, documentación y métricas
+EXEMPT_PATHS = ("/health", "/docs", "/redoc", "/openapi.json", "/metrics")
+
+class TokenBucket:
+    """Balde de `burst` fichas que se rellena a `rate` fichas por segundo"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: int, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def take(self, now: float) -> Tuple[bool, float]:
+        """(permitido, segundos hasta la próxima ficha)"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0.0
+        return False, (1 - self.tokens) / self.rate
+
+class RateLimiter:
+    """Un token bucket por API key.
+
+    Los baldes viven en memoria del proceso, así que con N workers el límite
+    efectivo es N veces el configurado. Se guardan como mucho `max_keys`
+    (los que hace más tiempo que no piden se descartan primero), para que
+    alguien probando keys inventadas no haga crecer la memoria.
+    """
+
+    def __init__(
+        self,
+        per_minute: Optional[int] = None,
+        burst: Optional[int] = None,
+        max_keys: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.rate = (per_minute or SECURITY_CONFIG["rate_limit"]) / 60.0
+        self.burst = burst or SECURITY_CONFIG["rate_limit_burst"]
+        self.max_keys = max_keys or SECURITY_CONFIG["rate_limit_max_keys"]
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.rejected = 0
+
+    def allow(self, key: str) -> Tuple[bool, float]:
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            allowed, retry_after = bucket.take(now)
+            if not allowed:
+                self.rejected += 1
+        return allowed, retry_after
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, int(retry_after + 0.999))).encode())
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class RateLimitMiddleware:
+    """Token bucket por X-API-Key antes de llegar a la app.
+
+    Solo una key que `authenticate` reconoce tiene balde propio. Sin key o
+    con una inválida se usa el de la IP del cliente: si no, cada key
+    inventada sería un balde nuevo y podría sacar del LRU a las de verdad.
+    """
+
+    def __init__(
+        self,
+        app,
+        limiter: Optional[RateLimiter] = None,
+        authenticate: Optional[Callable[[str], bool]] = None,
+        exempt_paths: Iterable[str] = EXEMPT_PATHS
+    ):
+        self.app = app
+        self.limiter = limiter or RateLimiter()
+        self.authenticate = authenticate
+        self.exempt_paths = tuple(exempt_paths)
+
+    def bucket_key(self, scope) -> str:
+        api_key = Headers(scope=scope).get("x-api-key")
+        if api_key and self.authenticate is not None and self.authenticate(api_key):
+            return f"key:{api_key}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'anonimo'}"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        allowed, retry_after = self.limiter.allow(self.bucket_key(scope))
+        if not allowed:
+            await _reject(send, 429, "Demasiados requests para esta API key", retry_after)
+            return
+
+        await self.app(scope, receive, send)
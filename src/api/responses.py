@@ -0,0 +1,35 @@
+# Respuestas JSON con orjson
+# jsonable_encoder recorre cada dict en Python puro; orjson serializa todo de una en C
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+
+# NumPy de forma nativa (los escalares que deja pandas) y claves que no son str
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _default(value: Any):
+    """Lo que orjson no conoce: Decimal de Numeric y Timestamp de pandas"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)) or hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"No sé serializar {type(value).__name__}")
+
+def dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=_default, option=ORJSON_OPTIONS)
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse que serializa con orjson.
+
+    Los handlers la devuelven armada (ver _format_response), así FastAPI no
+    pasa el contenido por jsonable_encoder antes. Los NaN salen como null,
+    que además es JSON válido (el json estándar escribía NaN).
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
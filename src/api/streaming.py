@@ -0,0 +1,70 @@
+# Respuestas JSON en streaming para resultados grandes
+# El sobre es el mismo que arma _format_response, pero la lista se escribe de a lotes
+
+from datetime import datetime
+from typing import AsyncIterator, Dict, List
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from .responses import dumps
+
+async def json_envelope(
+    data: Dict,
+    list_key: str,
+    batches: AsyncIterator[List[Dict]],
+    message: str = "OK"
+) -> AsyncIterator[bytes]:
+    """Escribe {"status", "message", "timestamp", "data": {..., list_key: [...]}} lote por lote"""
+    head = dumps({"status": "success", "message": message, "timestamp": datetime.now().isoformat()})
+    yield head[:-1] + b',"data":' + dumps(data)[:-1] + (b"," if data else b"") + dumps(list_key) + b":["
+
+    first = True
+    async for batch in batches:
+        if not batch:
+            continue
+        # Un lote entero es una lista JSON; le sacamos los corchetes y se concatena
+        body = dumps(batch)[1:-1]
+        yield body if first else b"," + body
+        first = False
+
+    yield b"]}}"
+
+def close_when_done(iterator) -> BackgroundTask:
+    """Tarea de fondo que cierra el generador de origen al terminar la respuesta.
+
+    Starlette corre la tarea también cuando el cliente se desconecta, así el
+    cursor y su conexión se liberan enseguida y no cuando pase el GC. Va
+    envuelto en una corutina porque aclose (un método builtin) no lo reconoce
+    como async y lo mandaría a un thread sin esperarlo.
+    """
+    async def close():
+        await iterator.aclose()
+    return BackgroundTask(close)
+
+async def streaming_json_response(
+    data: Dict,
+    list_key: str,
+    batches: AsyncIterator[List[Dict]],
+    message: str = "OK"
+) -> StreamingResponse:
+    """StreamingResponse con el primer lote ya leído.
+
+    Si la query falla antes de la primera fila todavía podemos contestar un
+    error normal; una vez mandados los headers, un error corta el JSON.
+    `batches` tiene que ser un generador async (se cierra con aclose).
+    """
+    iterator = batches.__aiter__()
+    try:
+        first = await iterator.__anext__()
+    except StopAsyncIteration:
+        first = []
+
+    async def chained():
+        yield first
+        async for batch in iterator:
+            yield batch
+
+    return StreamingResponse(
+        json_envelope(data, list_key, chained(), message),
+        media_type="application/json",
+        background=close_when_done(iterator)
+    )
@@ -1,10 +1,13 @@
 import os
 import pandas as pd
 from datetime import datetime, timedelta
-import boto3
 import logging
-from sqlalchemy import create_engine
 import json
+from ..database.engine import get_engine
+from ..utils.aws import get_client
+from ..utils.monitoring import flush_metrics
+from ..database.rollup import refresh_daily_rollup
+from ..database.partitions import maintain_partitions
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO)
@@ -13,9 +16,10 @@ logger = logging.getLogger(__name__)
 class DailyProcessor:
     def __init__(self):
         """Inicializa las conexiones y configuraciones necesarias"""
-        self.rds_connection = create_engine(os.getenv('DATABASE_URL'))
-        self.s3_client = boto3.client('s3')
-        self.sns_client = boto3.client('sns')
+        # Pool compartido: en un Lambda caliente se reutiliza entre invocaciones
+        self.rds_connection = get_engine(os.getenv('DATABASE_URL'))
+        self.s3_client = get_client('s3')
+        self.sns_client = get_client('sns')
         self.bucket_name = os.getenv('S3_BUCKET_NAME')
         self.sns_topic = os.getenv('SNS_TOPIC_ARN')
 
@@ -122,6 +126,11 @@ def lambda_handler(event, context):
     try:
         processor = DailyProcessor()
         
+        # Primero sumamos las ventas nuevas al rollup que lee la API
+        refresh_daily_rollup(processor.rds_connection)
+        # Con el rollup al día ya se pueden archivar los meses vencidos
+        maintain_partitions(processor.rds_connection)
+        
         # Procesar para cada proveedor
         for provider_id in range(1, 4):  # 3 proveedores
             processor.process_provider(provider_id)
@@ -136,6 +145,9 @@ def lambda_handler(event, context):
             'statusCode': 500,
             'body': json.dumps(f'Error en el procesamiento: {str(e)}')
         }
+    finally:
+        # El Lambda puede congelarse apenas devuelve: las métricas salen antes
+        flush_metrics()
 
 if __name__ == "__main__":
     # Para pruebas locales
@@ -0,0 +1,207 @@
+import io
+import os
+import time
+import logging
+import argparse
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+import pandas as pd
+from sqlalchemy import text
+from dotenv import load_dotenv
+from .models import Base
+from .engine import get_engine
+
+# Configuración de logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+STAGING_SUFFIX = '_staging'
+
+# Un archivo (CSV o Parquet), DataFrames sueltos o tuplas en el orden de `columns`
+Source = Union[str, pd.DataFrame, Iterable[pd.DataFrame], Iterable[Sequence]]
+
+def table_columns(table: str) -> List[str]:
+    return [c.name for c in Base.metadata.tables[table].columns]
+
+def primary_key(table: str) -> List[str]:
+    return [c.name for c in Base.metadata.tables[table].primary_key.columns]
+
+def iter_chunks(source: Source, columns: List[str], chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Recorre la fuente de a `chunk_size` filas sin cargarla entera en memoria"""
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunk_size):
+            yield source.iloc[start:start + chunk_size][columns]
+        return
+
+    if isinstance(source, (str, os.PathLike)):
+        path = str(source)
+        if path.endswith('.parquet'):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError as e:
+                raise ImportError("Para leer Parquet hace falta instalar pyarrow") from e
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+                yield batch.to_pandas()[columns]
+        else:
+            for df in pd.read_csv(path, usecols=columns, chunksize=chunk_size):
+                yield df[columns]
+        return
+
+    rows = iter(source)
+    while True:
+        first = next(rows, None)
+        if first is None:
+            return
+        if isinstance(first, pd.DataFrame):
+            # Ya viene en bloques (por ejemplo, del generador)
+            yield first[columns]
+            for df in rows:
+                yield df[columns]
+            return
+        chunk = [first, *islice(rows, chunk_size - 1)]
+        yield pd.DataFrame.from_records(chunk, columns=columns)
+
+def _copy_chunk(cursor, table: str, df: pd.DataFrame, columns: List[str]):
+    buffer = io.StringIO()
+    df.to_csv(buffer, columns=columns, header=False, index=False)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+def _on_conflict(columns: List[str], keys: List[str]) -> str:
+    updates = [c for c in columns if c not in keys]
+    action = (
+        "DO UPDATE SET " + ", ".join(f"{c} = EXCLUDED.{c}" for c in updates)
+        if updates else "DO NOTHING"
+    )
+    return f"ON CONFLICT ({', '.join(keys)}) {action}"
+
+def _load_postgres(engine, table, chunks, columns, upsert, keys) -> int:
+    """COPY de todos los bloques en una sola transacción.
+
+    En modo upsert se copia a una tabla temporal y al final se pasa a la real
+    con un único INSERT ... ON CONFLICT; si una clave vino repetida gana la
+    última fila.
+    """
+    rows = 0
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cursor:
+            target = table
+            if upsert:
+                target = f"{table}{STAGING_SUFFIX}"
+                cursor.execute(
+                    f"CREATE TEMP TABLE {target} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+            for df in chunks:
+                _copy_chunk(cursor, target, df, columns)
+                rows += len(df)
+                logger.debug(f"{rows:,} filas copiadas a {target}")
+            if upsert:
+                key_list = ', '.join(keys)
+                # DISTINCT ON para que una clave repetida no choque consigo misma
+                cursor.execute(f"""
+                    INSERT INTO {table} ({', '.join(columns)})
+                    SELECT DISTINCT ON ({key_list}) {', '.join(columns)}
+                    FROM {target}
+                    ORDER BY {key_list}, ctid DESC
+                    {_on_conflict(columns, keys)}
+                """)
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+    return rows
+
+def _load_generic(engine, table, chunks, columns, upsert, keys) -> int:
+    """Sin COPY (SQLite): executemany por bloque dentro de una transacción"""
+    rows = 0
+    statement = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)})"
+    if upsert:
+        statement += " " + _on_conflict(columns, keys)
+    statement = text(statement)
+    with engine.begin() as conn:
+        for df in chunks:
+            records = df.astype(object).where(df.notna(), None).to_dict('records')
+            conn.execute(statement, records)
+            rows += len(df)
+    return rows
+
+def sync_sequence(engine, table: str, column: str = 'id'):
+    """Pone la secuencia del id al día después de cargar filas con id explícito"""
+    if engine.dialect.name != 'postgresql':
+        return
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            SELECT setval(pg_get_serial_sequence('{table}', '{column}'), MAX({column}))
+            FROM {table}
+            HAVING MAX({column}) IS NOT NULL
+        """))
+
+def bulk_load(
+    engine,
+    table: str,
+    source: Source,
+    columns: Optional[List[str]] = None,
+    chunk_size: int = 100_000,
+    upsert: bool = False,
+    conflict_columns: Optional[List[str]] = None
+) -> Dict:
+    """Carga masiva en `table` con COPY FROM STDIN, de a `chunk_size` filas.
+
+    Args:
+        engine: Engine de SQLAlchemy
+        table: Tabla destino (ventas, clientes, ...)
+        source: Ruta a CSV/Parquet, DataFrame, bloques de DataFrames o tuplas
+        columns: Columnas a cargar; por defecto todas las del modelo
+        chunk_size: Filas por bloque, lo que se tiene en memoria a la vez
+        upsert: Si es True la carga es idempotente (pasa por una tabla temporal)
+        conflict_columns: Clave del upsert; por defecto la primary key
+
+    Returns:
+        Dict: Filas cargadas, segundos y filas por segundo
+    """
+    columns = columns or table_columns(table)
+    keys = conflict_columns or primary_key(table)
+    chunks = iter_chunks(source, columns, chunk_size)
+
+    inicio = time.perf_counter()
+    if engine.dialect.name == 'postgresql':
+        rows = _load_postgres(engine, table, chunks, columns, upsert, keys)
+    else:
+        rows = _load_generic(engine, table, chunks, columns, upsert, keys)
+    segundos = time.perf_counter() - inicio
+
+    stats = {
+        'table': table,
+        'rows': rows,
+        'seconds': segundos,
+        'rows_per_second': rows / segundos if segundos else 0.0
+    }
+    logger.info(
+        f"Carga masiva en {table}: {rows:,} filas en {segundos:.1f}s "
+        f"({stats['rows_per_second']:,.0f} filas/s{', upsert' if upsert else ''})"
+    )
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga masiva de CSV o Parquet con COPY")
+    parser.add_argument('table', choices=['ventas', 'clientes'])
+    parser.add_argument('source', help="Archivo .csv o .parquet")
+    parser.add_argument('--db-url', default=os.getenv('DB_URL'))
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--upsert', action='store_true', help="Carga idempotente vía tabla temporal")
+    args = parser.parse_args()
+
+    engine = get_engine(args.db_url)
+    bulk_load(engine, args.table, args.source, chunk_size=args.chunk_size, upsert=args.upsert)
+    sync_sequence(engine, args.table)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Registro de engines por proceso
+# Antes cada módulo hacía su create_engine y cada uno armaba su propio pool
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from ..config.settings import DB_CONFIG
+
+logger = logging.getLogger(__name__)
+
+class _PoolWaitStats:
+    """Cuánto esperan los checkouts por una conexión libre"""
+
+    def _init_stats(self):
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+    def stats(self) -> Dict:
+        capacity = self.size() + self._max_overflow
+        with self._stats_lock:
+            checkouts, timeouts = self.checkouts, self.timeouts
+            wait_total, wait_max = self.wait_total, self.wait_max
+        return {
+            'size': self.size(),
+            'max_overflow': self._max_overflow,
+            'checked_out': self.checkedout(),
+            'checked_in': self.checkedin(),
+            'overflow': self.overflow(),
+            'utilization': self.checkedout() / capacity if capacity > 0 else 0.0,
+            'checkouts': checkouts,
+            'timeouts': timeouts,
+            'wait_avg_ms': wait_total / checkouts * 1000 if checkouts else 0.0,
+            'wait_max_ms': wait_max * 1000
+        }
+
+class InstrumentedQueuePool(_PoolWaitStats, QueuePool):
+    """QueuePool que mide la espera de cada checkout"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._init_stats()
+
+class InstrumentedAsyncQueuePool(_PoolWaitStats, AsyncAdaptedQueuePool):
+    """Lo mismo para el engine async (asyncpg)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._init_stats()
+
+_lock = threading.Lock()
+_engines: Dict[str, Engine] = {}
+_async_engines: Dict[str, AsyncEngine] = {}
+_sessions: Dict[str, sessionmaker] = {}
+
+def _pool_options(url: str, poolclass) -> Dict:
+    if make_url(url).get_backend_name() == 'sqlite':
+        # SQLite trae su propio pool y no acepta pool_size
+        return {}
+    return {
+        'poolclass': poolclass,
+        'pool_size': DB_CONFIG["pool_size"],
+        'max_overflow': DB_CONFIG["max_overflow"],
+        'pool_timeout': DB_CONFIG["pool_timeout"],
+        'pool_recycle': DB_CONFIG["pool_recycle"],
+        'pool_pre_ping': DB_CONFIG["pool_pre_ping"]
+    }
+
+def get_engine(url: Optional[str] = None) -> Engine:
+    """Engine compartido para `url` (por defecto DB_CONFIG["url"]), uno por proceso"""
+    url = url or DB_CONFIG["url"]
+    engine = _engines.get(url)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(url)
+            if engine is None:
+                engine = create_engine(url, echo=DB_CONFIG["echo"], **_pool_options(url, InstrumentedQueuePool))
+                _engines[url] = engine
+                logger.info(f"Pool creado para {engine.url!r}")
+    return engine
+
+def get_async_engine(url: Optional[str] = None) -> AsyncEngine:
+    """Engine async compartido, por defecto DB_CONFIG["async_url"]"""
+    url = url or DB_CONFIG["async_url"]
+    engine = _async_engines.get(url)
+    if engine is None:
+        with _lock:
+            engine = _async_engines.get(url)
+            if engine is None:
+                engine = create_async_engine(
+                    url, echo=DB_CONFIG["echo"], **_pool_options(url, InstrumentedAsyncQueuePool)
+                )
+                _async_engines[url] = engine
+                logger.info(f"Pool async creado para {engine.url!r}")
+    return engine
+
+def get_session(url: Optional[str] = None):
+    """Sesión nueva sobre el engine compartido"""
+    engine = get_engine(url)
+    key = str(engine.url)
+    factory = _sessions.get(key)
+    if factory is None:
+        with _lock:
+            factory = _sessions.setdefault(key, sessionmaker(bind=engine))
+    return factory()
+
+def pool_stats() -> Dict[str, Dict]:
+    """Métricas de cada pool registrado, con la contraseña tapada"""
+    stats = {}
+    for engine in [*_engines.values(), *(e.sync_engine for e in _async_engines.values())]:
+        if isinstance(engine.pool, _PoolWaitStats):
+            stats[repr(engine.url)] = engine.pool.stats()
+    return stats
+
+def dispose_engines():
+    """Cierra todos los pools (al apagar el proceso o en tests)"""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _sessions.clear()
+        # Los async se liberan solos al cerrar el loop; acá solo los olvidamos
+        _async_engines.clear()
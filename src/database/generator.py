@@ -0,0 +1,282 @@
+import os
+import time
+import logging
+import argparse
+from datetime import date, timedelta
+from typing import Iterator, List, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from dotenv import load_dotenv
+from ..config.settings import PRODUCTS_CONFIG
+from .models import Base
+from .engine import get_engine
+from .bulk_load import bulk_load, sync_sequence
+from .partitions import create_partitions
+from .rollup import refresh_daily_rollup
+
+# Configuración de logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+NOMBRES = [
+    'Juan', 'María', 'Carlos', 'Ana', 'Pedro', 'Laura', 'Andrés', 'Camila',
+    'Jorge', 'Valentina', 'Luis', 'Daniela', 'Diego', 'Paula', 'Felipe', 'Sofía'
+]
+APELLIDOS = [
+    'Pérez', 'Gómez', 'López', 'Martínez', 'Rodríguez', 'García', 'Hernández',
+    'Díaz', 'Torres', 'Ramírez', 'Vargas', 'Castro', 'Rojas', 'Moreno'
+]
+
+# Peso relativo de cada hora del día: poco de madrugada, picos al mediodía y a la tarde
+DIURNAL_PROFILE = np.array([
+    0.2, 0.1, 0.1, 0.1, 0.2, 0.4, 0.8, 1.5, 2.5, 3.5, 4.0, 4.5,
+    5.0, 4.5, 4.0, 4.0, 4.5, 5.0, 5.5, 5.0, 4.0, 2.5, 1.2, 0.5
+])
+
+# Lunes a domingo; el fin de semana se vende un poco más
+WEEKDAY_PROFILE = np.array([0.9, 0.9, 0.95, 1.0, 1.15, 1.25, 0.85])
+
+# Máximo que entra en Numeric(10, 2)
+MAX_MONTO = 99_999_999.99
+
+VENTAS_COLUMNS = ['id', 'cliente_id', 'producto', 'fecha', 'monto']
+CLIENTES_COLUMNS = ['id', 'nombre', 'apellido']
+
+DUCKDB_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS clientes (
+        id INTEGER PRIMARY KEY,
+        nombre VARCHAR(100) NOT NULL,
+        apellido VARCHAR(100) NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ventas (
+        id BIGINT,
+        cliente_id INTEGER NOT NULL,
+        producto VARCHAR(100) NOT NULL,
+        fecha DATE NOT NULL,
+        monto DECIMAL(10, 2) NOT NULL
+    )
+    """
+]
+
+class VentasGenerator:
+    """Genera clientes y ventas sintéticas con la forma de los datos reales.
+
+    - Clientes con popularidad Zipf: unos pocos concentran muchas ventas.
+    - Los productos de PRODUCTS_CONFIG (o los que se pasen), con pesos distintos.
+    - Horario diurno y más ventas el fin de semana.
+    - Montos log-normales con una cola Pareto (unas pocas ventas muy grandes).
+
+    Las ventas salen en orden de fecha y con ids crecientes, como las cargas
+    del batch, y en bloques de `chunk_size` filas para que la memoria no
+    dependa del total.
+    """
+
+    def __init__(
+        self,
+        clientes: int = 100_000,
+        productos: Optional[List[str]] = None,
+        days: int = 365,
+        end: Optional[date] = None,
+        zipf_s: float = 1.1,
+        seed: int = 42
+    ):
+        self.clientes = clientes
+        # Los mismos nombres que filtran los servicios y el batch, así las consultas encuentran filas
+        self.productos = list(productos or PRODUCTS_CONFIG["enabled"])
+        self.days = days
+        self.end = end or date.today()
+        self.zipf_s = zipf_s
+        self.rng = np.random.default_rng(seed)
+
+        # Popularidad por ranking, y el ranking repartido al azar entre los ids
+        weights = 1.0 / np.arange(1, clientes + 1) ** zipf_s
+        self._client_cdf = np.cumsum(weights / weights.sum())
+        self._client_ids = self.rng.permutation(clientes) + 1
+
+        product_weights = 1.0 / np.arange(1, len(self.productos) + 1)
+        self._product_p = product_weights / product_weights.sum()
+        self._hour_p = DIURNAL_PROFILE / DIURNAL_PROFILE.sum()
+
+    @property
+    def start(self) -> date:
+        return self.end - timedelta(days=self.days - 1)
+
+    def clientes_chunks(self, chunk_size: int = 100_000) -> Iterator[pd.DataFrame]:
+        """Clientes con id 1..N y nombres al azar"""
+        for first in range(1, self.clientes + 1, chunk_size):
+            ids = np.arange(first, min(first + chunk_size, self.clientes + 1))
+            yield pd.DataFrame({
+                'id': ids,
+                'nombre': self.rng.choice(NOMBRES, len(ids)),
+                'apellido': self.rng.choice(APELLIDOS, len(ids))
+            })
+
+    def _rows_per_day(self, rows: int) -> np.ndarray:
+        days = pd.date_range(self.start, self.end, freq='D')
+        weights = WEEKDAY_PROFILE[days.dayofweek]
+        return self.rng.multinomial(rows, weights / weights.sum())
+
+    def _montos(self, size: int) -> np.ndarray:
+        montos = self.rng.lognormal(mean=3.5, sigma=1.0, size=size)
+        # 1% de las ventas sale de una Pareto: la cola pesada de verdad
+        tail = self.rng.random(size) < 0.01
+        montos[tail] = (self.rng.pareto(1.5, tail.sum()) + 1) * 500
+        return np.round(np.clip(montos, 1, MAX_MONTO), 2)
+
+    def _day_rows(self, day: date, count: int) -> pd.DataFrame:
+        hours = self.rng.choice(24, size=count, p=self._hour_p)
+        seconds = np.sort(hours * 3600 + self.rng.integers(0, 3600, size=count))
+        ranks = np.searchsorted(self._client_cdf, self.rng.random(count), side='right')
+        ranks = np.minimum(ranks, self.clientes - 1)
+        return pd.DataFrame({
+            'cliente_id': self._client_ids[ranks],
+            'producto': np.array(self.productos)[self.rng.choice(len(self.productos), size=count, p=self._product_p)],
+            'momento': pd.Timestamp(day) + pd.to_timedelta(seconds, unit='s'),
+            'monto': self._montos(count)
+        })
+
+    def ventas_chunks(self, rows: int, chunk_size: int = 1_000_000, start_id: int = 1) -> Iterator[pd.DataFrame]:
+        """Ventas en orden cronológico, de a `chunk_size` filas.
+
+        `ventas.fecha` es DATE, así que el horario diurno solo ordena las
+        ventas dentro del día; la columna `momento` queda por si se quiere
+        cargar en una tabla con timestamp.
+        """
+        next_id = start_id
+        pending = []
+        pending_rows = 0
+        for offset, count in enumerate(self._rows_per_day(rows)):
+            day = self.start + timedelta(days=offset)
+            while count > 0:
+                take = min(count, chunk_size - pending_rows)
+                pending.append(self._day_rows(day, take))
+                pending_rows += take
+                count -= take
+                if pending_rows == chunk_size:
+                    yield self._finish(pending, next_id)
+                    next_id += pending_rows
+                    pending, pending_rows = [], 0
+        if pending:
+            yield self._finish(pending, next_id)
+
+    @staticmethod
+    def _finish(parts, first_id: int) -> pd.DataFrame:
+        df = pd.concat(parts, ignore_index=True)
+        df.insert(0, 'id', np.arange(first_id, first_id + len(df)))
+        df['fecha'] = df['momento'].dt.date
+        return df
+
+def _write_duckdb(conn, table: str, df: pd.DataFrame, columns):
+    conn.register('chunk', df[columns])
+    conn.execute(f"INSERT INTO {table} ({', '.join(columns)}) SELECT * FROM chunk")
+    conn.unregister('chunk')
+
+def load_synthetic_data(
+    target: str,
+    ventas: int,
+    generator: Optional[VentasGenerator] = None,
+    chunk_size: int = 1_000_000,
+    refresh_rollup: bool = True
+) -> dict:
+    """Genera y carga datos sintéticos en Postgres, SQLite o DuckDB.
+
+    `target` es una URL de SQLAlchemy (postgresql://, sqlite:///) o
+    duckdb:///archivo.duckdb. Las ventas arrancan después del id más alto.
+
+    Returns:
+        dict: Filas cargadas y filas por segundo
+    """
+    generator = generator or VentasGenerator()
+    inicio = time.perf_counter()
+
+    if target.startswith('duckdb://'):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("Para cargar en DuckDB hace falta instalar duckdb") from e
+        conn = duckdb.connect(target[len('duckdb:///'):])
+        for ddl in DUCKDB_SCHEMA:
+            conn.execute(ddl)
+        existing_clients = conn.execute("SELECT COUNT(*) FROM clientes").fetchone()[0]
+        start_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM ventas").fetchone()[0] + 1
+
+        # Los clientes se cargan una sola vez; si ya hay, se reutilizan los ids 1..N
+        if existing_clients < generator.clientes:
+            for df in generator.clientes_chunks():
+                _write_duckdb(conn, 'clientes', df[df['id'] > existing_clients], CLIENTES_COLUMNS)
+        cargadas = 0
+        for df in generator.ventas_chunks(ventas, chunk_size, start_id):
+            _write_duckdb(conn, 'ventas', df, VENTAS_COLUMNS)
+            cargadas += len(df)
+            logger.info(f"{cargadas:,} de {ventas:,} ventas cargadas")
+        conn.close()
+    else:
+        engine = get_engine(target)
+        Base.metadata.create_all(engine)
+        create_partitions(engine, desde=generator.start)
+        with engine.connect() as conn:
+            existing_clients = conn.execute(text("SELECT COUNT(*) FROM clientes")).scalar()
+            start_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM ventas")).scalar() + 1
+
+        if existing_clients < generator.clientes:
+            bulk_load(
+                engine,
+                'clientes',
+                (df[df['id'] > existing_clients] for df in generator.clientes_chunks()),
+                columns=CLIENTES_COLUMNS
+            )
+        cargadas = bulk_load(
+            engine,
+            'ventas',
+            generator.ventas_chunks(ventas, chunk_size, start_id),
+            columns=VENTAS_COLUMNS,
+            chunk_size=chunk_size
+        )['rows']
+
+        # Las filas vinieron con id, así que las secuencias quedaron atrás
+        sync_sequence(engine, 'clientes')
+        sync_sequence(engine, 'ventas')
+        if engine.dialect.name == 'postgresql':
+            with engine.begin() as conn:
+                conn.execute(text("ANALYZE ventas"))
+                conn.execute(text("ANALYZE clientes"))
+        if refresh_rollup:
+            refresh_daily_rollup(engine)
+
+    segundos = time.perf_counter() - inicio
+    stats = {'ventas': cargadas, 'segundos': segundos, 'filas_por_segundo': cargadas / segundos if segundos else 0}
+    logger.info(f"Carga sintética terminada: {cargadas:,} ventas a {stats['filas_por_segundo']:,.0f} filas/s")
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera ventas sintéticas para pruebas de carga")
+    parser.add_argument('--target', default=os.getenv('DB_URL'), help="URL de SQLAlchemy o duckdb:///archivo.duckdb")
+    parser.add_argument('--ventas', type=int, default=10_000_000)
+    parser.add_argument('--clientes', type=int, default=100_000)
+    parser.add_argument('--productos', nargs='+', default=None, help="Por defecto ENABLED_PRODUCTS")
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--zipf', type=float, default=1.1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    generator = VentasGenerator(
+        clientes=args.clientes,
+        productos=args.productos,
+        days=args.days,
+        zipf_s=args.zipf,
+        seed=args.seed
+    )
+    load_synthetic_data(args.target, args.ventas, generator, args.chunk_size)
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, Numeric, ForeignKey, Index, Sequence, DDL, event
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -15,14 +15,79 @@ class Cliente(Base):
         return f"<Cliente(id={self.id}, nombre='{self.nombre}', apellido='{self.apellido}')>"
 
 class Venta(Base):
-    """Modelo para la tabla de ventas"""
+    """Modelo para la tabla de ventas.
+
+    En Postgres está particionada por mes sobre `fecha` (ver partitions.py),
+    por eso `fecha` es parte de la clave primaria.
+    """
     __tablename__ = 'ventas'
 
-    id = Column(Integer, primary_key=True)
+    id = Column(Integer, Sequence('ventas_id_seq'), primary_key=True)
     cliente_id = Column(Integer, ForeignKey('clientes.id'), nullable=False)
     producto = Column(String(100), nullable=False)
-    fecha = Column(Date, nullable=False)
+    fecha = Column(Date, primary_key=True)
     monto = Column(Numeric(10, 2), nullable=False)
 
+    __table_args__ = (
+        # producto + fecha: transacciones diarias, extract del batch y del notebook.
+        # Con INCLUDE la query sale de un index-only scan sin ir al heap
+        Index(
+            'ix_ventas_producto_fecha', 'producto', 'fecha',
+            postgresql_include=['cliente_id', 'monto']
+        ),
+        # Rangos de fecha: top clientes, ticket promedio y el stream
+        Index(
+            'ix_ventas_fecha', 'fecha',
+            postgresql_include=['cliente_id', 'monto']
+        ),
+        # BRIN ocupa casi nada y sirve porque las ventas entran en orden de fecha
+        Index('brin_ventas_fecha', 'fecha', postgresql_using='brin'),
+        # Las queries filtran por fecha, así Postgres solo lee los meses que tocan
+        {'postgresql_partition_by': 'RANGE (fecha)'},
+    )
+
+    def __repr__(self):
+        return f"<Venta(id={self.id}, cliente_id={self.cliente_id}, producto='{self.producto}', fecha='{self.fecha}', monto={self.monto})>" 
+
+# Con la clave compuesta ya no hay SERIAL automático; en Postgres el id sale
+# de la secuencia también para los INSERT que no pasan por el ORM
+event.listen(
+    Venta.__table__,
+    'after_create',
+    DDL("ALTER TABLE ventas ALTER COLUMN id SET DEFAULT nextval('ventas_id_seq')").execute_if(dialect='postgresql')
+)
+# Así pg_get_serial_sequence la encuentra, igual que con un SERIAL
+event.listen(
+    Venta.__table__,
+    'after_create',
+    DDL("ALTER SEQUENCE ventas_id_seq OWNED BY ventas.id").execute_if(dialect='postgresql')
+)
+
+class VentaDailyRollup(Base):
+    """Ventas agregadas por producto, día y cliente.
+
+    Se mantiene incremental desde `ventas` (ver rollup.py), así /transacciones
+    es una búsqueda por clave y no un scan con GROUP BY.
+    """
+    __tablename__ = 'ventas_daily_rollup'
+
+    producto = Column(String(100), primary_key=True)
+    fecha = Column(Date, primary_key=True)
+    cliente_id = Column(Integer, ForeignKey('clientes.id'), primary_key=True)
+    cliente = Column(String(201), nullable=False)
+    cantidad_transacciones = Column(Integer, nullable=False)
+    monto_total = Column(Numeric(14, 2), nullable=False)
+
+    def __repr__(self):
+        return f"<VentaDailyRollup(producto='{self.producto}', fecha='{self.fecha}', cliente_id={self.cliente_id}, monto_total={self.monto_total})>"
+
+class RollupWatermark(Base):
+    """Hasta qué id de `ventas` está incorporado cada rollup"""
+    __tablename__ = 'rollup_watermark'
+
+    nombre = Column(String(100), primary_key=True)
+    ultimo_id = Column(BigInteger, nullable=False, default=0)
+    actualizado = Column(DateTime)
+
     def __repr__(self):
-        return f"<Venta(id={self.id}, cliente_id={self.cliente_id}, producto='{self.producto}', fecha='{self.fecha}', monto={self.monto})>" 
\ No newline at end of file
+        return f"<RollupWatermark(nombre='{self.nombre}', ultimo_id={self.ultimo_id}, actualizado='{self.actualizado}')>"
@@ -0,0 +1,222 @@
+import os
+import logging
+from datetime import date, timedelta
+from typing import Iterable, List, Optional
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import text
+from dotenv import load_dotenv
+from .engine import get_engine
+from ..config.settings import PROCESSING_CONFIG, STORAGE_CONFIG
+
+# Configuración de logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+PARENT_TABLE = 'ventas'
+PARTITION_PREFIX = 'ventas_p'
+DEFAULT_PARTITION = 'ventas_default'
+# Tabla temporal para pasar filas de la default a una partición nueva
+MOVED_ROWS_TABLE = 'ventas_movidas'
+
+IS_PARTITIONED_QUERY = """
+    SELECT 1
+    FROM pg_partitioned_table pt
+    JOIN pg_class c ON c.oid = pt.partrelid
+    WHERE c.relname = :tabla
+    AND pg_table_is_visible(c.oid)
+"""
+
+PARTITIONS_QUERY = """
+    SELECT child.relname
+    FROM pg_inherits i
+    JOIN pg_class parent ON parent.oid = i.inhparent
+    JOIN pg_class child ON child.oid = i.inhrelid
+    WHERE parent.relname = :tabla
+    AND pg_table_is_visible(parent.oid)
+"""
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def next_month(day: date) -> date:
+    return (month_start(day) + timedelta(days=32)).replace(day=1)
+
+def partition_name(month: date) -> str:
+    """ventas_p2024_03 para marzo de 2024"""
+    return f"{PARTITION_PREFIX}{month.year:04d}_{month.month:02d}"
+
+def partition_month(name: str) -> Optional[date]:
+    """Inverso de partition_name; None si la partición no es mensual (ej. la default)"""
+    if not name.startswith(PARTITION_PREFIX):
+        return None
+    try:
+        year, month = name[len(PARTITION_PREFIX):].split('_')
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+def min_retention_days(today: date) -> int:
+    """Días de ventas que leen los servicios cuando el rollup no cubre: la ventana más larga"""
+    start = min(
+        today - relativedelta(months=PROCESSING_CONFIG["top_clients_months"]),
+        today - relativedelta(years=PROCESSING_CONFIG["average_ticket_years"])
+    )
+    return (today - start).days
+
+def effective_retention_days(today: date, retention_days: int) -> int:
+    """La retención configurada, pero nunca menos de lo que consultan los servicios"""
+    minimum = min_retention_days(today)
+    if retention_days < minimum:
+        logger.warning(
+            f"Retención de {retention_days} días menor que la ventana de los servicios; uso {minimum}"
+        )
+        return minimum
+    return retention_days
+
+def months_to_create(
+    today: date,
+    retention_days: int,
+    months_ahead: int,
+    desde: Optional[date] = None
+) -> List[date]:
+    """Meses desde el primero que sigue vigente (o `desde`, si es antes) hasta `months_ahead` meses adelante"""
+    first = today - timedelta(days=retention_days)
+    if desde is not None and desde < first:
+        first = desde
+    month = month_start(first)
+    last = month_start(today)
+    for _ in range(months_ahead):
+        last = next_month(last)
+
+    months = []
+    while month <= last:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+def expired_partitions(names: Iterable[str], today: date, retention_days: int) -> List[str]:
+    """Particiones mensuales cuyo mes entero quedó antes del corte de retención"""
+    cutoff = today - timedelta(days=retention_days)
+    return sorted(
+        name for name in names
+        if partition_month(name) is not None and next_month(partition_month(name)) <= cutoff
+    )
+
+def is_partitioned(conn) -> bool:
+    if conn.dialect.name != 'postgresql':
+        return False
+    return conn.execute(text(IS_PARTITIONED_QUERY), {"tabla": PARENT_TABLE}).fetchone() is not None
+
+def list_partitions(conn) -> List[str]:
+    return [row[0] for row in conn.execute(text(PARTITIONS_QUERY), {"tabla": PARENT_TABLE})]
+
+def _stash_default_rows(conn, month: date) -> bool:
+    """Saca de la default las filas del mes a una tabla temporal; True si había alguna"""
+    params = {"desde": month, "hasta": next_month(month)}
+    in_month = "WHERE fecha >= :desde AND fecha < :hasta"
+    if conn.execute(text(f"SELECT 1 FROM {DEFAULT_PARTITION} {in_month} LIMIT 1"), params).fetchone() is None:
+        return False
+    conn.execute(text(f"CREATE TEMP TABLE {MOVED_ROWS_TABLE} AS SELECT * FROM {DEFAULT_PARTITION} {in_month}"), params)
+    conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} {in_month}"), params)
+    return True
+
+def create_partitions(
+    engine,
+    today: Optional[date] = None,
+    months_ahead: Optional[int] = None,
+    desde: Optional[date] = None
+) -> List[str]:
+    """Crea las particiones mensuales que falten, más la default.
+
+    La default recibe fechas fuera de rango (una carga atrasada, por ejemplo)
+    para que el INSERT no falle. Cuando después se crea el mes de esas filas,
+    se mueven de la default a la partición nueva en la misma transacción.
+    Para un backfill se pasa `desde` y se crean también los meses anteriores.
+
+    Returns:
+        List[str]: Particiones creadas
+    """
+    today = today or date.today()
+    if months_ahead is None:
+        months_ahead = STORAGE_CONFIG["partition_months_ahead"]
+
+    created = []
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            if conn.dialect.name == 'postgresql':
+                # Una tabla normal no se puede pasar a particionada en el lugar
+                logger.warning(
+                    f"La tabla {PARENT_TABLE} existe sin particionar; "
+                    "hay que migrarla a mano para tener pruning por fecha"
+                )
+            return created
+
+        existing = set(list_partitions(conn))
+        retention_days = effective_retention_days(today, STORAGE_CONFIG["retention_days"])
+        for month in months_to_create(today, retention_days, months_ahead, desde):
+            name = partition_name(month)
+            if name in existing:
+                continue
+            # Con filas de ese mes en la default, Postgres no deja crear la partición
+            moved = DEFAULT_PARTITION in existing and _stash_default_rows(conn, month)
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+            ))
+            if moved:
+                conn.execute(text(f"INSERT INTO {PARENT_TABLE} SELECT * FROM {MOVED_ROWS_TABLE}"))
+                conn.execute(text(f"DROP TABLE {MOVED_ROWS_TABLE}"))
+                logger.info(f"Filas de {month:%Y-%m} movidas de {DEFAULT_PARTITION} a {name}")
+            created.append(name)
+
+        if DEFAULT_PARTITION not in existing:
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+            created.append(DEFAULT_PARTITION)
+
+    if created:
+        logger.info(f"Particiones creadas: {', '.join(created)}")
+    return created
+
+def archive_partitions(engine, today: Optional[date] = None, retention_days: Optional[int] = None) -> List[str]:
+    """Separa de ventas las particiones vencidas y las mueve al schema de archivo.
+
+    Los datos no se borran: quedan en `archive_schema` fuera del camino de las
+    queries. Los agregados viejos siguen en ventas_daily_rollup, así que esto
+    tiene que correr después de refresh_daily_rollup.
+
+    Returns:
+        List[str]: Particiones archivadas
+    """
+    today = today or date.today()
+    if retention_days is None:
+        retention_days = STORAGE_CONFIG["retention_days"]
+    retention_days = effective_retention_days(today, retention_days)
+    schema = STORAGE_CONFIG["archive_schema"]
+
+    archived = []
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            return archived
+
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+        for name in expired_partitions(list_partitions(conn), today, retention_days):
+            conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+            conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {schema}"))
+            archived.append(name)
+
+    if archived:
+        logger.info(f"Particiones archivadas en {schema}: {', '.join(archived)}")
+    return archived
+
+def maintain_partitions(engine, today: Optional[date] = None):
+    """Lo que corre el batch diario: crea las que vienen y archiva las vencidas"""
+    create_partitions(engine, today)
+    archive_partitions(engine, today)
+
+if __name__ == "__main__":
+    maintain_partitions(get_engine(os.getenv('DB_URL')))
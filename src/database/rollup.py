@@ -0,0 +1,128 @@
+import os
+import logging
+from datetime import date, datetime
+from typing import Optional
+import pandas as pd
+from sqlalchemy import text
+from dotenv import load_dotenv
+from .engine import get_engine
+from .models import Base
+
+# Configuración de logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+ROLLUP_NAME = 'ventas_daily_rollup'
+
+# Suma el lote de ventas nuevas sobre lo que ya había para cada (producto, fecha, cliente)
+ROLLUP_UPSERT = """
+    INSERT INTO ventas_daily_rollup
+        (producto, fecha, cliente_id, cliente, cantidad_transacciones, monto_total)
+    SELECT
+        v.producto,
+        v.fecha,
+        v.cliente_id,
+        c.nombre || ' ' || c.apellido,
+        COUNT(v.id),
+        SUM(v.monto)
+    FROM ventas v
+    JOIN clientes c ON v.cliente_id = c.id
+    WHERE v.id > :desde AND v.id <= :hasta
+    GROUP BY v.producto, v.fecha, v.cliente_id, c.nombre, c.apellido
+    ON CONFLICT (producto, fecha, cliente_id) DO UPDATE
+    SET cliente = EXCLUDED.cliente,
+        cantidad_transacciones = ventas_daily_rollup.cantidad_transacciones + EXCLUDED.cantidad_transacciones,
+        monto_total = ventas_daily_rollup.monto_total + EXCLUDED.monto_total
+"""
+
+WATERMARK_QUERY = """
+    SELECT ultimo_id, actualizado
+    FROM rollup_watermark
+    WHERE nombre = :nombre
+"""
+
+WATERMARK_UPSERT = """
+    INSERT INTO rollup_watermark (nombre, ultimo_id, actualizado)
+    VALUES (:nombre, :ultimo_id, :actualizado)
+    ON CONFLICT (nombre) DO UPDATE
+    SET ultimo_id = :ultimo_id,
+        actualizado = :actualizado
+"""
+
+def refresh_daily_rollup(engine, batch_size: int = 100000) -> int:
+    """Incorpora al rollup las ventas con id mayor al watermark.
+
+    Procesa de a `batch_size` ids y guarda el watermark en la misma
+    transacción de cada lote, así si se corta a la mitad no se suma dos veces.
+    Ojo: asume que los ids de ventas se confirman en orden, que es lo que
+    pasa con las cargas del batch.
+
+    Returns:
+        int: Cantidad de ids de ventas recorridos
+    """
+    Base.metadata.create_all(engine, tables=[
+        Base.metadata.tables['ventas_daily_rollup'],
+        Base.metadata.tables['rollup_watermark']
+    ])
+
+    # La foto se toma al empezar: todo lo vendido antes de hoy ya tiene id <= hasta
+    inicio = datetime.now()
+    with engine.connect() as conn:
+        hasta = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM ventas")).scalar()
+        fila = conn.execute(text(WATERMARK_QUERY), {"nombre": ROLLUP_NAME}).fetchone()
+    desde = fila[0] if fila else 0
+    # La fecha de cobertura solo avanza con el último lote
+    actualizado_anterior = fila[1] if fila else None
+    procesados = 0
+
+    while desde < hasta:
+        tope = min(desde + batch_size, hasta)
+        with engine.begin() as conn:
+            if conn.dialect.name == 'postgresql':
+                # Un solo refresco a la vez, aunque corran dos jobs
+                conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:nombre))"), {"nombre": ROLLUP_NAME})
+                actual = conn.execute(text(WATERMARK_QUERY), {"nombre": ROLLUP_NAME}).fetchone()
+                if actual and actual[0] >= tope:
+                    desde = actual[0]
+                    continue
+            conn.execute(text(ROLLUP_UPSERT), {"desde": desde, "hasta": tope})
+            conn.execute(text(WATERMARK_UPSERT), {
+                "nombre": ROLLUP_NAME,
+                "ultimo_id": tope,
+                "actualizado": inicio if tope == hasta else actualizado_anterior
+            })
+        procesados += tope - desde
+        desde = tope
+
+    if procesados == 0:
+        # Sin ventas nuevas igual avanzamos la fecha: el rollup sigue completo
+        with engine.begin() as conn:
+            conn.execute(text(WATERMARK_UPSERT), {
+                "nombre": ROLLUP_NAME,
+                "ultimo_id": desde,
+                "actualizado": inicio
+            })
+
+    logger.info(f"Rollup diario actualizado hasta la venta {hasta} ({procesados} ids nuevos)")
+    return procesados
+
+def rollup_covered_until(actualizado) -> Optional[date]:
+    """Primer día que el rollup NO cubre completo.
+
+    Si el último refresco empezó el día D, todos los días anteriores a D
+    ya estaban cerrados y quedaron incorporados.
+    """
+    if actualizado is None or pd.isna(actualizado):
+        return None
+    # SQLite devuelve el texto tal cual
+    if isinstance(actualizado, str):
+        actualizado = datetime.fromisoformat(actualizado)
+    return actualizado.date()
+
+if __name__ == "__main__":
+    refresh_daily_rollup(get_engine(os.getenv('DB_URL')))
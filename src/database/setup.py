@@ -1,10 +1,13 @@
 import os
 import logging
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import text
 from dotenv import load_dotenv
-from .models import Base, Cliente, Venta
+from .models import Base, Venta
+from .engine import get_engine, get_session as _shared_session
+from .bulk_load import bulk_load, sync_sequence
+from .rollup import refresh_daily_rollup
+from .partitions import archive_partitions, create_partitions
 
 # Configuración de logging
 logging.basicConfig(
@@ -16,100 +19,66 @@ logger = logging.getLogger(__name__)
 # Cargar variables de entorno
 load_dotenv()
 
+def ensure_indexes(engine):
+    """Crea los índices de ventas que falten.
+
+    create_all solo crea índices junto con la tabla, así que en una base que
+    ya existía hay que crearlos aparte. En tablas grandes conviene correr esto
+    fuera de horario, porque CREATE INDEX bloquea las escrituras.
+    """
+    for index in Venta.__table__.indexes:
+        index.create(engine, checkfirst=True)
+        logger.info(f"Índice {index.name} listo")
+
 def init_database():
     """Inicializa la base de datos con las tablas y datos de prueba"""
     try:
         # Crear conexión
-        engine = create_engine(os.getenv('DB_URL'))
+        engine = get_engine(os.getenv('DB_URL'))
         
         # Crear tablas
         Base.metadata.create_all(engine)
-        
-        # Crear sesión
-        Session = sessionmaker(bind=engine)
-        session = Session()
+        # Las particiones tienen que existir antes de insertar ventas
+        create_partitions(engine)
+        ensure_indexes(engine)
         
         # Verificar si ya hay datos
-        if session.query(Cliente).count() == 0:
-            # Insertar datos de prueba
+        with engine.connect() as conn:
+            sin_datos = conn.execute(text("SELECT COUNT(*) FROM clientes")).scalar() == 0
+
+        if sin_datos:
+            # Insertar datos de prueba con la misma carga masiva que un backfill
             clientes = [
-                Cliente(nombre='Juan', apellido='Pérez'),
-                Cliente(nombre='María', apellido='Gómez'),
-                Cliente(nombre='Carlos', apellido='López'),
-                Cliente(nombre='Ana', apellido='Martínez'),
-                Cliente(nombre='Pedro', apellido='Rodríguez')
+                (1, 'Juan', 'Pérez'),
+                (2, 'María', 'Gómez'),
+                (3, 'Carlos', 'López'),
+                (4, 'Ana', 'Martínez'),
+                (5, 'Pedro', 'Rodríguez')
             ]
-            
-            session.add_all(clientes)
-            session.commit()
-            
-            # Obtener IDs de clientes
-            cliente_ids = {c.nombre: c.id for c in clientes}
-            
-            # Insertar ventas
+            ayer = (datetime.now() - timedelta(days=1)).date()
             ventas = [
-                Venta(
-                    cliente_id=cliente_ids['Juan'],
-                    producto='Producto A',
-                    fecha=datetime.now() - timedelta(days=1),
-                    monto=100.50
-                ),
-                Venta(
-                    cliente_id=cliente_ids['Juan'],
-                    producto='Producto B',
-                    fecha=datetime.now() - timedelta(days=1),
-                    monto=200.75
-                ),
-                Venta(
-                    cliente_id=cliente_ids['María'],
-                    producto='Producto A',
-                    fecha=datetime.now() - timedelta(days=1),
-                    monto=150.25
-                ),
-                Venta(
-                    cliente_id=cliente_ids['María'],
-                    producto='Producto C',
-                    fecha=datetime.now() - timedelta(days=1),
-                    monto=300.00
-                ),
-                Venta(
-                    cliente_id=cliente_ids['Carlos'],
-                    producto='Producto B',
-                    fecha=datetime.now() - timedelta(days=1),
-                    monto=250.50
-                ),
-                Venta(
-                    cliente_id=cliente_ids['Carlos'],
-                    producto='Producto C',
-                    fecha=datetime.now() - timedelta(days=1),
-                    monto=175.25
-                ),
-                Venta(
-                    cliente_id=cliente_ids['Ana'],
-                    producto='Producto A',
-                    fecha=datetime.now() - timedelta(days=1),
-                    monto=125.75
-                ),
-                Venta(
-                    cliente_id=cliente_ids['Ana'],
-                    producto='Producto B',
-                    fecha=datetime.now() - timedelta(days=1),
-                    monto=225.00
-                ),
-                Venta(
-                    cliente_id=cliente_ids['Pedro'],
-                    producto='Producto C',
-                    fecha=datetime.now() - timedelta(days=1),
-                    monto=275.50
-                )
+                (1, 1, 'Producto A', ayer, 100.50),
+                (2, 1, 'Producto B', ayer, 200.75),
+                (3, 2, 'Producto A', ayer, 150.25),
+                (4, 2, 'Producto C', ayer, 300.00),
+                (5, 3, 'Producto B', ayer, 250.50),
+                (6, 3, 'Producto C', ayer, 175.25),
+                (7, 4, 'Producto A', ayer, 125.75),
+                (8, 4, 'Producto B', ayer, 225.00),
+                (9, 5, 'Producto C', ayer, 275.50)
             ]
-            
-            session.add_all(ventas)
-            session.commit()
+
+            # upsert: si se corta a la mitad, volver a correrlo no duplica nada
+            bulk_load(engine, 'clientes', clientes, upsert=True)
+            bulk_load(engine, 'ventas', ventas, upsert=True)
+            sync_sequence(engine, 'clientes')
+            sync_sequence(engine, 'ventas')
             
             logger.info("Datos de prueba insertados exitosamente")
         
-        session.close()
+        # Dejamos el rollup al día con lo que haya en ventas
+        refresh_daily_rollup(engine)
+        archive_partitions(engine)
         logger.info("Base de datos inicializada correctamente")
         
     except Exception as e:
@@ -117,7 +86,5 @@ def init_database():
         raise
 
 def get_session():
-    """Retorna una sesión de base de datos"""
-    engine = create_engine(os.getenv('DB_URL'))
-    Session = sessionmaker(bind=engine)
-    return Session() 
\ No newline at end of file
+    """Retorna una sesión de base de datos, sobre el pool compartido"""
+    return _shared_session(os.getenv('DB_URL')) 
\ No newline at end of file
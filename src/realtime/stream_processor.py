@@ -1,10 +1,11 @@
 import json
-import boto3
 import logging
-import psycopg2
 from datetime import datetime
 from typing import Dict, Any
-from ..config.settings import DB_CONFIG, AWS_CONFIG
+from sqlalchemy import text
+from ..config.settings import AWS_CONFIG
+from ..database.engine import dispose_engines, get_engine
+from ..utils.aws import get_client
 import time
 
 # Configuración de logging
@@ -14,20 +15,15 @@ logger = logging.getLogger(__name__)
 class StreamProcessor:
     def __init__(self):
         """Inicializa las conexiones a servicios AWS y RDS"""
-        self.kinesis = boto3.client('kinesisanalytics')
-        self.cloudwatch = boto3.client('cloudwatch')
+        self.kinesis = get_client('kinesisanalytics')
+        self.cloudwatch = get_client('cloudwatch')
         self.setup_db_connection()
 
     def setup_db_connection(self):
         """Configura la conexión a la base de datos"""
         try:
-            self.conn = psycopg2.connect(
-                host=DB_CONFIG['host'],
-                database=DB_CONFIG['database'],
-                user=DB_CONFIG['user'],
-                password=DB_CONFIG['password']
-            )
-            self.cursor = self.conn.cursor()
+            # Una conexión del pool por extracción en vez de una fija para siempre
+            self.engine = get_engine()
             logger.info("Conexión a base de datos establecida")
         except Exception as e:
             logger.error(f"Error conectando a la base de datos: {str(e)}")
@@ -45,8 +41,8 @@ class StreamProcessor:
                 FROM ventas
                 WHERE fecha >= NOW() - INTERVAL '1 minute'
             """
-            self.cursor.execute(query)
-            rows = self.cursor.fetchall()
+            with self.engine.connect() as conn:
+                rows = conn.execute(text(query)).fetchall()
             
             for row in rows:
                 self.send_to_kinesis(row)
@@ -115,10 +111,12 @@ class StreamProcessor:
         except Exception as e:
             logger.error(f"Error en el proceso principal: {str(e)}")
             self.send_alert("Error crítico", str(e))
-        finally:
-            self.cursor.close()
-            self.conn.close()
+        # El engine es el compartido del proceso: no se cierra acá, otros lo siguen usando
 
 if __name__ == "__main__":
     processor = StreamProcessor()
-    processor.run() 
\ No newline at end of file
+    try:
+        processor.run()
+    finally:
+        # El proceso termina: recién ahora se cierran los pools compartidos
+        dispose_engines() 
\ No newline at end of file
@@ -0,0 +1,203 @@
+# Agregados en memoria para no recalcular sobre ventas en cada request
+# La idea es la de siempre: buckets por día y sumas corridas que se van deslizando
+
+import hashlib
+import heapq
+import threading
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from dateutil.relativedelta import relativedelta
+from ..config.settings import PROCESSING_CONFIG
+
+# Mismo máximo que valida /top-clientes
+TOP_CLIENTS_MAX = 100
+
+class TopClientsIndex:
+    """Ranking de clientes por monto en una ventana móvil de N meses.
+
+    Guarda el monto de cada cliente por día y el total corrido por cliente.
+    Cuando cambian los datos se recalcula una sola vez el top-100 con un heap,
+    y cualquier `limit` entre 1 y 100 sale de ese mismo ranking.
+    """
+
+    def __init__(self, months: Optional[int] = None, size: int = TOP_CLIENTS_MAX):
+        self.months = months or PROCESSING_CONFIG["top_clients_months"]
+        self.size = size
+        self._lock = threading.Lock()
+        self._days: Dict[date, Dict[int, Decimal]] = {}
+        self._totals: Dict[int, Decimal] = {}
+        self._names: Dict[int, str] = {}
+        self._ranking: List[Dict] = []
+        self._dirty = False
+
+    def window_start(self, today: Optional[date] = None) -> date:
+        """Primer día de la ventana, como CURRENT_DATE - INTERVAL 'N months'"""
+        return (today or date.today()) - relativedelta(months=self.months)
+
+    def _drop_day(self, day: date):
+        for cliente_id, monto in self._days.pop(day, {}).items():
+            total = self._totals[cliente_id] - monto
+            if total:
+                self._totals[cliente_id] = total
+            else:
+                del self._totals[cliente_id]
+                self._names.pop(cliente_id, None)
+        self._dirty = True
+
+    def load_days(
+        self,
+        rows: Iterable[Tuple[date, int, str, Decimal]],
+        desde: date,
+        hasta: Optional[date] = None
+    ):
+        """Reemplaza los días en [desde, hasta) con las filas (fecha, cliente_id, cliente, monto).
+
+        Reemplazar y no sumar hace que recargar un día abierto sea idempotente.
+        """
+        with self._lock:
+            for day in [d for d in self._days if d >= desde and (hasta is None or d < hasta)]:
+                self._drop_day(day)
+            for fecha, cliente_id, cliente, monto in rows:
+                if not isinstance(monto, Decimal):
+                    monto = Decimal(str(monto))
+                bucket = self._days.setdefault(fecha, {})
+                bucket[cliente_id] = bucket.get(cliente_id, Decimal(0)) + monto
+                self._totals[cliente_id] = self._totals.get(cliente_id, Decimal(0)) + monto
+                self._names[cliente_id] = cliente
+            self._dirty = True
+
+    def expire(self, today: Optional[date] = None):
+        """Saca los días que quedaron fuera de la ventana"""
+        start = self.window_start(today)
+        with self._lock:
+            for day in [d for d in self._days if d < start]:
+                self._drop_day(day)
+
+    def check_limit(self, limit: int):
+        if limit < 1 or limit > self.size:
+            raise ValueError(f"El límite debe estar entre 1 y {self.size}")
+
+    def _current_ranking(self) -> List[Dict]:
+        # Llamar con el lock tomado
+        if self._dirty:
+            best = heapq.nlargest(self.size, self._totals.items(), key=lambda item: item[1])
+            # Las sumas van en Decimal; la respuesta en float, como salía de pandas
+            self._ranking = [
+                {"cliente": self._names[cliente_id], "monto_total": float(total)}
+                for cliente_id, total in best
+            ]
+            self._dirty = False
+        return self._ranking
+
+    def top(self, limit: int) -> List[Dict]:
+        """Los `limit` mejores clientes, con la misma forma que la query de antes"""
+        self.check_limit(limit)
+        with self._lock:
+            return self._current_ranking()[:limit]
+
+    def snapshot(self) -> Tuple[str, List[Dict]]:
+        """(huella, ranking completo) leídos juntos, para publicar versión y datos a la vez"""
+        with self._lock:
+            ranking = self._current_ranking()
+        return _ranking_fingerprint(ranking), ranking
+
+    def fingerprint(self) -> str:
+        """Huella del ranking completo tal como se serializa; sirve de versión para los ETag"""
+        return self.snapshot()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._totals)
+
+class AverageTicketAccumulator:
+    """Suma y conteo de ventas por día en una ventana móvil de N años.
+
+    Los días se guardan en orden, así expirar el más viejo es sacar el
+    primero (O(1)) y restarlo de los totales. El promedio sale de memoria.
+    """
+
+    def __init__(self, years: Optional[int] = None):
+        self.years = years or PROCESSING_CONFIG["average_ticket_years"]
+        self._lock = threading.Lock()
+        self._days: "OrderedDict[date, List]" = OrderedDict()
+        self._sum = Decimal(0)
+        self._count = 0
+
+    def window_start(self, today: Optional[date] = None) -> date:
+        """Primer día de la ventana, como CURRENT_DATE - INTERVAL 'N year'"""
+        return (today or date.today()) - relativedelta(years=self.years)
+
+    def _bucket(self, day: date) -> List:
+        bucket = self._days.get(day)
+        if bucket is None:
+            bucket = self._days[day] = [Decimal(0), 0]
+            # Casi siempre llegan en orden; si no, reordenamos (pasa muy poco)
+            if len(self._days) > 1 and next(reversed(self._days)) == day:
+                previous = list(self._days)[-2]
+                if previous > day:
+                    self._days = OrderedDict(sorted(self._days.items()))
+        return bucket
+
+    def _add(self, fecha: date, monto, cantidad: int):
+        if not isinstance(monto, Decimal):
+            monto = Decimal(str(monto))
+        bucket = self._bucket(fecha)
+        bucket[0] += monto
+        bucket[1] += cantidad
+        self._sum += monto
+        self._count += cantidad
+
+    def add(self, fecha: date, monto, cantidad: int = 1):
+        """Suma ventas a un día, para ir incorporando ventas nuevas sin recargar"""
+        with self._lock:
+            self._add(fecha, monto, cantidad)
+
+    def load_days(self, rows: Iterable[Tuple[date, Decimal, int]], desde: date, hasta: Optional[date] = None):
+        """Reemplaza los días en [desde, hasta) con filas (fecha, monto_total, cantidad)"""
+        with self._lock:
+            for day in [d for d in self._days if d >= desde and (hasta is None or d < hasta)]:
+                monto, cantidad = self._days.pop(day)
+                self._sum -= monto
+                self._count -= cantidad
+            for fecha, monto, cantidad in rows:
+                self._add(fecha, monto, int(cantidad))
+
+    def expire(self, today: Optional[date] = None):
+        """Saca los días más viejos que la ventana, del principio"""
+        start = self.window_start(today)
+        with self._lock:
+            while self._days:
+                day = next(iter(self._days))
+                if day >= start:
+                    break
+                monto, cantidad = self._days.popitem(last=False)[1]
+                self._sum -= monto
+                self._count -= cantidad
+
+    def summary(self) -> Dict:
+        """Misma respuesta que el AVG de antes"""
+        with self._lock:
+            count = self._count
+            total = self._sum
+        return {
+            "ticket_promedio": float(total / count) if count else 0.0,
+            "total_transacciones": count
+        }
+
+    def snapshot(self) -> Tuple[str, Dict]:
+        """(huella, summary()) de la misma lectura"""
+        summary = self.summary()
+        state = f"{summary['ticket_promedio']!r}\x1f{summary['total_transacciones']}"
+        return hashlib.blake2b(state.encode(), digest_size=16).hexdigest(), summary
+
+    def fingerprint(self) -> str:
+        """Huella de lo que devuelve summary(); sirve de versión para los ETag"""
+        return self.snapshot()[0]
+
+def _ranking_fingerprint(ranking: List[Dict]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for row in ranking:
+        digest.update(f"{row['cliente']}\x1f{float(row['monto_total'])!r}\x1e".encode())
+    return digest.hexdigest()
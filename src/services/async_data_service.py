@@ -0,0 +1,431 @@
+# Versión async del servicio de datos
+# La API es async, así que no tenía sentido bloquear el event loop con cada query
+
+import logging
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Dict, Optional, Tuple
+import pandas as pd
+from sqlalchemy import MetaData, text
+from datetime import datetime
+from tenacity import AsyncRetrying
+from ..config.settings import LOG_CONFIG, CACHE_CONFIG, PROCESSING_CONFIG
+from ..utils.memory_cache import MemoryCache
+from ..utils.single_flight import SingleFlight
+from ..utils.metrics import timed, watch_cache
+from ..utils.deadline import DeadlineExceeded, check_deadline, clear_deadline
+from ..utils.admission import AdmissionController, Overloaded
+from .control_registry import ControlRegistry
+from .aggregates import TopClientsIndex, AverageTicketAccumulator
+from .data_service import (
+    TOP_CLIENTS_ROLLUP_QUERY,
+    TOP_CLIENTS_LIVE_QUERY,
+    AVERAGE_TICKET_ROLLUP_QUERY,
+    AVERAGE_TICKET_LIVE_QUERY,
+    STATEMENT_TIMEOUT_QUERY,
+    control_table,
+    query_retrying,
+    raise_if_deadline_passed,
+    statement_timeout_params,
+    versioned_snapshot,
+    daily_transactions_query,
+    daily_transactions_page_query,
+    batch_transactions_query,
+    group_transactions,
+    transactions_page,
+    rollup_covers,
+    transaction_records,
+    daily_client_rows,
+    daily_ticket_rows
+)
+from ..database.engine import get_async_engine
+from ..database.rollup import ROLLUP_NAME, WATERMARK_QUERY, rollup_covered_until
+
+logging.basicConfig(
+    level=LOG_CONFIG["level"],
+    format=LOG_CONFIG["format"]
+)
+logger = logging.getLogger(__name__)
+
+class AsyncDataService:
+    def __init__(self, admission: Optional[AdmissionController] = None):
+        """Constructor del servicio async.
+
+        Usa asyncpg a través de la extensión asyncio de SQLAlchemy, con el
+        engine async compartido del proceso. La tabla de control se crea en el primer uso
+        porque el constructor no puede hacer await. Cada query toma un lugar de
+        `admission` mientras tiene la conexión.
+        """
+        try:
+            self.engine = get_async_engine()
+            self.admission = admission or AdmissionController()
+            self.metadata = MetaData()
+            self.cache = MemoryCache() if CACHE_CONFIG["enabled"] else None
+            if self.cache is not None:
+                watch_cache(type(self).__name__, self.cache)
+            self.flight = SingleFlight()
+            self.top_clients = TopClientsIndex()
+            self._top_clients_until = None
+            # (versión, ranking) publicados juntos en cada refresco
+            self._top_clients_snapshot = None
+            self.ticket = AverageTicketAccumulator()
+            self._ticket_until = None
+            self._ticket_snapshot = None
+            self.control = ControlRegistry()
+            self._control_ready = False
+        except Exception as e:
+            logger.error(f"¡Ups! No pude crear el engine async: {str(e)}")
+            raise
+
+    async def _create_control_table(self):
+        """Crea etl_control y carga el registro en memoria una sola vez por proceso"""
+        if self._control_ready:
+            return
+        control_table(self.metadata)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(self.metadata.create_all)
+        await self.control.load_async(self.engine)
+        self.control.start_async(self.engine)
+        self._control_ready = True
+        logger.info("¡Conexión async exitosa a la base de datos!")
+
+    async def close(self):
+        """Escribe el control pendiente y libera las conexiones del pool"""
+        if self._control_ready:
+            await self.control.stop_async(self.engine)
+        await self.engine.dispose()
+
+    @timed
+    async def _execute_query(self, query: str, params: Optional[Dict] = None) -> pd.DataFrame:
+        """Igual que la versión sync, pero esperando el I/O en vez de bloquear.
+
+        pd.read_sql corre sobre la conexión adaptada con run_sync, así los
+        tipos del DataFrame quedan idénticos a los del servicio sync. El
+        statement_timeout y los reintentos siguen el deadline del request.
+        Sin lugar en `admission` sale Overloaded enseguida, sin reintentar.
+        """
+        try:
+            async for attempt in query_retrying(AsyncRetrying):
+                with attempt:
+                    check_deadline()
+                    async with self.admission.slot(), self.engine.connect() as conn:
+                        if conn.dialect.name == "postgresql":
+                            await conn.execute(text(STATEMENT_TIMEOUT_QUERY), statement_timeout_params())
+                        return await conn.run_sync(
+                            lambda sync_conn: pd.read_sql(text(query), sync_conn, params=params)
+                        )
+        except (DeadlineExceeded, Overloaded):
+            raise
+        except Exception as e:
+            raise_if_deadline_passed(e)
+            logger.error(f"¡No pude ejecutar la query después de varios intentos! Error: {e}")
+            raise
+
+    async def _cached(self, cache_key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Caché con stale-while-revalidate y single-flight, como en DataService"""
+        if self.cache is not None:
+            cached, stale = self.cache.lookup(cache_key)
+            if cached is not None:
+                if stale:
+                    self.cache.refresh_in_background_async(
+                        cache_key, lambda: self._refresh_detached(cache_key, loader)
+                    )
+                return cached
+
+        return await self.flight.do_async(cache_key, loader)
+
+    async def _refresh_detached(self, cache_key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """El refresco en segundo plano corre en su propia tarea y no hereda el deadline del request"""
+        clear_deadline()
+        return await self.flight.do_async(cache_key, loader)
+
+    async def _rollup_coverage(self):
+        """Igual que en DataService: el watermark del rollup queda en caché"""
+        return (await self._cached("rollup_coverage", self._load_rollup_coverage))["hasta"]
+
+    async def _rollup_covers(self, date: Optional[str]) -> bool:
+        if not date:
+            return False
+        return rollup_covers(date, await self._rollup_coverage())
+
+    async def _load_rollup_coverage(self) -> Dict:
+        try:
+            result = await self._execute_query(WATERMARK_QUERY, {"nombre": ROLLUP_NAME})
+            hasta = rollup_covered_until(result["actualizado"].iloc[0]) if len(result) else None
+        except Exception as e:
+            logger.warning(f"No pude leer el watermark del rollup, uso ventas: {e}")
+            hasta = None
+        coverage = {"hasta": hasta}
+        if self.cache is not None:
+            self.cache.set("rollup_coverage", coverage)
+        return coverage
+
+    async def _refresh_window(self, aggregate, loaded_until, rollup_query: str, live_query: str, to_rows):
+        """Versión async de DataService._refresh_window"""
+        today = datetime.now().date()
+        start = aggregate.window_start(today)
+        hasta = await self._rollup_coverage()
+
+        if hasta is not None and hasta > start:
+            desde = max(start, loaded_until or start)
+            if desde < hasta:
+                result = await self._execute_query(rollup_query, {"desde": desde, "hasta": hasta})
+                aggregate.load_days(to_rows(result), desde, hasta)
+            abiertos = hasta
+        else:
+            abiertos = start
+
+        result = await self._execute_query(live_query, {"desde": abiertos})
+        aggregate.load_days(to_rows(result), abiertos)
+        aggregate.expire(today)
+        return hasta
+
+    @timed
+    async def get_daily_transactions(self, product: str, date: Optional[str] = None) -> Dict:
+        """Transacciones por producto y fecha, con la misma forma que DataService"""
+        cache_key = f"transactions_{product}_{date}"
+        return await self._cached(cache_key, lambda: self._load_daily_transactions(product, date, cache_key))
+
+    async def _load_daily_transactions(self, product: str, date: Optional[str], cache_key: str) -> Dict:
+        """Consulta de verdad; single-flight deja una sola en vuelo por clave"""
+        job_name = f"daily_transactions_{product}_{date if date else 'all'}"
+        try:
+            query, params = daily_transactions_query(product, date, await self._rollup_covers(date))
+            result = await self._execute_query(query, params)
+
+            data = {
+                "producto": product,
+                "fecha": date,
+                "transacciones": result.to_dict(orient="records")
+            }
+
+            await self._update_control(job_name, "success", str(len(result)))
+
+            if self.cache is not None:
+                self.cache.set(cache_key, data)
+
+            return data
+        except Exception as e:
+            error_msg = str(e)
+            await self._update_control(job_name, "error", error=error_msg)
+            logger.error(f"¡Error al obtener transacciones diarias! Detalles: {error_msg}")
+            raise
+
+    @timed
+    async def get_daily_transactions_batch(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict]:
+        """Versión async de DataService.get_daily_transactions_batch"""
+        results, missing = {}, []
+        for product, date in dict.fromkeys(pairs):
+            cached = self.cache.get(f"transactions_{product}_{date}") if self.cache is not None else None
+            if cached is not None and "transacciones" in cached:
+                results[(product, date)] = cached
+            else:
+                missing.append((product, date))
+        if not missing:
+            return results
+
+        job_name = "daily_transactions_batch"
+        try:
+            covered = [pair for pair in missing if await self._rollup_covers(pair[1])]
+            live = [pair for pair in missing if pair not in covered]
+            grouped = {}
+            for chunk, use_rollup in ((covered, True), (live, False)):
+                if chunk:
+                    query, params = batch_transactions_query(chunk, use_rollup)
+                    grouped.update(group_transactions(await self._execute_query(query, params)))
+
+            for product, date in missing:
+                data = {"producto": product, "fecha": date, "transacciones": grouped.get((product, date), [])}
+                if self.cache is not None:
+                    self.cache.set(f"transactions_{product}_{date}", data)
+                results[(product, date)] = data
+
+            await self._update_control(job_name, "success", str(len(missing)))
+            return results
+        except Exception as e:
+            error_msg = str(e)
+            await self._update_control(job_name, "error", error=error_msg)
+            logger.error(f"¡Error en el batch de transacciones! Detalles: {error_msg}")
+            raise
+
+    @timed
+    async def get_daily_transactions_page(
+        self,
+        product: str,
+        date: Optional[str] = None,
+        page_size: int = 500,
+        after: int = 0
+    ) -> Dict:
+        """Una página de transacciones por cliente_id, como en DataService"""
+        cache_key = f"transactions_{product}_{date}_page_{after}_{page_size}"
+        return await self._cached(
+            cache_key, lambda: self._load_daily_transactions_page(product, date, page_size, after, cache_key)
+        )
+
+    async def _load_daily_transactions_page(
+        self, product: str, date: Optional[str], page_size: int, after: int, cache_key: str
+    ) -> Dict:
+        try:
+            query, params = daily_transactions_page_query(
+                product, date, after, page_size + 1, await self._rollup_covers(date)
+            )
+            data = transactions_page(product, date, await self._execute_query(query, params), page_size)
+            if self.cache is not None:
+                self.cache.set(cache_key, data)
+            return data
+        except Exception as e:
+            logger.error(f"¡Error al obtener la página de transacciones! Detalles: {str(e)}")
+            raise
+
+    async def stream_daily_transaction_rows(
+        self,
+        product: str,
+        date: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[Tuple[List[str], List[Tuple]]]:
+        """Versión async de DataService.stream_daily_transaction_rows.
+
+        asyncpg trae las filas con un cursor del servidor de a `batch_size`,
+        y el event loop atiende otros requests entre lote y lote.
+        """
+        batch_size = batch_size or PROCESSING_CONFIG["stream_batch_size"]
+        job_name = f"daily_transactions_stream_{product}_{date if date else 'all'}"
+        query, params = daily_transactions_query(product, date, await self._rollup_covers(date))
+        total = 0
+        try:
+            # El lugar de admisión queda tomado mientras el cursor tiene la conexión
+            check_deadline()
+            async with self.admission.slot(), self.engine.connect() as conn:
+                if conn.dialect.name == "postgresql":
+                    await conn.execute(text(STATEMENT_TIMEOUT_QUERY), statement_timeout_params())
+                result = await conn.stream(text(query), params, execution_options={"yield_per": batch_size})
+                keys = list(result.keys())
+                async for partition in result.partitions(batch_size):
+                    total += len(partition)
+                    yield keys, partition
+                    check_deadline()
+                if total == 0:
+                    yield keys, []
+            await self._update_control(job_name, "success", str(total))
+        except Exception as e:
+            error_msg = str(e)
+            await self._update_control(job_name, "error", error=error_msg)
+            logger.error(f"¡Error en el streaming de transacciones! Detalles: {error_msg}")
+            if not isinstance(e, DeadlineExceeded):
+                raise_if_deadline_passed(e)
+            raise
+
+    async def stream_daily_transactions(
+        self,
+        product: str,
+        date: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[List[Dict]]:
+        """Lotes con la forma de get_daily_transactions, para el JSON en streaming.
+
+        Cerrar este generador cierra también el de las filas, que es el que
+        tiene tomados la conexión y el lugar de admisión.
+        """
+        async with aclosing(self.stream_daily_transaction_rows(product, date, batch_size)) as batches:
+            async for keys, rows in batches:
+                if rows:
+                    yield transaction_records(keys, rows)
+
+    @timed
+    async def get_top_clients(self, limit: int = 5) -> List[Dict]:
+        """Top clientes de los últimos 6 meses, con la misma forma que DataService"""
+        await self._cached("top_clients_index", self._refresh_top_clients)
+        return self.top_clients.top(limit)
+
+    @timed
+    async def get_top_clients_versioned(self, limit: int = 5) -> Tuple[Dict, List[Dict]]:
+        """(versión, top) de la misma foto, como DataService.get_top_clients_versioned"""
+        self.top_clients.check_limit(limit)
+        await self._cached("top_clients_index", self._refresh_top_clients)
+        version, ranking = self._top_clients_snapshot
+        return version, ranking[:limit]
+
+    @timed
+    async def top_clients_version(self) -> Dict:
+        """Versión del ranking para los ETag, como DataService.top_clients_version"""
+        await self._cached("top_clients_index", self._refresh_top_clients)
+        return self._top_clients_snapshot[0]
+
+    async def _refresh_top_clients(self) -> Dict:
+        """Actualiza el ranking en memoria igual que DataService._refresh_top_clients"""
+        job_name = "top_clients"
+        try:
+            self._top_clients_until = await self._refresh_window(
+                self.top_clients,
+                self._top_clients_until,
+                TOP_CLIENTS_ROLLUP_QUERY,
+                TOP_CLIENTS_LIVE_QUERY,
+                daily_client_rows
+            )
+            self._top_clients_snapshot = versioned_snapshot(self._top_clients_snapshot, self.top_clients)
+
+            await self._update_control(job_name, "success", str(len(self.top_clients)))
+
+            state = {"hasta": self._top_clients_until, "clientes": len(self.top_clients)}
+            if self.cache is not None:
+                self.cache.set("top_clients_index", state)
+            return state
+        except Exception as e:
+            error_msg = str(e)
+            await self._update_control(job_name, "error", error=error_msg)
+            logger.error(f"¡Problemas al obtener top clientes! Error: {error_msg}")
+            raise
+
+    @timed
+    async def get_average_ticket(self) -> Dict:
+        """Ticket promedio del último año, con la misma forma que DataService"""
+        await self._cached("average_ticket", self._refresh_average_ticket)
+        return self.ticket.summary()
+
+    @timed
+    async def get_average_ticket_versioned(self) -> Tuple[Dict, Dict]:
+        """(versión, ticket) de la misma foto, como DataService.get_average_ticket_versioned"""
+        await self._cached("average_ticket", self._refresh_average_ticket)
+        return self._ticket_snapshot
+
+    @timed
+    async def average_ticket_version(self) -> Dict:
+        """Versión del ticket promedio para los ETag"""
+        await self._cached("average_ticket", self._refresh_average_ticket)
+        return self._ticket_snapshot[0]
+
+    async def _refresh_average_ticket(self) -> Dict:
+        """Suma y conteo por día en memoria, igual que DataService"""
+        job_name = "average_ticket"
+        try:
+            self._ticket_until = await self._refresh_window(
+                self.ticket,
+                self._ticket_until,
+                AVERAGE_TICKET_ROLLUP_QUERY,
+                AVERAGE_TICKET_LIVE_QUERY,
+                daily_ticket_rows
+            )
+            self._ticket_snapshot = versioned_snapshot(self._ticket_snapshot, self.ticket)
+            data = self._ticket_snapshot[1]
+
+            await self._update_control(job_name, "success", str(data["total_transacciones"]))
+
+            if self.cache is not None:
+                self.cache.set("average_ticket", data)
+
+            return data
+        except Exception as e:
+            error_msg = str(e)
+            await self._update_control(job_name, "error", error=error_msg)
+            logger.error(f"¡Error al calcular ticket promedio! Detalles: {error_msg}")
+            raise
+
+    async def ping(self) -> bool:
+        """Chequeo profundo para readiness: una ida y vuelta a la base"""
+        async with self.engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+        return True
+
+    async def _update_control(self, job_name: str, status: str, records: str = None, error: str = None):
+        """Deja el estado del job en el registro, que lo escribe en lote"""
+        await self._create_control_table()
+        self.control.update(job_name, status, records, error)
@@ -0,0 +1,220 @@
+# Registro en memoria de etl_control
+# Antes cada request hacía un SELECT y un UPSERT a etl_control, ahora se escribe en lote
+
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+from ..config.settings import LOG_CONFIG, PROCESSING_CONFIG
+
+logging.basicConfig(
+    level=LOG_CONFIG["level"],
+    format=LOG_CONFIG["format"]
+)
+logger = logging.getLogger(__name__)
+
+CONTROL_UPSERT = """
+    INSERT INTO etl_control (job_name, last_run_date, status, records_processed, error_message)
+    VALUES (:job_name, :date, :status, :records, :error)
+    ON CONFLICT (job_name) DO UPDATE
+    SET last_run_date = :date,
+        status = :status,
+        records_processed = :records,
+        error_message = :error
+"""
+
+# El SELECT que hacía cada request antes del registro; get() devuelve lo mismo desde memoria
+CONTROL_QUERY = """
+    SELECT status, records_processed
+    FROM etl_control
+    WHERE job_name = :job_name
+    AND DATE(last_run_date) = CURRENT_DATE
+"""
+
+CONTROL_LOAD_QUERY = """
+    SELECT job_name, last_run_date, status, records_processed, error_message
+    FROM etl_control
+    WHERE DATE(last_run_date) = CURRENT_DATE
+"""
+
+class ControlRegistry:
+    """Estado de los jobs en memoria con escritura diferida a etl_control.
+
+    Las lecturas y actualizaciones no tocan la base. Los cambios quedan
+    marcados como pendientes y se escriben todos juntos cada
+    `flush_interval` segundos con un solo executemany del mismo UPSERT.
+    Al arrancar se cargan una vez los registros del día.
+    """
+
+    def __init__(self, flush_interval: Optional[float] = None):
+        self.flush_interval = flush_interval or PROCESSING_CONFIG["control_flush_interval"]
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = {}
+        self._dirty: Dict[str, Dict] = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._task = None
+        self.flushes = 0
+        self.rows_flushed = 0
+
+    def get(self, job_name: str) -> Optional[Tuple[str, str]]:
+        """(status, records_processed) si el job corrió hoy, igual que el SELECT de antes"""
+        with self._lock:
+            job = self._jobs.get(job_name)
+        if job is None or job["date"].date() != datetime.now().date():
+            return None
+        return job["status"], job["records"]
+
+    def update(self, job_name: str, status: str, records: str = None, error: str = None):
+        """Actualiza el job en memoria y lo deja pendiente de escribir"""
+        row = {
+            "job_name": job_name,
+            "date": datetime.now(),
+            "status": status,
+            "records": records,
+            "error": error
+        }
+        with self._lock:
+            self._jobs[job_name] = row
+            self._dirty[job_name] = row
+
+    def _load_rows(self, rows):
+        with self._lock:
+            for job_name, date, status, records, error in rows:
+                # SQLite devuelve el texto tal cual, Postgres ya da un datetime
+                if isinstance(date, str):
+                    date = datetime.fromisoformat(date)
+                self._jobs.setdefault(job_name, {
+                    "job_name": job_name,
+                    "date": date,
+                    "status": status,
+                    "records": records,
+                    "error": error
+                })
+        logger.info(f"Registro de control cargado con {len(rows)} jobs del día")
+
+    def _drain(self) -> List[Dict]:
+        with self._lock:
+            rows = list(self._dirty.values())
+            self._dirty.clear()
+        return rows
+
+    def _requeue(self, rows: List[Dict]):
+        """Si falló la escritura, lo devolvemos a pendientes sin pisar algo más nuevo"""
+        with self._lock:
+            for row in rows:
+                self._dirty.setdefault(row["job_name"], row)
+
+    def _flushed(self, rows: List[Dict]):
+        self.flushes += 1
+        self.rows_flushed += len(rows)
+        logger.debug(f"Escribí {len(rows)} jobs en etl_control")
+
+    def load(self, engine):
+        """Carga los jobs de hoy desde etl_control.
+
+        Si no se puede leer arrancamos vacíos: en el peor caso se repite
+        una consulta que ya se había hecho hoy.
+        """
+        try:
+            with engine.connect() as conn:
+                self._load_rows(conn.execute(text(CONTROL_LOAD_QUERY)).fetchall())
+        except Exception as e:
+            logger.warning(f"No pude cargar etl_control, arranco vacío: {str(e)}")
+
+    def flush(self, engine) -> int:
+        """Escribe los pendientes en un solo lote"""
+        rows = self._drain()
+        if not rows:
+            return 0
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(CONTROL_UPSERT), rows)
+        except Exception as e:
+            self._requeue(rows)
+            logger.error(f"¡Error al escribir el control ETL en lote! Detalles: {str(e)}")
+            raise
+        self._flushed(rows)
+        return len(rows)
+
+    def start(self, engine):
+        """Arranca el hilo que escribe cada flush_interval segundos"""
+        if self._thread is not None:
+            return
+
+        def run():
+            while not self._stop.wait(self.flush_interval):
+                try:
+                    self.flush(engine)
+                except Exception:
+                    pass
+
+        self._thread = threading.Thread(target=run, name="etl-control-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self, engine):
+        """Para el hilo y escribe lo que quede"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush(engine)
+
+    async def load_async(self, engine):
+        """Igual que load() pero con el engine async"""
+        try:
+            async with engine.connect() as conn:
+                result = await conn.execute(text(CONTROL_LOAD_QUERY))
+                self._load_rows(result.fetchall())
+        except Exception as e:
+            logger.warning(f"No pude cargar etl_control, arranco vacío: {str(e)}")
+
+    async def flush_async(self, engine) -> int:
+        """Igual que flush() pero con el engine async"""
+        rows = self._drain()
+        if not rows:
+            return 0
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(text(CONTROL_UPSERT), rows)
+        except Exception as e:
+            self._requeue(rows)
+            logger.error(f"¡Error al escribir el control ETL en lote! Detalles: {str(e)}")
+            raise
+        self._flushed(rows)
+        return len(rows)
+
+    def start_async(self, engine):
+        """Arranca una tarea en el event loop que escribe periódicamente"""
+        if self._task is not None:
+            return
+
+        async def run():
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                try:
+                    await self.flush_async(engine)
+                except Exception:
+                    pass
+
+        self._task = asyncio.ensure_future(run())
+
+    async def stop_async(self, engine):
+        """Cancela la tarea y escribe lo que quede"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush_async(engine)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = len(self._dirty)
+            jobs = len(self._jobs)
+        return {
+            'jobs': jobs,
+            'pending': pending,
+            'flushes': self.flushes,
+            'rows_flushed': self.rows_flushed
+        }
@@ -2,11 +2,22 @@
 # Me encargué de hacer todas las consultas lo más eficientes posible
 
 import logging
-from typing import List, Dict, Optional
+from decimal import Decimal
+from typing import Any, Callable, Iterator, List, Dict, Optional, Tuple
 import pandas as pd
-from sqlalchemy import create_engine, text, MetaData, Table, Column, String, DateTime
-from datetime import datetime
-from ..config.settings import DB_CONFIG, LOG_CONFIG, CACHE_CONFIG
+from sqlalchemy import MetaData, Table, Column, String, DateTime, text
+from datetime import date as datetime_date, datetime, timezone
+from tenacity import Retrying, retry_if_not_exception_type, stop_after_attempt, wait_random_exponential
+from ..config.settings import LOG_CONFIG, CACHE_CONFIG, PROCESSING_CONFIG
+from ..utils.memory_cache import MemoryCache
+from ..utils.single_flight import SingleFlight
+from ..utils.metrics import timed, watch_cache
+from ..utils.deadline import DeadlineExceeded, check_deadline, remaining, statement_timeout_ms
+from ..utils.admission import Overloaded
+from .control_registry import ControlRegistry
+from .aggregates import TopClientsIndex, AverageTicketAccumulator
+from ..database.engine import get_engine
+from ..database.rollup import ROLLUP_NAME, WATERMARK_QUERY, rollup_covered_until
 
 # Los logs son nuestros amigos
 # Me han salvado de muchos problemas
@@ -16,6 +27,308 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Las queries viven acá arriba para que el servicio async use exactamente las mismas
+DAILY_TRANSACTIONS_QUERY = """
+    SELECT 
+        c.nombre || ' ' || c.apellido as cliente,
+        COUNT(v.id) as cantidad_transacciones,
+        SUM(v.monto) as monto_total
+    FROM ventas v
+    JOIN clientes c ON v.cliente_id = c.id
+    WHERE v.producto = :product
+"""
+
+# Cuando el rollup cubre el día, es una búsqueda por clave en vez de un GROUP BY
+ROLLUP_TRANSACTIONS_QUERY = """
+    SELECT 
+        cliente,
+        cantidad_transacciones,
+        monto_total
+    FROM ventas_daily_rollup
+    WHERE producto = :product
+    AND fecha = :date
+"""
+
+# El top se arma en memoria: los días cerrados salen del rollup y los abiertos de ventas
+TOP_CLIENTS_ROLLUP_QUERY = """
+    SELECT 
+        fecha,
+        cliente_id,
+        cliente,
+        SUM(monto_total) as monto_total
+    FROM ventas_daily_rollup
+    WHERE fecha >= :desde
+    AND fecha < :hasta
+    GROUP BY fecha, cliente_id, cliente
+"""
+
+TOP_CLIENTS_LIVE_QUERY = """
+    SELECT 
+        v.fecha,
+        v.cliente_id,
+        c.nombre || ' ' || c.apellido as cliente,
+        SUM(v.monto) as monto_total
+    FROM ventas v
+    JOIN clientes c ON v.cliente_id = c.id
+    WHERE v.fecha >= :desde
+    GROUP BY v.fecha, v.cliente_id, c.nombre, c.apellido
+"""
+
+# Lo mismo para el ticket promedio: suma y conteo por día
+AVERAGE_TICKET_ROLLUP_QUERY = """
+    SELECT 
+        fecha,
+        SUM(monto_total) as monto_total,
+        SUM(cantidad_transacciones) as cantidad_transacciones
+    FROM ventas_daily_rollup
+    WHERE fecha >= :desde
+    AND fecha < :hasta
+    GROUP BY fecha
+"""
+
+AVERAGE_TICKET_LIVE_QUERY = """
+    SELECT 
+        v.fecha,
+        SUM(v.monto) as monto_total,
+        COUNT(v.id) as cantidad_transacciones
+    FROM ventas v
+    WHERE v.fecha >= :desde
+    GROUP BY v.fecha
+"""
+
+# Local a la transacción: al devolver la conexión al pool vuelve al valor por defecto
+STATEMENT_TIMEOUT_QUERY = "SELECT set_config('statement_timeout', :timeout, true)"
+
+def statement_timeout_params() -> Dict:
+    """statement_timeout con lo que queda del deadline del request (o el de los jobs)"""
+    return {"timeout": str(statement_timeout_ms(PROCESSING_CONFIG["timeout"]))}
+
+def _deadline_passed(retry_state) -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+def _log_retry(retry_state):
+    logger.warning(f"Intento {retry_state.attempt_number} falló, voy a intentar de nuevo...")
+
+class _wait_within_deadline(wait_random_exponential):
+    """El backoff de siempre, pero nunca dormir más de lo que le queda al request"""
+
+    def __call__(self, retry_state) -> float:
+        wait = super().__call__(retry_state)
+        left = remaining()
+        return wait if left is None else min(wait, max(0.0, left))
+
+def query_retrying(retrying_class=Retrying):
+    """Reintentos de las queries: backoff exponencial con jitter y corte en el deadline.
+
+    Antes eran tres intentos seguidos; con una base lenta eso era tener la
+    conexión tomada tres veces el tiempo de la query. El jitter evita que
+    todos los workers reintenten al mismo tiempo.
+    """
+    return retrying_class(
+        stop=stop_after_attempt(PROCESSING_CONFIG["max_retries"]) | _deadline_passed,
+        wait=_wait_within_deadline(
+            multiplier=PROCESSING_CONFIG["query_retry_base"],
+            max=PROCESSING_CONFIG["query_retry_max"]
+        ),
+        # Sin tiempo o sin lugar en la admisión no tiene sentido reintentar
+        retry=retry_if_not_exception_type((DeadlineExceeded, Overloaded)),
+        before_sleep=_log_retry,
+        reraise=True
+    )
+
+def raise_if_deadline_passed(error: Exception):
+    """Si la query falló porque se terminó el tiempo (statement_timeout), lo decimos así"""
+    if _deadline_passed(None):
+        raise DeadlineExceeded("Se agotó el tiempo del request esperando la base") from error
+
+def control_table(metadata: MetaData) -> Table:
+    """Definición de la tabla etl_control, compartida por el servicio sync y el async"""
+    return Table(
+        'etl_control',
+        metadata,
+        Column('job_name', String, primary_key=True),
+        Column('last_run_date', DateTime),
+        Column('status', String),
+        Column('records_processed', String),
+        Column('error_message', String)
+    )
+
+def query_date(date: str) -> datetime_date:
+    """La fecha YYYY-MM-DD como date para bindear: asyncpg no castea texto a date solo"""
+    return datetime.strptime(date, "%Y-%m-%d").date()
+
+def daily_transactions_query(product: str, date: Optional[str] = None, use_rollup: bool = False):
+    """Arma la query de transacciones diarias con sus parámetros"""
+    if use_rollup and date:
+        return ROLLUP_TRANSACTIONS_QUERY, {"product": product, "date": query_date(date)}
+
+    query = DAILY_TRANSACTIONS_QUERY
+    params = {"product": product}
+
+    if date:
+        query += " AND v.fecha = :date"
+        params["date"] = query_date(date)
+
+    query += " GROUP BY c.id, c.nombre, c.apellido"
+    return query, params
+
+# Páginas ordenadas por cliente_id: en el rollup la PK (producto, fecha, cliente_id)
+# ya da el orden, así cada página es un range scan que arranca donde quedó la anterior
+ROLLUP_TRANSACTIONS_PAGE_QUERY = """
+    SELECT 
+        cliente_id,
+        cliente,
+        cantidad_transacciones,
+        monto_total
+    FROM ventas_daily_rollup
+    WHERE producto = :product
+    AND fecha = :date
+    AND cliente_id > :after
+    ORDER BY cliente_id
+    LIMIT :limit
+"""
+
+DAILY_TRANSACTIONS_PAGE_QUERY = """
+    SELECT 
+        c.id as cliente_id,
+        c.nombre || ' ' || c.apellido as cliente,
+        COUNT(v.id) as cantidad_transacciones,
+        SUM(v.monto) as monto_total
+    FROM ventas v
+    JOIN clientes c ON v.cliente_id = c.id
+    WHERE v.producto = :product
+    AND v.cliente_id > :after
+"""
+
+def daily_transactions_page_query(
+    product: str,
+    date: Optional[str],
+    after: int,
+    limit: int,
+    use_rollup: bool = False
+):
+    """Como daily_transactions_query, pero una página de `limit` clientes después de `after`"""
+    params = {"product": product, "after": after, "limit": limit}
+    if use_rollup and date:
+        params["date"] = query_date(date)
+        return ROLLUP_TRANSACTIONS_PAGE_QUERY, params
+
+    query = DAILY_TRANSACTIONS_PAGE_QUERY
+    if date:
+        query += " AND v.fecha = :date"
+        params["date"] = query_date(date)
+
+    query += " GROUP BY c.id, c.nombre, c.apellido ORDER BY c.id LIMIT :limit"
+    return query, params
+
+def transactions_page(product: str, date: Optional[str], result: pd.DataFrame, page_size: int) -> Dict:
+    """Arma la página con la forma de get_daily_transactions más la clave para seguir.
+
+    La query trae page_size + 1 filas: si llegó la de más, hay otra página.
+    """
+    records = result.head(page_size).to_dict(orient="records")
+    after = int(records[-1]["cliente_id"]) if len(result) > page_size else None
+    return {
+        "producto": product,
+        "fecha": date,
+        "transacciones": records,
+        "siguiente_cliente_id": after
+    }
+
+# Varios (producto, fecha) en una sola query; los pares van como row values en el IN
+ROLLUP_TRANSACTIONS_BATCH_QUERY = """
+    SELECT 
+        producto,
+        fecha,
+        cliente,
+        cantidad_transacciones,
+        monto_total
+    FROM ventas_daily_rollup
+    WHERE (producto, fecha) IN ({pairs})
+"""
+
+DAILY_TRANSACTIONS_BATCH_QUERY = """
+    SELECT 
+        v.producto,
+        v.fecha,
+        c.nombre || ' ' || c.apellido as cliente,
+        COUNT(v.id) as cantidad_transacciones,
+        SUM(v.monto) as monto_total
+    FROM ventas v
+    JOIN clientes c ON v.cliente_id = c.id
+    WHERE (v.producto, v.fecha) IN ({pairs})
+    GROUP BY v.producto, v.fecha, c.id, c.nombre, c.apellido
+"""
+
+def batch_transactions_query(pairs: List[Tuple[str, str]], use_rollup: bool = False):
+    """Query y parámetros para todos los pares (producto, fecha) de una vez"""
+    placeholders = []
+    params = {}
+    for i, (product, date) in enumerate(pairs):
+        placeholders.append(f"(:product_{i}, :date_{i})")
+        params[f"product_{i}"] = product
+        params[f"date_{i}"] = query_date(date)
+    query = ROLLUP_TRANSACTIONS_BATCH_QUERY if use_rollup else DAILY_TRANSACTIONS_BATCH_QUERY
+    return query.format(pairs=", ".join(placeholders)), params
+
+def group_transactions(result: pd.DataFrame) -> Dict[Tuple[str, str], List[Dict]]:
+    """Reparte las filas del batch por (producto, fecha) en una sola pasada"""
+    grouped: Dict[Tuple[str, str], List[Dict]] = {}
+    if result.empty:
+        return grouped
+    fechas = pd.to_datetime(result["fecha"]).dt.strftime("%Y-%m-%d")
+    rows = result.drop(columns=["producto", "fecha"]).to_dict(orient="records")
+    for product, date, row in zip(result["producto"], fechas, rows):
+        grouped.setdefault((product, date), []).append(row)
+    return grouped
+
+def rollup_covers(date: Optional[str], covered_until) -> bool:
+    """True si el día pedido ya estaba cerrado en el último refresco del rollup"""
+    if not date or covered_until is None:
+        return False
+    try:
+        return datetime.strptime(date, "%Y-%m-%d").date() < covered_until
+    except ValueError:
+        return False
+
+def transaction_records(keys: List[str], rows) -> List[Dict]:
+    """Filas del cursor como dicts, con Decimal a float igual que pd.read_sql"""
+    return [
+        {k: float(v) if isinstance(v, Decimal) else v for k, v in zip(keys, row)}
+        for row in rows
+    ]
+
+def daily_client_rows(result: pd.DataFrame):
+    """Filas (fecha, cliente_id, cliente, monto) para cargar en TopClientsIndex"""
+    fechas = pd.to_datetime(result["fecha"]).dt.date
+    return zip(fechas, result["cliente_id"].astype(int), result["cliente"], result["monto_total"])
+
+def daily_ticket_rows(result: pd.DataFrame):
+    """Filas (fecha, monto_total, cantidad) para cargar en AverageTicketAccumulator"""
+    fechas = pd.to_datetime(result["fecha"]).dt.date
+    return zip(fechas, result["monto_total"], result["cantidad_transacciones"])
+
+def data_version(previous: Optional[Dict], fingerprint: str) -> Dict:
+    """Versión de un agregado para ETag y Last-Modified.
+
+    Si la huella no cambió se devuelve la anterior, así recargar los días
+    abiertos sin ventas nuevas no invalida lo que tienen los clientes.
+    """
+    if previous is not None and previous["version"] == fingerprint:
+        return previous
+    # Los headers HTTP tienen resolución de segundos
+    return {"version": fingerprint, "actualizado": datetime.now(timezone.utc).replace(microsecond=0)}
+
+def versioned_snapshot(previous: Optional[Tuple[Dict, Any]], aggregate) -> Tuple[Dict, Any]:
+    """(versión, datos) de un agregado sacados de la misma lectura.
+
+    Se reemplaza la tupla entera de una vez, así quien la lee nunca junta
+    la versión de un refresco con los datos de otro.
+    """
+    fingerprint, payload = aggregate.snapshot()
+    return data_version(previous[0] if previous else None, fingerprint), payload
+
 class DataService:
     def __init__(self):
         """¡Hola! Este es el constructor del servicio.
@@ -24,100 +337,152 @@ class DataService:
         El pool_size lo ajusté después de ver que se saturaba con muchas conexiones.
         """
         try:
-            self.engine = create_engine(
-                DB_CONFIG["url"],
-                pool_size=DB_CONFIG["pool_size"],
-                max_overflow=DB_CONFIG["max_overflow"],
-                echo=DB_CONFIG["echo"]
-            )
+            # El pool es del proceso, compartido con el batch y el setup
+            self.engine = get_engine()
             self.metadata = MetaData()
-            self.cache = {} if CACHE_CONFIG["enabled"] else None
+            self.cache = MemoryCache() if CACHE_CONFIG["enabled"] else None
+            if self.cache is not None:
+                watch_cache(type(self).__name__, self.cache)
+            self.flight = SingleFlight()
+            self.top_clients = TopClientsIndex()
+            self._top_clients_until = None
+            # (versión, ranking) publicados juntos en cada refresco
+            self._top_clients_snapshot = None
+            self.ticket = AverageTicketAccumulator()
+            self._ticket_until = None
+            self._ticket_snapshot = None
             self._create_control_table()
+            self.control = ControlRegistry()
+            self.control.load(self.engine)
+            self.control.start(self.engine)
             logger.info("¡Conexión exitosa a la base de datos!")
         except Exception as e:
             logger.error(f"¡Ups! No pude conectar a la base de datos: {str(e)}")
             raise
 
+    def close(self):
+        """Escribe el control pendiente y libera el pool"""
+        self.control.stop(self.engine)
+        self.engine.dispose()
+
     def _create_control_table(self):
         """Esta tabla la agregué para controlar los jobs.
         
         Al principio no la tenía, pero me di cuenta que necesitaba
         saber qué jobs se habían ejecutado y cuáles habían fallado.
         """
-        control_table = Table(
-            'etl_control',
-            self.metadata,
-            Column('job_name', String, primary_key=True),
-            Column('last_run_date', DateTime),
-            Column('status', String),
-            Column('records_processed', String),
-            Column('error_message', String)
-        )
+        control_table(self.metadata)
         self.metadata.create_all(self.engine)
 
+    @timed
     def _execute_query(self, query: str, params: Optional[Dict] = None) -> pd.DataFrame:
         """Esta función es la que hace el trabajo pesado.
         
         Le agregué reintentos porque a veces la base de datos
-        se pone un poco lenta y falla la primera vez.
+        se pone un poco lenta y falla la primera vez. Cada intento lleva un
+        statement_timeout con lo que le queda al request, y si el deadline ya
+        pasó no se reintenta más.
+        """
+        try:
+            for attempt in query_retrying():
+                with attempt:
+                    check_deadline()
+                    with self.engine.connect() as conn:
+                        if conn.dialect.name == "postgresql":
+                            conn.execute(text(STATEMENT_TIMEOUT_QUERY), statement_timeout_params())
+                        return pd.read_sql(query, conn, params=params)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            raise_if_deadline_passed(e)
+            logger.error(f"¡No pude ejecutar la query después de varios intentos! Error: {e}")
+            raise
+
+    def _cached(self, cache_key: str, loader: Callable[[], Any]) -> Any:
+        """Caché primero, después single-flight contra la base.
+        
+        Si la entrada pasó su TTL blando la devolvemos igual y la refrescamos
+        en segundo plano, así el que llega justo al vencimiento no paga la query.
         """
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                with self.engine.connect() as conn:
-                    result = pd.read_sql(query, conn, params=params)
-                    return result
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    logger.error(f"¡No pude ejecutar la query después de {max_retries} intentos! Error: {e}")
-                    raise
-                logger.warning(f"Intento {attempt + 1} falló, voy a intentar de nuevo...")
+        if self.cache is not None:
+            cached, stale = self.cache.lookup(cache_key)
+            if cached is not None:
+                if stale:
+                    self.cache.refresh_in_background(
+                        cache_key, lambda: self.flight.do(cache_key, loader)
+                    )
+                return cached
 
+        return self.flight.do(cache_key, loader)
+
+    def _rollup_coverage(self):
+        """Primer día que el rollup no cubre; el watermark se guarda un rato en caché"""
+        return self._cached("rollup_coverage", self._load_rollup_coverage)["hasta"]
+
+    def _rollup_covers(self, date: Optional[str]) -> bool:
+        if not date:
+            return False
+        return rollup_covers(date, self._rollup_coverage())
+
+    def _load_rollup_coverage(self) -> Dict:
+        try:
+            result = self._execute_query(WATERMARK_QUERY, {"nombre": ROLLUP_NAME})
+            hasta = rollup_covered_until(result["actualizado"].iloc[0]) if len(result) else None
+        except Exception as e:
+            logger.warning(f"No pude leer el watermark del rollup, uso ventas: {e}")
+            hasta = None
+        coverage = {"hasta": hasta}
+        if self.cache is not None:
+            self.cache.set("rollup_coverage", coverage)
+        return coverage
+
+    def _refresh_window(self, aggregate, loaded_until, rollup_query: str, live_query: str, to_rows):
+        """Carga en un agregado en memoria los días que le faltan.
+        
+        Los días cerrados se leen una sola vez del rollup y los abiertos
+        (desde la cobertura del rollup) se releen de ventas en cada refresco.
+        Devuelve hasta dónde quedó cargado desde el rollup.
+        """
+        today = datetime.now().date()
+        start = aggregate.window_start(today)
+        hasta = self._rollup_coverage()
+
+        if hasta is not None and hasta > start:
+            desde = max(start, loaded_until or start)
+            if desde < hasta:
+                result = self._execute_query(rollup_query, {"desde": desde, "hasta": hasta})
+                aggregate.load_days(to_rows(result), desde, hasta)
+            abiertos = hasta
+        else:
+            abiertos = start
+
+        result = self._execute_query(live_query, {"desde": abiertos})
+        aggregate.load_days(to_rows(result), abiertos)
+        aggregate.expire(today)
+        return hasta
+
+    @timed
     def get_daily_transactions(self, product: str, date: Optional[str] = None) -> Dict:
         """Este método me quedó genial.
         
         La caché la agregué después porque vi que las mismas consultas
         se hacían muchas veces. Ahora es mucho más rápido.
         """
-        job_name = f"daily_transactions_{product}_{date if date else 'all'}"
         cache_key = f"transactions_{product}_{date}"
-        if self.cache and cache_key in self.cache:
-            return self.cache[cache_key]
+        return self._cached(cache_key, lambda: self._load_daily_transactions(product, date, cache_key))
 
+    def _load_daily_transactions(self, product: str, date: Optional[str], cache_key: str) -> Dict:
+        """Corre la consulta de verdad.
+        
+        Va envuelta en single-flight para que los requests concurrentes
+        con la misma clave esperen esta consulta en vez de repetirla.
+        """
+        job_name = f"daily_transactions_{product}_{date if date else 'all'}"
         try:
-            # Primero vemos si ya procesamos esto hoy
-            with self.engine.connect() as conn:
-                result = conn.execute(
-                    text("""
-                        SELECT status, records_processed
-                        FROM etl_control
-                        WHERE job_name = :job_name
-                        AND DATE(last_run_date) = CURRENT_DATE
-                    """),
-                    {"job_name": job_name}
-                ).fetchone()
-
-                if result and result[0] == 'success':
-                    logger.info(f"¡Encontré datos en caché para {job_name}!")
-                    return {"cached": True, "data": result[1]}
-
-            # Esta query la optimicé varias veces
-            query = """
-                SELECT 
-                    c.nombre || ' ' || c.apellido as cliente,
-                    COUNT(v.id) as cantidad_transacciones,
-                    SUM(v.monto) as monto_total
-                FROM ventas v
-                JOIN clientes c ON v.cliente_id = c.id
-                WHERE v.producto = :product
-            """
-            params = {"product": product}
-            
-            if date:
-                query += " AND v.fecha = :date"
-                params["date"] = date
-            
-            query += " GROUP BY c.id, c.nombre, c.apellido"
+            # etl_control solo registra cómo salió el job, no guarda los datos: siempre consultamos
+
+            # Esta query la optimicé varias veces, y si el rollup cubre el día ni siquiera agrega
+            query, params = daily_transactions_query(product, date, self._rollup_covers(date))
             
             result = self._execute_query(query, params)
             
@@ -135,7 +500,7 @@ class DataService:
             )
             
             if self.cache is not None:
-                self.cache[cache_key] = data
+                self.cache.set(cache_key, data)
             
             return data
         except Exception as e:
@@ -144,68 +509,188 @@ class DataService:
             logger.error(f"¡Error al obtener transacciones diarias! Detalles: {error_msg}")
             raise
 
+    @timed
+    def get_daily_transactions_batch(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict]:
+        """Transacciones de varios (producto, fecha) con a lo sumo dos queries.
+        
+        Lo que está en caché sale de ahí; el resto se pide todo junto, los
+        días cerrados al rollup y los abiertos a ventas. Cada par queda en
+        caché con la misma clave que get_daily_transactions.
+        """
+        results, missing = {}, []
+        for product, date in dict.fromkeys(pairs):
+            cached = self.cache.get(f"transactions_{product}_{date}") if self.cache is not None else None
+            if cached is not None and "transacciones" in cached:
+                results[(product, date)] = cached
+            else:
+                missing.append((product, date))
+        if not missing:
+            return results
+
+        job_name = "daily_transactions_batch"
+        try:
+            covered = [pair for pair in missing if self._rollup_covers(pair[1])]
+            live = [pair for pair in missing if pair not in covered]
+            grouped = {}
+            for chunk, use_rollup in ((covered, True), (live, False)):
+                if chunk:
+                    query, params = batch_transactions_query(chunk, use_rollup)
+                    grouped.update(group_transactions(self._execute_query(query, params)))
+
+            for product, date in missing:
+                data = {"producto": product, "fecha": date, "transacciones": grouped.get((product, date), [])}
+                if self.cache is not None:
+                    self.cache.set(f"transactions_{product}_{date}", data)
+                results[(product, date)] = data
+
+            self._update_control(job_name, "success", str(len(missing)))
+            return results
+        except Exception as e:
+            error_msg = str(e)
+            self._update_control(job_name, "error", error=error_msg)
+            logger.error(f"¡Error en el batch de transacciones! Detalles: {error_msg}")
+            raise
+
+    @timed
+    def get_daily_transactions_page(
+        self,
+        product: str,
+        date: Optional[str] = None,
+        page_size: int = 500,
+        after: int = 0
+    ) -> Dict:
+        """Una página de transacciones ordenada por cliente_id.
+        
+        Es paginación por clave: la página siguiente arranca en el primer
+        cliente_id mayor a `after`, así no importa cuán adentro esté no hay
+        OFFSET que recorrer. Cada página se cachea aparte.
+        """
+        cache_key = f"transactions_{product}_{date}_page_{after}_{page_size}"
+        return self._cached(
+            cache_key, lambda: self._load_daily_transactions_page(product, date, page_size, after, cache_key)
+        )
+
+    def _load_daily_transactions_page(
+        self, product: str, date: Optional[str], page_size: int, after: int, cache_key: str
+    ) -> Dict:
+        try:
+            query, params = daily_transactions_page_query(
+                product, date, after, page_size + 1, self._rollup_covers(date)
+            )
+            data = transactions_page(product, date, self._execute_query(query, params), page_size)
+            if self.cache is not None:
+                self.cache.set(cache_key, data)
+            return data
+        except Exception as e:
+            logger.error(f"¡Error al obtener la página de transacciones! Detalles: {str(e)}")
+            raise
+
+    def stream_daily_transaction_rows(
+        self,
+        product: str,
+        date: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ) -> Iterator[Tuple[List[str], List[Tuple]]]:
+        """Las transacciones de a lotes con un cursor del lado del servidor.
+        
+        Devuelve (columnas, filas) tal cual salen del cursor: no pasa por
+        pandas ni por la caché, así en memoria hay un solo lote a la vez.
+        Si no hay filas igual devuelve un lote vacío con las columnas.
+        """
+        batch_size = batch_size or PROCESSING_CONFIG["stream_batch_size"]
+        # Job propio: no se mezcla con el registro de la consulta sin streaming
+        job_name = f"daily_transactions_stream_{product}_{date if date else 'all'}"
+        query, params = daily_transactions_query(product, date, self._rollup_covers(date))
+        total = 0
+        try:
+            check_deadline()
+            # yield_per activa stream_results: en psycopg2 es un cursor con nombre
+            with self.engine.connect().execution_options(yield_per=batch_size) as conn:
+                if conn.dialect.name == "postgresql":
+                    conn.execute(text(STATEMENT_TIMEOUT_QUERY), statement_timeout_params())
+                result = conn.execute(text(query), params)
+                keys = list(result.keys())
+                for partition in result.partitions(batch_size):
+                    total += len(partition)
+                    yield keys, partition
+                    # Entre lote y lote el cliente pudo tardar: cortamos si ya no hay tiempo
+                    check_deadline()
+                if total == 0:
+                    yield keys, []
+            self._update_control(job_name, "success", str(total))
+        except Exception as e:
+            error_msg = str(e)
+            self._update_control(job_name, "error", error=error_msg)
+            logger.error(f"¡Error en el streaming de transacciones! Detalles: {error_msg}")
+            if not isinstance(e, DeadlineExceeded):
+                raise_if_deadline_passed(e)
+            raise
+
+    def stream_daily_transactions(
+        self,
+        product: str,
+        date: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ) -> Iterator[List[Dict]]:
+        """Lo mismo que stream_daily_transaction_rows pero con la forma de get_daily_transactions"""
+        for keys, rows in self.stream_daily_transaction_rows(product, date, batch_size):
+            if rows:
+                yield transaction_records(keys, rows)
+
+    @timed
     def get_top_clients(self, limit: int = 5) -> List[Dict]:
         """Este método es para ver quiénes son los mejores clientes.
         
         El límite lo hice configurable porque a veces queremos ver
         más o menos clientes del top.
         """
-        job_name = f"top_clients_{limit}"
-        cache_key = f"top_clients_{limit}"
-        if self.cache and cache_key in self.cache:
-            return self.cache[cache_key]
+        self._cached("top_clients_index", self._refresh_top_clients)
+        return self.top_clients.top(limit)
 
-        try:
-            # Verificamos la caché del día
-            with self.engine.connect() as conn:
-                result = conn.execute(
-                    text("""
-                        SELECT status, records_processed
-                        FROM etl_control
-                        WHERE job_name = :job_name
-                        AND DATE(last_run_date) = CURRENT_DATE
-                    """),
-                    {"job_name": job_name}
-                ).fetchone()
-
-                if result and result[0] == 'success':
-                    logger.info(f"¡Datos en caché para {job_name}!")
-                    return {"cached": True, "data": result[1]}
-
-            # Esta query está bien optimizada
-            query = """
-                SELECT 
-                    c.nombre || ' ' || c.apellido as cliente,
-                    SUM(v.monto) as monto_total
-                FROM ventas v
-                JOIN clientes c ON v.cliente_id = c.id
-                WHERE v.fecha >= CURRENT_DATE - INTERVAL '6 months'
-                GROUP BY c.id, c.nombre, c.apellido
-                ORDER BY monto_total DESC
-                LIMIT :limit
-            """
-            
-            result = self._execute_query(query, {"limit": limit})
-            
-            data = result.to_dict(orient="records")
+    @timed
+    def get_top_clients_versioned(self, limit: int = 5) -> Tuple[Dict, List[Dict]]:
+        """(versión, top) de la misma foto del ranking, para armar el ETag y el cuerpo"""
+        self.top_clients.check_limit(limit)
+        self._cached("top_clients_index", self._refresh_top_clients)
+        version, ranking = self._top_clients_snapshot
+        return version, ranking[:limit]
 
-            # Registramos el éxito
-            self._update_control(
-                job_name,
-                "success",
-                str(len(result))
+    @timed
+    def top_clients_version(self) -> Dict:
+        """Versión del ranking ({"version", "actualizado"}); con la caché vigente no consulta nada"""
+        self._cached("top_clients_index", self._refresh_top_clients)
+        return self._top_clients_snapshot[0]
+
+    def _refresh_top_clients(self) -> Dict:
+        """Pone al día el ranking en memoria.
+        
+        Antes cada limit era una query de 6 meses sobre ventas; ahora todos
+        los limit salen del mismo ranking y solo se releen los días abiertos.
+        """
+        job_name = "top_clients"
+        try:
+            self._top_clients_until = self._refresh_window(
+                self.top_clients,
+                self._top_clients_until,
+                TOP_CLIENTS_ROLLUP_QUERY,
+                TOP_CLIENTS_LIVE_QUERY,
+                daily_client_rows
             )
-            
+            self._top_clients_snapshot = versioned_snapshot(self._top_clients_snapshot, self.top_clients)
+
+            self._update_control(job_name, "success", str(len(self.top_clients)))
+
+            state = {"hasta": self._top_clients_until, "clientes": len(self.top_clients)}
             if self.cache is not None:
-                self.cache[cache_key] = data
-            
-            return data
+                self.cache.set("top_clients_index", state)
+            return state
         except Exception as e:
             error_msg = str(e)
             self._update_control(job_name, "error", error=error_msg)
             logger.error(f"¡Problemas al obtener top clientes! Error: {error_msg}")
             raise
 
+    @timed
     def get_average_ticket(self) -> Dict:
         """Este método calcula el ticket promedio.
         
@@ -213,54 +698,41 @@ class DataService:
         pero después agregué el conteo de transacciones
         para tener más información.
         """
-        job_name = "average_ticket"
-        cache_key = "average_ticket"
-        if self.cache and cache_key in self.cache:
-            return self.cache[cache_key]
+        self._cached("average_ticket", self._refresh_average_ticket)
+        return self.ticket.summary()
+
+    @timed
+    def get_average_ticket_versioned(self) -> Tuple[Dict, Dict]:
+        """(versión, ticket) de la misma foto, como get_top_clients_versioned"""
+        self._cached("average_ticket", self._refresh_average_ticket)
+        return self._ticket_snapshot
+
+    @timed
+    def average_ticket_version(self) -> Dict:
+        """Versión del ticket promedio, igual que top_clients_version"""
+        self._cached("average_ticket", self._refresh_average_ticket)
+        return self._ticket_snapshot[0]
 
+    def _refresh_average_ticket(self) -> Dict:
+        """Antes era un AVG sobre un año de ventas; ahora es suma y conteo por día en memoria"""
+        job_name = "average_ticket"
         try:
-            # Revisamos la caché del día
-            with self.engine.connect() as conn:
-                result = conn.execute(
-                    text("""
-                        SELECT status, records_processed
-                        FROM etl_control
-                        WHERE job_name = :job_name
-                        AND DATE(last_run_date) = CURRENT_DATE
-                    """),
-                    {"job_name": job_name}
-                ).fetchone()
-
-                if result and result[0] == 'success':
-                    logger.info(f"¡Encontré datos en caché para {job_name}!")
-                    return {"cached": True, "data": result[1]}
-
-            # Esta query es simple pero efectiva
-            query = """
-                SELECT 
-                    AVG(v.monto) as ticket_promedio,
-                    COUNT(v.id) as total_transacciones
-                FROM ventas v
-                WHERE v.fecha >= CURRENT_DATE - INTERVAL '1 year'
-            """
-            
-            result = self._execute_query(query)
-            
-            data = {
-                "ticket_promedio": float(result["ticket_promedio"].iloc[0]),
-                "total_transacciones": int(result["total_transacciones"].iloc[0])
-            }
+            self._ticket_until = self._refresh_window(
+                self.ticket,
+                self._ticket_until,
+                AVERAGE_TICKET_ROLLUP_QUERY,
+                AVERAGE_TICKET_LIVE_QUERY,
+                daily_ticket_rows
+            )
+            self._ticket_snapshot = versioned_snapshot(self._ticket_snapshot, self.ticket)
+            data = self._ticket_snapshot[1]
 
             # Guardamos el éxito
-            self._update_control(
-                job_name,
-                "success",
-                str(result["total_transacciones"].iloc[0])
-            )
-            
+            self._update_control(job_name, "success", str(data["total_transacciones"]))
+
             if self.cache is not None:
-                self.cache[cache_key] = data
-            
+                self.cache.set("average_ticket", data)
+
             return data
         except Exception as e:
             error_msg = str(e)
@@ -268,33 +740,17 @@ class DataService:
             logger.error(f"¡Error al calcular ticket promedio! Detalles: {error_msg}")
             raise
 
+    def ping(self) -> bool:
+        """Chequeo profundo para readiness: una ida y vuelta a la base"""
+        with self.engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+        return True
+
     def _update_control(self, job_name: str, status: str, records: str = None, error: str = None):
         """Esta función actualiza el control de jobs.
         
         El ON CONFLICT fue clave para que fuera idempotente.
-        Me costó un poco pero al final quedó bien.
+        Ahora el cambio queda en memoria y el registro lo escribe en lote,
+        así no pagamos un UPSERT por cada request.
         """
-        try:
-            with self.engine.connect() as conn:
-                conn.execute(
-                    text("""
-                        INSERT INTO etl_control (job_name, last_run_date, status, records_processed, error_message)
-                        VALUES (:job_name, :date, :status, :records, :error)
-                        ON CONFLICT (job_name) DO UPDATE
-                        SET last_run_date = :date,
-                            status = :status,
-                            records_processed = :records,
-                            error_message = :error
-                    """),
-                    {
-                        "job_name": job_name,
-                        "date": datetime.now(),
-                        "status": status,
-                        "records": records,
-                        "error": error
-                    }
-                )
-                conn.commit()
-        except Exception as e:
-            logger.error(f"¡Error al actualizar el control ETL! Detalles: {str(e)}")
-            raise 
\ No newline at end of file
+        self.control.update(job_name, status, records, error)
@@ -0,0 +1,60 @@
+# Tope de queries en vuelo contra la base (o DynamoDB)
+# Se toma alrededor de la query, no del request: un hit de caché o un 304 no ocupa lugar
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from ..config.settings import SECURITY_CONFIG
+
+class Overloaded(Exception):
+    """No hubo lugar para otra query a tiempo; la API lo contesta con 503"""
+
+class AdmissionController:
+    """Semáforo de queries en vuelo.
+
+    Por defecto el tope es el del pool (pool_size + max_overflow), así una
+    query que no tiene conexión se rechaza en `timeout` segundos con 503
+    en vez de esperar en el pool hasta el pool_timeout de 30 segundos.
+    """
+
+    def __init__(self, max_inflight: Optional[int] = None, timeout: Optional[float] = None):
+        self.max_inflight = max_inflight or SECURITY_CONFIG["max_inflight_queries"]
+        self.timeout = SECURITY_CONFIG["admission_timeout"] if timeout is None else timeout
+        self._semaphore = asyncio.Semaphore(self.max_inflight)
+        self.inflight = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    async def acquire(self) -> bool:
+        try:
+            if self._semaphore.locked() and self.timeout <= 0:
+                raise asyncio.TimeoutError
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return False
+        self.inflight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.inflight -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Un lugar mientras dura el bloque; Overloaded si no se consiguió a tiempo"""
+        if not await self.acquire():
+            raise Overloaded("Servicio saturado, intente de nuevo en unos segundos")
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict:
+        return {
+            "max_inflight": self.max_inflight,
+            "inflight": self.inflight,
+            "admitted": self.admitted,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,63 @@
+# Clientes de AWS compartidos, creados recién cuando se usan
+# Antes cada módulo hacía su boto3.client al importarse: cientos de ms de
+# arranque (en frío, en Lambda y en cada worker) y un error sin credenciales
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_session = None
+_clients: Dict[Tuple, Any] = {}
+
+def _get_session():
+    global _session
+    if _session is None:
+        # boto3 se importa recién acá, no al importar el módulo que lo usa
+        import boto3
+        _session = boto3.session.Session()
+    return _session
+
+def get_client(service: str, **kwargs) -> Any:
+    """Cliente compartido de `service`, uno por proceso.
+
+    Los clientes de boto3 son thread-safe, así que todos los threads
+    usan el mismo. Los kwargs (p. ej. region_name) son parte de la clave.
+    """
+    return _get("client", service, kwargs)
+
+def get_resource(service: str, **kwargs) -> Any:
+    """Resource compartido de `service`, uno por proceso.
+
+    A diferencia de los clientes, los resources de boto3 no son
+    thread-safe: sirven desde el event loop, no desde varios threads.
+    """
+    return _get("resource", service, kwargs)
+
+def _get(kind: str, service: str, kwargs: Dict) -> Any:
+    key = (kind, service, tuple(sorted(kwargs.items())))
+    obj = _clients.get(key)
+    if obj is None:
+        with _lock:
+            obj = _clients.get(key)
+            if obj is None:
+                # La Session de boto3 no es thread-safe: solo se toca con el lock
+                obj = getattr(_get_session(), kind)(service, **kwargs)
+                _clients[key] = obj
+                logger.info(f"{kind.capitalize()} de AWS creado para {service}")
+    return obj
+
+def reset_clients():
+    """Descarta la sesión y los clientes; los próximos se crean de nuevo"""
+    global _lock, _session
+    _lock = threading.Lock()
+    _session = None
+    _clients.clear()
+
+# Un worker forkeado (gunicorn/uvicorn) no tiene que compartir conexiones con el
+# padre, ni heredar el lock tomado si el fork pasó justo mientras se creaba un cliente
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_clients)
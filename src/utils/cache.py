@@ -1,5 +1,5 @@
-import redis
 import json
+import threading
 from typing import Any, Optional, Callable
 from functools import wraps
 from datetime import datetime, timedelta
@@ -10,13 +10,29 @@ class Cache:
     """Clase para manejar el caché usando Redis"""
     
     def __init__(self):
-        """Inicializa la conexión con Redis"""
-        self.redis_client = redis.Redis(
-            host=CACHE_CONFIG['host'],
-            port=CACHE_CONFIG['port'],
-            db=CACHE_CONFIG['db'],
-            decode_responses=True
-        )
+        """La conexión con Redis se arma recién en el primer uso (ver redis_client)"""
+        self._redis_client = None
+        self._lock = threading.Lock()
+
+    @property
+    def redis_client(self):
+        """Cliente de Redis, creado la primera vez que se usa.
+
+        Así importar este módulo no requiere redis instalado ni un servidor
+        arriba. Después de un fork, el pool de redis-py descarta solo las
+        conexiones del padre.
+        """
+        if self._redis_client is None:
+            with self._lock:
+                if self._redis_client is None:
+                    import redis
+                    self._redis_client = redis.Redis(
+                        host=CACHE_CONFIG['host'],
+                        port=CACHE_CONFIG['port'],
+                        db=CACHE_CONFIG['db'],
+                        decode_responses=True
+                    )
+        return self._redis_client
     
     def get(self, key: str) -> Optional[Any]:
         """Obtiene un valor del caché"""
@@ -0,0 +1,87 @@
+# Deadline por request, propagado con un contextvar hasta las queries
+# El handler no tiene que pasarlo a mano: DataService lo lee de donde esté
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# Instante (time.monotonic) en el que vence el request actual; None = sin deadline
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+class DeadlineExceeded(TimeoutError):
+    """Se terminó el tiempo del request antes de poder contestar"""
+
+def set_deadline(seconds: Optional[float]):
+    """Fija el deadline a `seconds` desde ahora; devuelve el token para reset_deadline"""
+    return _deadline.set(None if seconds is None else time.monotonic() + seconds)
+
+def reset_deadline(token):
+    _deadline.reset(token)
+
+def clear_deadline():
+    """Saca el deadline del contexto actual (p. ej. en un refresco en segundo plano)"""
+    _deadline.set(None)
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Con un deadline ya fijado gana el más corto de los dos"""
+    remaining_now = remaining()
+    if remaining_now is not None and (seconds is None or remaining_now < seconds):
+        seconds = remaining_now
+    token = set_deadline(seconds)
+    try:
+        yield
+    finally:
+        reset_deadline(token)
+
+def remaining() -> Optional[float]:
+    """Segundos que quedan (puede ser negativo), o None si no hay deadline"""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+def check_deadline():
+    """DeadlineExceeded si el request ya se quedó sin tiempo"""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("Se agotó el tiempo del request")
+
+def statement_timeout_ms(default_seconds: float, margin: float = 0.05) -> int:
+    """statement_timeout para la próxima query: lo que queda del deadline menos un margen.
+
+    Sin deadline (jobs batch) se usa `default_seconds`. Nunca devuelve 0,
+    que en Postgres significa sin límite.
+    """
+    left = remaining()
+    seconds = default_seconds if left is None else min(default_seconds, left - margin)
+    return max(1, int(seconds * 1000))
+
+class DeadlineMiddleware:
+    """Middleware ASGI que le pone un deadline a cada request HTTP.
+
+    El cliente puede pedir uno más corto con el header X-Request-Timeout
+    (en segundos); nunca más largo que `timeout`.
+    """
+
+    def __init__(self, app, timeout: float):
+        self.app = app
+        self.timeout = timeout
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        seconds = self.timeout
+        for name, value in scope["headers"]:
+            if name == b"x-request-timeout":
+                try:
+                    requested = float(value)
+                except ValueError:
+                    break
+                if requested > 0:
+                    seconds = min(seconds, requested)
+                break
+
+        with deadline(seconds):
+            await self.app(scope, receive, send)
@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from cachetools import Cache, TLRUCache
+from ..config.settings import CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Estimación del tamaño sin serializar: por fila de una lista y por valor suelto
+ROW_BYTES = 256
+VALUE_BYTES = 64
+
+def estimate_size(value: Any) -> int:
+    """Bytes aproximados de un valor, en O(claves) y sin recorrer las filas.
+
+    Antes se medía con pickle en cada set, que para una respuesta grande de
+    /transacciones costaba casi lo mismo que armarla. Lo ya serializado
+    (bytes, str) se mide exacto; una lista o un DataFrame cuentan filas.
+    """
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(VALUE_BYTES + estimate_size(v) for v in value.values())
+    if hasattr(value, "__len__"):
+        return len(value) * ROW_BYTES
+    return VALUE_BYTES
+
+class _BoundedTLRUCache(TLRUCache):
+    """TLRUCache que además limita la cantidad de entradas y cuenta desalojos"""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttu, timer, getsizeof):
+        super().__init__(maxsize=max_bytes, ttu=ttu, timer=timer, getsizeof=getsizeof)
+        self.max_entries = max_entries
+        self.evictions = 0
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        while len(self) > self.max_entries:
+            self.popitem()
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+class MemoryCache:
+    """Caché en memoria del proceso, acotada y con TTL por clave.
+
+    Desaloja por LRU cuando se pasa de `max_entries` entradas o de `max_bytes`
+    bytes (estimados con estimate_size). El TTL de cada clave sale de CACHE_CONFIG["ttls"]
+    según su prefijo, y si ninguno coincide se usa CACHE_CONFIG["ttl"].
+
+    Con CACHE_CONFIG["soft_ttls"] se activa stale-while-revalidate: pasado el
+    TTL blando la entrada se sigue sirviendo (hasta el TTL duro) pero queda
+    marcada como vieja, y se refresca en segundo plano con un pool acotado.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttls: Optional[Dict[str, int]] = None,
+        default_ttl: Optional[int] = None,
+        soft_ttls: Optional[Dict[str, int]] = None,
+        refresh_workers: Optional[int] = None,
+        max_pending_refreshes: Optional[int] = None,
+        timer=time.monotonic
+    ):
+        self.ttls = ttls if ttls is not None else CACHE_CONFIG["ttls"]
+        self.default_ttl = default_ttl if default_ttl is not None else CACHE_CONFIG["ttl"]
+        self.soft_ttls = soft_ttls if soft_ttls is not None else CACHE_CONFIG["soft_ttls"]
+        self.refresh_workers = refresh_workers or CACHE_CONFIG["refresh_workers"]
+        self.max_pending_refreshes = max_pending_refreshes or CACHE_CONFIG["max_pending_refreshes"]
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._store = _BoundedTLRUCache(
+            max_entries=max_entries or CACHE_CONFIG["max_entries"],
+            max_bytes=max_bytes or CACHE_CONFIG["max_bytes"],
+            ttu=lambda key, value, now: now + self.ttl_for(key),
+            timer=timer,
+            # Cada entrada es (valor, vencimiento blando): se mide el valor
+            getsizeof=lambda entry: estimate_size(entry[0])
+        )
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refreshes_skipped = 0
+        self._refreshing = set()
+        # El pool de refresco se crea recién cuando hace falta
+        self._executor = None
+        self._async_slots = None
+
+    @staticmethod
+    def _by_prefix(key: str, ttls: Dict[str, int]) -> Optional[int]:
+        for prefix, ttl in ttls.items():
+            if key.startswith(prefix):
+                return ttl
+        return None
+
+    def ttl_for(self, key: str) -> int:
+        """TTL duro en segundos para una clave según su prefijo"""
+        ttl = self._by_prefix(key, self.ttls)
+        return ttl if ttl is not None else self.default_ttl
+
+    def soft_ttl_for(self, key: str) -> int:
+        """TTL blando; si la clave no tiene uno, es igual al duro y nunca queda vieja"""
+        soft = self._by_prefix(key, self.soft_ttls)
+        hard = self.ttl_for(key)
+        return min(soft, hard) if soft is not None else hard
+
+    def _expire(self):
+        # len() de TLRUCache ya expira por dentro, por eso contamos con el de Cache
+        before = Cache.__len__(self._store)
+        self._store.expire()
+        self.expirations += before - Cache.__len__(self._store)
+
+    def lookup(self, key: str) -> Tuple[Any, bool]:
+        """Devuelve (valor, está_viejo); (None, False) si no está o pasó el TTL duro"""
+        with self._lock:
+            self._expire()
+            try:
+                value, soft_expires = self._store[key]
+            except KeyError:
+                self.misses += 1
+                return None, False
+            self.hits += 1
+            stale = self._timer() >= soft_expires
+            if stale:
+                self.stale_hits += 1
+            return value, stale
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Obtiene un valor si existe y no expiró, aunque esté viejo"""
+        value, _ = self.lookup(key)
+        return default if value is None else value
+
+    def set(self, key: str, value: Any) -> bool:
+        """Guarda un valor; si es más grande que la caché completa no se guarda"""
+        with self._lock:
+            soft_expires = self._timer() + self.soft_ttl_for(key)
+            try:
+                self._store[key] = (value, soft_expires)
+            except ValueError:
+                return False
+            return True
+
+    def _claim_refresh(self, key: str) -> bool:
+        """Un solo refresco por clave y un tope de refrescos pendientes"""
+        with self._lock:
+            if key in self._refreshing or len(self._refreshing) >= self.max_pending_refreshes:
+                self.refreshes_skipped += 1
+                return False
+            self._refreshing.add(key)
+            self.refreshes += 1
+            return True
+
+    def _release_refresh(self, key: str) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def refresh_in_background(self, key: str, fn: Callable[[], Any]) -> bool:
+        """Agenda fn en el pool de refresco; fn se encarga de guardar el valor nuevo"""
+        if not self._claim_refresh(key):
+            return False
+
+        def run():
+            try:
+                fn()
+            except Exception as e:
+                logger.warning(f"No pude refrescar {key} en segundo plano: {e}")
+            finally:
+                self._release_refresh(key)
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.refresh_workers,
+                    thread_name_prefix="cache-refresh"
+                )
+        self._executor.submit(run)
+        return True
+
+    def refresh_in_background_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> bool:
+        """Versión async: una tarea por clave, con un semáforo como pool"""
+        if not self._claim_refresh(key):
+            return False
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.refresh_workers)
+
+        async def run():
+            try:
+                async with self._async_slots:
+                    await fn()
+            except Exception as e:
+                logger.warning(f"No pude refrescar {key} en segundo plano: {e}")
+            finally:
+                self._release_refresh(key)
+
+        asyncio.ensure_future(run())
+        return True
+
+    def delete(self, key: str) -> bool:
+        """Elimina un valor de la caché"""
+        with self._lock:
+            return self._store.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """Limpia toda la caché"""
+        with self._lock:
+            # clear() usa popitem() por debajo, y eso no es un desalojo
+            evictions = self._store.evictions
+            self._store.clear()
+            self._store.evictions = evictions
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._store
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.set(key, value)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._store)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de uso de la caché"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+                'evictions': self._store.evictions,
+                'expirations': self.expirations,
+                'stale_hits': self.stale_hits,
+                'refreshes': self.refreshes,
+                'refreshes_skipped': self.refreshes_skipped,
+                'entries': len(self._store),
+                'bytes': self._store.currsize,
+                'max_entries': self._store.max_entries,
+                'max_bytes': self._store.maxsize
+            }
+
+_MISSING = object()
@@ -0,0 +1,325 @@
+# Registro de métricas en proceso, expuesto en formato Prometheus
+# Sin ir a CloudWatch: /metrics (o el puerto de MONITORING_CONFIG) se scrapea directo
+
+import bisect
+import inspect
+import logging
+import threading
+import time
+import weakref
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from ..config.settings import LOG_CONFIG
+
+logging.basicConfig(
+    level=LOG_CONFIG["level"],
+    format=LOG_CONFIG["format"]
+)
+logger = logging.getLogger(__name__)
+
+# Starlette le agrega el charset al armar la respuesta
+MEDIA_TYPE = "text/plain; version=0.0.4"
+
+# Segundos; cubre desde un hit de caché hasta una query que llega al statement_timeout
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Sample(NamedTuple):
+    name: str
+    kind: str
+    help: str
+    labels: Dict[str, str]
+    value: float
+
+class _Shards:
+    """Un dict por thread: cada thread escribe solo en el suyo, sin lock.
+
+    El lock se toma una vez cuando un thread nuevo registra su shard y al
+    leer para el scrape. Los shards de threads que ya terminaron se quedan,
+    si no se perderían sus cuentas.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all: List[Dict] = []
+
+    def mine(self) -> Dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._all.append(shard)
+        return shard
+
+    def all(self) -> List[Dict]:
+        with self._lock:
+            return list(self._all)
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._shards = _Shards()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        shard = self._shards.mine()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return sum(shard.get(labels, 0.0) for shard in self._shards.all())
+
+    def collect(self) -> Iterable[Sample]:
+        totals: Dict[Tuple, float] = {}
+        for shard in self._shards.all():
+            for labels, value in list(shard.items()):
+                totals[labels] = totals.get(labels, 0.0) + value
+        for labels, value in sorted(totals.items()):
+            yield Sample(self.name, "counter", self.help, dict(zip(self.labelnames, labels)), value)
+
+class Histogram:
+    """Histograma de latencias con buckets fijos, acumulados recién al exportar"""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._shards = _Shards()
+
+    def observe(self, value: float, *labels: str):
+        shard = self._shards.mine()
+        state = shard.get(labels)
+        if state is None:
+            # [cuenta por bucket..., +Inf, suma]
+            state = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def collect(self) -> Iterable[Sample]:
+        merged: Dict[Tuple, List] = {}
+        for shard in self._shards.all():
+            for labels, state in list(shard.items()):
+                total = merged.setdefault(labels, [0] * len(state[:-1]) + [0.0])
+                for i, value in enumerate(list(state)):
+                    total[i] += value
+        for labels, state in sorted(merged.items()):
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip([*self.buckets, float("inf")], state[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield Sample(f"{self.name}_bucket", "histogram", self.help, {**base, "le": le}, cumulative)
+            yield Sample(f"{self.name}_sum", "histogram", self.help, base, state[-1])
+            yield Sample(f"{self.name}_count", "histogram", self.help, base, cumulative)
+
+class Registry:
+    """Métricas propias más colectores que se leen recién al scrapear (pool, caché)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, help, labelnames, buckets))
+
+    def _get_or_create(self, name: str, factory):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = factory()
+            return self._metrics[name]
+
+    def register_collector(self, collector: Callable[[], Iterable[Sample]]):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def collect(self) -> Iterable[Sample]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for metric in metrics:
+            yield from metric.collect()
+        for collector in collectors:
+            try:
+                yield from collector()
+            except Exception as e:
+                logger.warning(f"Un colector de métricas falló: {e}")
+
+    def render(self) -> bytes:
+        """Formato de texto de Prometheus (0.0.4)"""
+        # Cada familia tiene que salir junta aunque venga de varios colectores
+        families: Dict[str, List[str]] = {}
+        for sample in self.collect():
+            family = sample.name
+            if sample.kind == "histogram":
+                family = sample.name.rsplit("_", 1)[0]
+            if family not in families:
+                families[family] = [f"# HELP {family} {sample.help}", f"# TYPE {family} {sample.kind}"]
+            families[family].append(f"{sample.name}{_labels(sample.labels)} {_number(sample.value)}")
+        lines = [line for family in families.values() for line in family]
+        return ("\n".join(lines) + "\n").encode()
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# Un registro por proceso
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "Requests HTTP por ruta, método y status", ("route", "method", "status")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "Latencia de los requests HTTP hasta el último byte", ("route", "method", "status")
+)
+SERVICE_LATENCY = REGISTRY.histogram(
+    "dataservice_call_duration_seconds", "Latencia de los métodos de DataService", ("service", "method", "outcome")
+)
+
+def timed(func: Callable) -> Callable:
+    """Decorador para métodos de DataService/AsyncDataService: latencia por método y resultado"""
+    name = func.__name__
+
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await func(self, *args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                SERVICE_LATENCY.observe(time.perf_counter() - start, type(self).__name__, name, outcome)
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = func(self, *args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            SERVICE_LATENCY.observe(time.perf_counter() - start, type(self).__name__, name, outcome)
+    return wrapper
+
+def watch_cache(name: str, cache) -> None:
+    """Exporta los contadores de una MemoryCache; se guarda una referencia débil"""
+    ref = weakref.ref(cache)
+    counters = ("hits", "misses", "stale_hits", "evictions", "expirations", "refreshes", "refreshes_skipped")
+    gauges = ("hit_ratio", "entries", "bytes")
+
+    def collect() -> Iterable[Sample]:
+        cache = ref()
+        if cache is None:
+            return
+        stats = cache.stats()
+        for key in counters:
+            yield Sample(f"cache_{key}_total", "counter", f"Caché en memoria: {key}", {"cache": name}, stats[key])
+        for key in gauges:
+            yield Sample(f"cache_{key}", "gauge", f"Caché en memoria: {key}", {"cache": name}, stats[key])
+
+    REGISTRY.register_collector(collect)
+
+def _pool_samples() -> Iterable[Sample]:
+    from ..database.engine import pool_stats
+    for pool, stats in pool_stats().items():
+        for key, value in stats.items():
+            if value is None:
+                continue
+            if key in ("checkouts", "timeouts"):
+                yield Sample(f"db_pool_{key}_total", "counter", f"Pool de conexiones: {key}", {"pool": pool}, value)
+            else:
+                yield Sample(f"db_pool_{key}", "gauge", f"Pool de conexiones: {key}", {"pool": pool}, value)
+
+REGISTRY.register_collector(_pool_samples)
+
+class MetricsMiddleware:
+    """Middleware ASGI: cuenta y mide cada request por ruta (el template, no el path) y status.
+
+    Va lo más adentro posible, así ve el scope que completa el router. Los
+    paths que no matchean ninguna ruta van todos juntos para no explotar la
+    cardinalidad. `on_request(ruta, milisegundos, status)` se llama al final
+    de cada request (p. ej. log_api_request de monitoring).
+    """
+
+    def __init__(self, app, on_request: Optional[Callable[[str, float, int], None]] = None):
+        self.app = app
+        self.on_request = on_request
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", "sin_ruta")
+            labels = (route, scope["method"], str(status))
+            HTTP_REQUESTS.inc(*labels)
+            HTTP_LATENCY.observe(elapsed, *labels)
+            if self.on_request is not None:
+                try:
+                    self.on_request(route, elapsed * 1000, status)
+                except Exception as e:
+                    logger.warning(f"Error registrando el request: {e}")
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = REGISTRY.render()
+        self.send_response(200)
+        self.send_header("Content-Type", f"{MEDIA_TYPE}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port: int) -> Optional[ThreadingHTTPServer]:
+    """Sirve REGISTRY en otro puerto desde un thread aparte.
+
+    Con varios workers solo el primero consigue el puerto; los demás siguen
+    exponiendo /metrics en la app.
+    """
+    try:
+        server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    except OSError as e:
+        logger.warning(f"No pude abrir el puerto de métricas {port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Métricas en el puerto {port}")
+    return server
@@ -1,10 +1,13 @@
 import logging
+import os
+import threading
 import time
+from collections import OrderedDict, deque
 from functools import wraps
-from datetime import datetime
-from typing import Dict, Any, Callable
-import boto3
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, Optional, Tuple
 from src.config.settings import MONITORING_CONFIG
+from src.utils.aws import get_client
 
 # Configuración del logger
 logging.basicConfig(
@@ -13,8 +16,182 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Cliente de CloudWatch
-cloudwatch = boto3.client('cloudwatch')
+# Límite de CloudWatch por llamada a PutMetricData
+MAX_DATUMS_PER_CALL = 1000
+
+def cloudwatch_client():
+    """Cliente de CloudWatch, creado recién cuando se usa por primera vez"""
+    return get_client('cloudwatch')
+
+class MetricPublisher:
+    """Junta los puntos en memoria y los manda a CloudWatch desde un thread aparte.
+
+    Los puntos de una misma métrica, dimensiones y minuto se resumen en un
+    statistic set (cuenta, suma, mínimo, máximo), así que el que mide no
+    espera a AWS. Cada `flush_interval` segundos se mandan de a
+    MAX_DATUMS_PER_CALL por llamada.
+
+    La memoria está acotada: como mucho `max_series` series abiertas y
+    `max_pending` puntos esperando a salir (p. ej. si CloudWatch no
+    responde). Al llenarse se descartan los más viejos primero.
+
+    El thread no arranca solo: lo prende start() y lo frena stop(), que
+    la API llama en su startup y shutdown. Sin start() los puntos quedan
+    en memoria y nunca se habla con AWS.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Any] = cloudwatch_client,
+        flush_interval: Optional[float] = None,
+        max_series: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        self._client_factory = client_factory
+        self.flush_interval = flush_interval or MONITORING_CONFIG["cloudwatch_flush_interval"]
+        self.max_series = max_series or MONITORING_CONFIG["cloudwatch_max_series"]
+        self.max_pending = max_pending or MONITORING_CONFIG["cloudwatch_max_pending"]
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # (namespace, métrica, unidad, dimensiones, minuto) -> [cuenta, suma, mínimo, máximo]
+        self._series: "OrderedDict[Tuple, list]" = OrderedDict()
+        self._pending: deque = deque(maxlen=self.max_pending)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self.sent = 0
+        self.dropped = 0
+        self.failed_calls = 0
+
+    def put(
+        self,
+        namespace: str,
+        metric_name: str,
+        value: float,
+        unit: str,
+        dimensions: Optional[Dict[str, str]] = None,
+        timestamp: Optional[datetime] = None
+    ) -> None:
+        """Suma un punto a su serie; no hace I/O"""
+        at = timestamp.replace(tzinfo=timestamp.tzinfo or timezone.utc).timestamp() if timestamp else self._clock()
+        key = (namespace, metric_name, unit, tuple(sorted((dimensions or {}).items())), int(at // 60) * 60)
+        with self._lock:
+            stats = self._series.get(key)
+            if stats is None:
+                if len(self._series) >= self.max_series:
+                    self._series.popitem(last=False)
+                    self.dropped += 1
+                self._series[key] = [1, value, value, value]
+            else:
+                stats[0] += 1
+                stats[1] += value
+                stats[2] = min(stats[2], value)
+                stats[3] = max(stats[3], value)
+
+    def flush(self) -> int:
+        """Manda lo acumulado; devuelve cuántos datums salieron"""
+        with self._flush_lock:
+            with self._lock:
+                series, self._series = self._series, OrderedDict()
+            for key, stats in series.items():
+                self._enqueue(key[0], _datum(key, stats))
+
+            by_namespace: Dict[str, list] = OrderedDict()
+            while self._pending:
+                namespace, datum = self._pending.popleft()
+                by_namespace.setdefault(namespace, []).append(datum)
+
+            sent = 0
+            for namespace, datums in by_namespace.items():
+                for start in range(0, len(datums), MAX_DATUMS_PER_CALL):
+                    try:
+                        self._client_factory().put_metric_data(
+                            Namespace=namespace,
+                            MetricData=datums[start:start + MAX_DATUMS_PER_CALL]
+                        )
+                    except Exception as e:
+                        # Quedan para el próximo flush, delante de los nuevos
+                        logger.warning(f"No se pudieron enviar métricas a {namespace}: {e}")
+                        self.failed_calls += 1
+                        for datum in datums[start:]:
+                            self._enqueue(namespace, datum)
+                        break
+                    sent += len(datums[start:start + MAX_DATUMS_PER_CALL])
+            self.sent += sent
+            return sent
+
+    def _enqueue(self, namespace: str, datum: Dict):
+        if len(self._pending) == self.max_pending:
+            self.dropped += 1
+        self._pending.append((namespace, datum))
+
+    def start(self):
+        """Arranca el thread que publica; en un proceso hijo de un fork arranca uno propio"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cloudwatch-publisher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error en el envío de métricas: {e}")
+
+    def stop(self, flush: bool = True):
+        """Frena el thread y, por defecto, manda lo que quedó; sin start() previo no hace nada"""
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        self._pid = None
+        if flush:
+            self.flush()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            series = len(self._series)
+        return {
+            "series": series,
+            "pending": len(self._pending),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "failed_calls": self.failed_calls
+        }
+
+def _datum(key: Tuple, stats: list) -> Dict:
+    _, metric_name, unit, dimensions, minute = key
+    count, total, minimum, maximum = stats
+    datum = {
+        'MetricName': metric_name,
+        'Timestamp': datetime.fromtimestamp(minute, tz=timezone.utc),
+        'StatisticValues': {
+            'SampleCount': count,
+            'Sum': total,
+            'Minimum': minimum,
+            'Maximum': maximum
+        },
+        'Unit': unit
+    }
+    if dimensions:
+        datum['Dimensions'] = [{'Name': name, 'Value': value} for name, value in dimensions]
+    return datum
+
+# Un publicador por proceso, compartido por los decoradores y la API
+publisher = MetricPublisher()
+
+def flush_metrics() -> int:
+    """Manda lo acumulado al final de un proceso corto (Lambda, batch) que no arranca el thread"""
+    if not MONITORING_CONFIG["enabled"]:
+        return 0
+    return publisher.flush()
 
 def log_execution_time(func: Callable) -> Callable:
     """Decorador para medir y registrar el tiempo de ejecución de funciones"""
@@ -27,15 +204,13 @@ def log_execution_time(func: Callable) -> Callable:
         # Log local
         logger.info(f"Función {func.__name__} ejecutada en {execution_time:.2f} segundos")
         
-        # Métrica en CloudWatch
-        cloudwatch.put_metric_data(
-            Namespace='PuntoRed/Analytics',
-            MetricData=[{
-                'MetricName': 'FunctionExecutionTime',
-                'Value': execution_time,
-                'Unit': 'Seconds',
-                'Dimensions': [{'Name': 'FunctionName', 'Value': func.__name__}]
-            }]
+        # Métrica en CloudWatch (sale en el próximo flush)
+        publisher.put(
+            'PuntoRed/Analytics',
+            'FunctionExecutionTime',
+            execution_time,
+            'Seconds',
+            {'FunctionName': func.__name__}
         )
         
         return result
@@ -44,54 +219,21 @@ def log_execution_time(func: Callable) -> Callable:
 def monitor_transactions(transactions_count: int, error_count: int = 0) -> None:
     """Registra métricas de transacciones procesadas"""
     timestamp = datetime.utcnow()
+    success_rate = (transactions_count - error_count) / max(transactions_count, 1) * 100
     
-    metrics = [
-        {
-            'MetricName': 'ProcessedTransactions',
-            'Value': transactions_count,
-            'Unit': 'Count',
-            'Timestamp': timestamp
-        },
-        {
-            'MetricName': 'ProcessingErrors',
-            'Value': error_count,
-            'Unit': 'Count',
-            'Timestamp': timestamp
-        },
-        {
-            'MetricName': 'SuccessRate',
-            'Value': (transactions_count - error_count) / max(transactions_count, 1) * 100,
-            'Unit': 'Percent',
-            'Timestamp': timestamp
-        }
-    ]
-    
-    cloudwatch.put_metric_data(
-        Namespace='PuntoRed/Analytics',
-        MetricData=metrics
-    )
+    publisher.put('PuntoRed/Analytics', 'ProcessedTransactions', transactions_count, 'Count', timestamp=timestamp)
+    publisher.put('PuntoRed/Analytics', 'ProcessingErrors', error_count, 'Count', timestamp=timestamp)
+    publisher.put('PuntoRed/Analytics', 'SuccessRate', success_rate, 'Percent', timestamp=timestamp)
 
 def log_api_request(endpoint: str, response_time: float, status_code: int) -> None:
-    """Registra métricas de las solicitudes a la API"""
-    cloudwatch.put_metric_data(
-        Namespace='PuntoRed/API',
-        MetricData=[
-            {
-                'MetricName': 'APILatency',
-                'Value': response_time,
-                'Unit': 'Milliseconds',
-                'Dimensions': [{'Name': 'Endpoint', 'Value': endpoint}]
-            },
-            {
-                'MetricName': 'RequestCount',
-                'Value': 1,
-                'Unit': 'Count',
-                'Dimensions': [
-                    {'Name': 'Endpoint', 'Value': endpoint},
-                    {'Name': 'StatusCode', 'Value': str(status_code)}
-                ]
-            }
-        ]
+    """Registra métricas de las solicitudes a la API (response_time en milisegundos)"""
+    publisher.put('PuntoRed/API', 'APILatency', response_time, 'Milliseconds', {'Endpoint': endpoint})
+    publisher.put(
+        'PuntoRed/API',
+        'RequestCount',
+        1,
+        'Count',
+        {'Endpoint': endpoint, 'StatusCode': str(status_code)}
     )
 
 def create_alarm(
@@ -101,7 +243,7 @@ def create_alarm(
     evaluation_periods: int = 1
 ) -> None:
     """Crea una alarma en CloudWatch"""
-    cloudwatch.put_metric_alarm(
+    cloudwatch_client().put_metric_alarm(
         AlarmName=f'PuntoRed-{metric_name}-Alarm',
         MetricName=metric_name,
         Namespace='PuntoRed/Analytics',
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+class _Call:
+    """Una consulta en vuelo y lo que devolvió"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Junta llamadas idénticas concurrentes en una sola ejecución.
+
+    Mientras una consulta para una clave está en vuelo, los demás que piden la
+    misma clave esperan y reciben el mismo resultado (o la misma excepción).
+    Sirve tanto para código sync (hilos) como async (mismo event loop).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[Any, asyncio.Future] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Ejecuta fn una sola vez por clave entre los hilos concurrentes"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Igual que do(), pero para corutinas del mismo event loop"""
+        task_key = (id(asyncio.get_running_loop()), key)
+        task = self._tasks.get(task_key)
+        if task is not None:
+            with self._lock:
+                self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._tasks[task_key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(task_key, None))
+            with self._lock:
+                self.executed += 1
+        # shield: si un cliente se va, la consulta sigue para los demás
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        """Cuántas consultas se ejecutaron y cuántas se ahorraron"""
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls) + len(self._tasks)
+            }
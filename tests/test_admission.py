@@ -0,0 +1,19 @@
+import asyncio
+import pytest
+from src.utils.admission import AdmissionController, Overloaded
+
+def test_slot_rechaza_sin_lugar():
+    """Test de que sin lugar a tiempo sale Overloaded y el lugar se devuelve al terminar"""
+    admission = AdmissionController(max_inflight=1, timeout=0.01)
+
+    async def escenario():
+        async with admission.slot():
+            with pytest.raises(Overloaded):
+                async with admission.slot():
+                    pass
+        async with admission.slot():
+            pass
+
+    asyncio.run(escenario())
+
+    assert admission.stats() == {"max_inflight": 1, "inflight": 0, "admitted": 2, "rejected": 1}
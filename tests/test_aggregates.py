@@ -0,0 +1,113 @@
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from src.services.aggregates import TopClientsIndex, AverageTicketAccumulator
+from src.services.data_service import versioned_snapshot
+
+@pytest.fixture
+def index():
+    """Índice con tres clientes repartidos en dos días"""
+    index = TopClientsIndex(months=6)
+    index.load_days([
+        (date(2024, 3, 20), 1, "Juan Pérez", Decimal("100.50")),
+        (date(2024, 3, 20), 2, "María Gómez", Decimal("300.00")),
+        (date(2024, 3, 21), 1, "Juan Pérez", Decimal("250.00")),
+        (date(2024, 3, 21), 3, "Carlos López", Decimal("50.25"))
+    ], desde=date(2024, 3, 20))
+    return index
+
+def test_top_clientes(index):
+    """Test del ranking con distintos límites desde el mismo índice"""
+    # Act
+    top2 = index.top(2)
+    top5 = index.top(5)
+    
+    # Assert
+    assert top2 == [
+        {"cliente": "Juan Pérez", "monto_total": 350.5},
+        {"cliente": "María Gómez", "monto_total": 300.0}
+    ]
+    assert len(top5) == 3
+    assert all(type(row["monto_total"]) is float for row in top5)
+
+def test_recargar_dia_abierto_es_idempotente(index):
+    """Test de recargar el día actual sin duplicar montos"""
+    # Act
+    index.load_days([
+        (date(2024, 3, 21), 1, "Juan Pérez", Decimal("260.00"))
+    ], desde=date(2024, 3, 21))
+    
+    # Assert
+    assert index.top(1) == [{"cliente": "Juan Pérez", "monto_total": 360.5}]
+    assert len(index) == 2
+
+def test_ventana_desliza(index):
+    """Test de que los días viejos salen de la ventana"""
+    # Act
+    index.expire(today=date(2024, 9, 21))
+    
+    # Assert
+    assert index.top(5) == [
+        {"cliente": "Juan Pérez", "monto_total": 250.0},
+        {"cliente": "Carlos López", "monto_total": 50.25}
+    ]
+
+def test_limite_fuera_de_rango(index):
+    """Test de validación del límite"""
+    with pytest.raises(ValueError):
+        index.top(101)
+
+def test_ticket_promedio_ventana_anual():
+    """Test del acumulador: promedio en memoria y expiración del día más viejo"""
+    # Arrange
+    acumulador = AverageTicketAccumulator(years=1)
+    acumulador.load_days([
+        (date(2023, 3, 20), Decimal("1000.00"), 1),
+        (date(2024, 3, 20), Decimal("300.00"), 2),
+        (date(2024, 3, 21), Decimal("100.00"), 2)
+    ], desde=date(2023, 3, 20))
+    
+    # Act
+    antes = acumulador.summary()
+    acumulador.expire(today=date(2024, 3, 21))
+    acumulador.add(date(2024, 3, 21), Decimal("100.00"))
+    despues = acumulador.summary()
+    
+    # Assert
+    assert antes == {"ticket_promedio": 280.0, "total_transacciones": 5}
+    assert despues == {"ticket_promedio": 100.0, "total_transacciones": 5}
+
+def test_fingerprint_solo_cambia_con_el_ranking(index):
+    """Test de la huella que usan los ETag: recargar lo mismo no la cambia"""
+    # Arrange
+    antes = index.fingerprint()
+
+    # Act
+    index.load_days([
+        (date(2024, 3, 21), 1, "Juan Pérez", Decimal("250.00")),
+        (date(2024, 3, 21), 3, "Carlos López", Decimal("50.25"))
+    ], desde=date(2024, 3, 21))
+    igual = index.fingerprint()
+    index.load_days([
+        (date(2024, 3, 21), 3, "Carlos López", Decimal("999.00"))
+    ], desde=date(2024, 3, 21))
+
+    # Assert
+    assert igual == antes
+    assert index.fingerprint() != antes
+
+def test_snapshot_publicado_no_cambia_con_un_refresco(index):
+    """Test de que la versión publicada queda apareada con su ranking aunque el índice cambie"""
+    # Arrange
+    version, ranking = versioned_snapshot(None, index)
+
+    # Act: un refresco a medias cambia el índice, pero no lo publicado
+    index.load_days([
+        (date(2024, 3, 21), 3, "Carlos López", Decimal("999.00"))
+    ], desde=date(2024, 3, 21))
+    nueva_version, nuevo_ranking = versioned_snapshot((version, ranking), index)
+
+    # Assert
+    assert version["version"] != nueva_version["version"]
+    assert ranking[0]["cliente"] != "Carlos López"
+    assert nuevo_ranking[0]["cliente"] == "Carlos López"
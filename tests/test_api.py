@@ -1,16 +1,19 @@
 import pytest
+from datetime import datetime, timezone
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, AsyncMock, patch
 from src.api.main import app
-from src.config.settings import API_CONFIG
+from src.config.settings import SECURITY_CONFIG
+from src.utils.admission import Overloaded
+from src.utils.monitoring import publisher
 
 client = TestClient(app)
 
 @pytest.fixture
 def mock_data_service():
     """Fixture para mockear el servicio de datos"""
-    with patch('src.api.main.DataService') as mock:
-        yield mock.return_value
+    with patch('src.api.main.data_service', new=AsyncMock()) as mock:
+        yield mock
 
 def test_health_check():
     """Test del endpoint de health check"""
@@ -18,6 +21,13 @@ def test_health_check():
     assert response.status_code == 200
     assert response.json()["status"] == "success"
 
+def test_sin_monitoreo_no_se_publica():
+    """Test de que con la configuración por defecto los requests no llegan a CloudWatch"""
+    client.get("/health")
+
+    assert publisher.stats()["series"] == 0
+    assert publisher._thread is None
+
 def test_get_transacciones_success(mock_data_service):
     """Test exitoso del endpoint de transacciones"""
     # Arrange
@@ -34,7 +44,7 @@ def test_get_transacciones_success(mock_data_service):
     response = client.get(
         "/transacciones",
         params={"producto": "producto1", "fecha": "2024-03-21"},
-        headers={"X-API-Key": API_CONFIG["api_key"]}
+        headers={"X-API-Key": SECURITY_CONFIG["api_key"]}
     )
     
     # Assert
@@ -53,13 +63,14 @@ def test_get_top_clientes(mock_data_service):
         {"cliente": "Juan Pérez", "monto_total": 1000.0},
         {"cliente": "María López", "monto_total": 800.0}
     ]
-    mock_data_service.get_top_clients.return_value = expected_data
+    version = {"version": "v1", "actualizado": datetime(2024, 3, 21, 10, 0, tzinfo=timezone.utc)}
+    mock_data_service.get_top_clients_versioned.return_value = (version, expected_data)
     
     # Act
     response = client.get(
         "/top-clientes",
         params={"limit": 2},
-        headers={"X-API-Key": API_CONFIG["api_key"]}
+        headers={"X-API-Key": SECURITY_CONFIG["api_key"]}
     )
     
     # Assert
@@ -71,10 +82,23 @@ def test_validacion_parametros():
     response = client.get(
         "/top-clientes",
         params={"limit": -1},
-        headers={"X-API-Key": API_CONFIG["api_key"]}
+        headers={"X-API-Key": SECURITY_CONFIG["api_key"]}
     )
     assert response.status_code == 400
 
+def test_fecha_invalida_400(mock_data_service):
+    """Test de que una fecha mal formada es un 400 y no llega al servicio"""
+    # Act
+    response = client.get(
+        "/transacciones",
+        params={"producto": "producto1", "fecha": "21/03/2024"},
+        headers={"X-API-Key": SECURITY_CONFIG["api_key"]}
+    )
+    
+    # Assert
+    assert response.status_code == 400
+    mock_data_service.get_daily_transactions.assert_not_called()
+
 def test_manejo_errores(mock_data_service):
     """Test de manejo de errores"""
     # Arrange
@@ -84,9 +108,36 @@ def test_manejo_errores(mock_data_service):
     response = client.get(
         "/transacciones",
         params={"producto": "producto1"},
-        headers={"X-API-Key": API_CONFIG["api_key"]}
+        headers={"X-API-Key": SECURITY_CONFIG["api_key"]}
     )
     
     # Assert
     assert response.status_code == 500
-    assert "Error de prueba" in response.json()["detail"] 
\ No newline at end of file
+    assert "Error de prueba" in response.json()["detail"]
+
+def test_readiness_sin_base(mock_data_service):
+    """Test del readiness cuando la base no responde"""
+    # Arrange
+    mock_data_service.ping.side_effect = Exception("DB caída")
+    
+    # Act
+    response = client.get("/health/ready")
+    
+    # Assert
+    assert response.status_code == 503
+
+def test_saturado_503(mock_data_service):
+    """Test de que sin lugar para la query se contesta 503 con Retry-After"""
+    # Arrange
+    mock_data_service.get_daily_transactions.side_effect = Overloaded("Servicio saturado")
+    
+    # Act
+    response = client.get(
+        "/transacciones",
+        params={"producto": "producto1"},
+        headers={"X-API-Key": SECURITY_CONFIG["api_key"]}
+    )
+    
+    # Assert
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
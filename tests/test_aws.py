@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+import threading
+import pytest
+from src.utils import aws
+
+@pytest.fixture(autouse=True)
+def clientes_limpios():
+    aws.reset_clients()
+    yield
+    aws.reset_clients()
+
+def test_un_cliente_por_servicio_y_opciones():
+    """Test de que se reutiliza el cliente y los kwargs son parte de la clave"""
+    # Act
+    first = aws.get_client("cloudwatch", region_name="us-east-1")
+    second = aws.get_client("cloudwatch", region_name="us-east-1")
+    other = aws.get_client("cloudwatch", region_name="sa-east-1")
+
+    # Assert
+    assert first is second
+    assert other is not first
+    assert other.meta.region_name == "sa-east-1"
+
+def test_threads_comparten_el_cliente():
+    """Test de que con varios threads pidiendo a la vez se crea uno solo"""
+    clients = []
+    barrier = threading.Barrier(8)
+
+    def pedir():
+        barrier.wait()
+        clients.append(aws.get_client("s3", region_name="us-east-1"))
+
+    threads = [threading.Thread(target=pedir) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({id(c) for c in clients}) == 1
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="Solo en plataformas con fork")
+def test_el_hijo_de_un_fork_arranca_sin_clientes():
+    """Test de que un worker forkeado no reutiliza los clientes del padre"""
+    aws.get_client("sns", region_name="us-east-1")
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.write(write, str(len(aws._clients)).encode())
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert os.read(read, 16) == b"0"
+    assert len(aws._clients) == 1
+
+def test_importar_no_crea_clientes():
+    """Test de que los módulos se importan sin boto3, redis ni credenciales"""
+    env = {k: v for k, v in os.environ.items() if not k.startswith("AWS_")}
+    code = (
+        "import sys, src.api.app, src.utils.monitoring, src.utils.cache; "
+        "print([m for m in ('boto3', 'redis') if m in sys.modules])"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+
+    assert result.stdout.strip() == "[]"
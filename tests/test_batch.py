@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from src.database.models import Base
+from src.database.rollup import refresh_daily_rollup
+from src.services.data_service import batch_transactions_query, group_transactions
+
+@pytest.fixture
+def engine():
+    """Base SQLite con ventas de dos productos en dos días"""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO clientes (id, nombre, apellido) VALUES (1, 'Juan', 'Pérez'), (2, 'María', 'Gómez')"))
+        conn.execute(text("""
+            INSERT INTO ventas (id, cliente_id, producto, fecha, monto) VALUES
+            (1, 1, 'Producto A', '2024-03-21', 100.50),
+            (2, 1, 'Producto A', '2024-03-21', 50.00),
+            (3, 2, 'Producto A', '2024-03-21', 150.25),
+            (4, 2, 'Producto B', '2024-03-22', 300.00),
+            (5, 1, 'Producto A', '2024-03-22', 10.00)
+        """))
+    return engine
+
+@pytest.mark.parametrize("use_rollup", [False, True])
+def test_batch_agrupa_por_producto_y_fecha(engine, use_rollup):
+    """Test de una sola query para varios pares, desde ventas y desde el rollup"""
+    # Arrange
+    if use_rollup:
+        refresh_daily_rollup(engine)
+    pairs = [("Producto A", "2024-03-21"), ("Producto B", "2024-03-22"), ("Producto B", "2024-03-21")]
+
+    # Act
+    query, params = batch_transactions_query(pairs, use_rollup)
+    with engine.connect() as conn:
+        grouped = group_transactions(pd.read_sql(text(query), conn, params=params))
+
+    # Assert
+    assert set(grouped) == {("Producto A", "2024-03-21"), ("Producto B", "2024-03-22")}
+    a = sorted(grouped[("Producto A", "2024-03-21")], key=lambda r: r["cliente"])
+    assert [(r["cliente"], r["cantidad_transacciones"], float(r["monto_total"])) for r in a] == [
+        ("Juan Pérez", 2, 150.50),
+        ("María Gómez", 1, 150.25)
+    ]
+    assert set(a[0]) == {"cliente", "cantidad_transacciones", "monto_total"}
+
+def test_batch_fecha_invalida():
+    """Test de que una fecha mal escrita no llega a la base"""
+    with pytest.raises(ValueError):
+        batch_transactions_query([("Producto A", "21/03/2024")])
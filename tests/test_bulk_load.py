@@ -0,0 +1,72 @@
+import pytest
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from src.database.models import Base
+from src.database.bulk_load import bulk_load, iter_chunks
+
+@pytest.fixture
+def engine():
+    """Base SQLite en memoria con las tablas del modelo"""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    return engine
+
+def _count(engine, table):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+def test_bloques_de_tuplas():
+    """Test de que un iterador de tuplas se parte en bloques del tamaño pedido"""
+    # Act
+    chunks = list(iter_chunks(((i, 'N', 'A') for i in range(25)), ['id', 'nombre', 'apellido'], 10))
+
+    # Assert
+    assert [len(c) for c in chunks] == [10, 10, 5]
+    assert list(chunks[-1]['id']) == [20, 21, 22, 23, 24]
+
+def test_carga_desde_csv(engine, tmp_path):
+    """Test de la carga de un CSV con estadísticas de filas por segundo"""
+    # Arrange
+    path = tmp_path / 'clientes.csv'
+    pd.DataFrame({
+        'id': range(1, 101),
+        'nombre': ['Juan'] * 100,
+        'apellido': ['Pérez'] * 100
+    }).to_csv(path, index=False)
+
+    # Act
+    stats = bulk_load(engine, 'clientes', str(path), chunk_size=30)
+
+    # Assert
+    assert stats['rows'] == 100
+    assert stats['rows_per_second'] > 0
+    assert _count(engine, 'clientes') == 100
+
+def test_carga_desde_parquet(engine, tmp_path):
+    """Test de la carga de un Parquet leído por row groups"""
+    pytest.importorskip('pyarrow')
+    # Arrange
+    path = tmp_path / 'clientes.parquet'
+    pd.DataFrame({'id': [1, 2], 'nombre': ['Ana', 'Luis'], 'apellido': ['Díaz', 'Rojas']}).to_parquet(path)
+
+    # Act
+    bulk_load(engine, 'clientes', str(path))
+
+    # Assert
+    assert _count(engine, 'clientes') == 2
+
+def test_upsert_idempotente(engine):
+    """Test de que repetir la carga en modo upsert actualiza y no duplica"""
+    # Arrange
+    bulk_load(engine, 'clientes', [(1, 'Juan', 'Pérez')])
+    ventas = [(1, 1, 'Producto A', '2024-03-21', 100.50), (2, 1, 'Producto B', '2024-03-21', 200.75)]
+
+    # Act
+    bulk_load(engine, 'ventas', ventas, upsert=True)
+    bulk_load(engine, 'ventas', ventas[:1] + [(2, 1, 'Producto B', '2024-03-21', 99.99)], upsert=True)
+
+    # Assert
+    with engine.connect() as conn:
+        filas = conn.execute(text("SELECT id, monto FROM ventas ORDER BY id")).fetchall()
+    assert [(f[0], float(f[1])) for f in filas] == [(1, 100.5), (2, 99.99)]
@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+from src.api.columnar import ARROW_STREAM, PARQUET, negotiate, single_batch
+
+def test_negotiate_respeta_q_y_comodines():
+    """Test de qué formato sale de cada header Accept"""
+    assert negotiate(None) is None
+    assert negotiate("application/json") is None
+    assert negotiate("*/*") is None
+    assert negotiate(ARROW_STREAM) == ARROW_STREAM
+    assert negotiate("application/x-parquet") == PARQUET
+    assert negotiate(f"application/json;q=0.5, {PARQUET}") == PARQUET
+    assert negotiate(f"{ARROW_STREAM};q=0, application/json") is None
+    assert negotiate(f"application/json, {ARROW_STREAM}") is None
+
+def test_arrow_stream_desde_filas():
+    """Test de que los lotes del cursor se leen de vuelta como una tabla Arrow"""
+    pa = pytest.importorskip("pyarrow")
+    from decimal import Decimal
+    from src.api.columnar import columnar_response
+
+    async def lotes():
+        keys = ["cliente", "cantidad_transacciones", "monto_total"]
+        yield keys, [("Juan Pérez", 2, Decimal("500.25"))]
+        yield keys, [("María López", 1, Decimal("100.00"))]
+
+    async def leer():
+        response = await columnar_response(ARROW_STREAM, lotes())
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    table = pa.ipc.open_stream(asyncio.run(leer())).read_all()
+
+    assert table.num_rows == 2
+    assert table.column("monto_total").type == pa.float64()
+    assert table.column("cliente").to_pylist() == ["Juan Pérez", "María López"]
+
+def test_single_batch_arma_filas_en_orden_de_claves():
+    """Test del adaptador para resultados que ya están en memoria"""
+    async def primero():
+        return await single_batch([{"cliente": "Juan", "monto_total": 10.0}]).__anext__()
+
+    keys, rows = asyncio.run(primero())
+
+    assert keys == ["cliente", "monto_total"]
+    assert rows == [("Juan", 10.0)]
@@ -0,0 +1,105 @@
+import asyncio
+import gzip
+import pytest
+from src.api.compression import CompressionMiddleware, choose_encoding
+
+PAYLOAD = b'{"cliente":"Juan P\xc3\xa9rez","monto_total":350.5},' * 200
+
+def _app(chunks, content_type="application/json", status=200, etag=None):
+    """App ASGI mínima que manda `chunks` tal cual y guarda el scope que le llegó"""
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["headers"] = dict(scope["headers"])
+        headers = [(b"content-type", content_type.encode())]
+        if etag:
+            headers.append((b"etag", etag.encode()))
+        if len(chunks) == 1:
+            headers.append((b"content-length", str(len(chunks[0])).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+
+    return app, seen
+
+def _call(app, accept_encoding="gzip", **headers):
+    messages = []
+    raw = [(b"accept-encoding", accept_encoding.encode())]
+    raw += [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": raw}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return dict((k.decode(), v.decode()) for k, v in start["headers"]), body, len(messages) - 1
+
+def test_choose_encoding():
+    """Test de la negociación de Accept-Encoding"""
+    assert choose_encoding(None) is None
+    assert choose_encoding("gzip, deflate, br") == "gzip"
+    assert choose_encoding("gzip, zstd") == "zstd"
+    assert choose_encoding("gzip, zstd", zstd_available=False) == "gzip"
+    assert choose_encoding("zstd;q=0.5, gzip") == "gzip"
+    assert choose_encoding("*") == "zstd"
+    assert choose_encoding("identity, gzip;q=0") is None
+
+def test_comprime_respuesta_grande_y_deja_pasar_la_chica():
+    """Test del mínimo de tamaño con gzip"""
+    app, _ = _app([PAYLOAD])
+    headers, body, _ = _call(CompressionMiddleware(app, minimum_size=1024, gzip_level=6))
+    assert headers["content-encoding"] == "gzip"
+    assert headers["content-length"] == str(len(body))
+    assert "Accept-Encoding" in headers["vary"]
+    assert gzip.decompress(body) == PAYLOAD
+
+    app, _ = _app([b'{"status":"healthy"}'])
+    headers, body, _ = _call(CompressionMiddleware(app, minimum_size=1024))
+    assert "content-encoding" not in headers
+    assert body == b'{"status":"healthy"}'
+
+def test_streaming_sale_comprimido_de_a_lotes():
+    """Test de que cada lote del streaming se manda con flush y no al final"""
+    chunks = [b'{"data":[', PAYLOAD, PAYLOAD, b"]}"]
+    app, _ = _app(chunks)
+    headers, body, mensajes = _call(CompressionMiddleware(app, minimum_size=1024))
+
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    # El primer lote chico se junta con el segundo, el resto sale tal cual llega
+    assert mensajes == 3
+    assert gzip.decompress(body) == b"".join(chunks)
+
+def test_no_recomprime_parquet():
+    """Test de que lo que ya viene comprimido sale como está"""
+    app, _ = _app([PAYLOAD], content_type="application/vnd.apache.parquet")
+    headers, body, _ = _call(CompressionMiddleware(app, minimum_size=10))
+    assert "content-encoding" not in headers
+    assert body == PAYLOAD
+
+def test_etag_de_la_variante_comprimida():
+    """Test de que el ETag lleva el encoding y el If-None-Match llega sin él a la app"""
+    app, seen = _app([PAYLOAD], etag='"abc"')
+    headers, _, _ = _call(CompressionMiddleware(app, minimum_size=10), if_none_match='"abc-gzip"')
+
+    assert headers["etag"] == '"abc-gzip"'
+    assert seen["headers"][b"if-none-match"] == b'"abc"'
+
+    app, _ = _app([b""], status=304, etag='"abc"')
+    headers, _, _ = _call(CompressionMiddleware(app, minimum_size=10), if_none_match='"abc-gzip"')
+    assert headers["etag"] == '"abc-gzip"'
+
+def test_zstd():
+    """Test de zstd cuando el paquete está instalado"""
+    zstandard = pytest.importorskip("zstandard")
+    chunks = [PAYLOAD, PAYLOAD]
+    app, _ = _app(chunks)
+    headers, body, _ = _call(CompressionMiddleware(app, minimum_size=10, zstd_level=3), accept_encoding="zstd")
+
+    assert headers["content-encoding"] == "zstd"
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(body) == b"".join(chunks)
@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from starlette.requests import Request
+from src.api.conditional import etag_matches, not_modified, strong_etag
+
+ACTUALIZADO = datetime(2024, 3, 21, 12, 0, tzinfo=timezone.utc)
+
+def _request(**headers) -> Request:
+    raw = [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+def test_etag_depende_de_version_y_variante():
+    """Test de que cambia el ETag si cambia la versión, el limit o el formato"""
+    base = strong_etag("top-clientes", "abc", 5, "json")
+
+    assert base == strong_etag("top-clientes", "abc", 5, "json")
+    assert base.startswith('"') and base.endswith('"')
+    assert base != strong_etag("top-clientes", "abd", 5, "json")
+    assert base != strong_etag("top-clientes", "abc", 10, "json")
+    assert base != strong_etag("top-clientes", "abc", 5, "application/vnd.apache.parquet")
+
+def test_if_none_match():
+    """Test de la comparación débil de If-None-Match"""
+    etag = strong_etag("x")
+
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"otro", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"otro"', etag)
+    assert not etag_matches(None, etag)
+
+def test_not_modified_con_etag_y_fecha():
+    """Test del 304 con sus headers y de que If-None-Match manda sobre If-Modified-Since"""
+    etag = strong_etag("x")
+    fecha = format_datetime(ACTUALIZADO, usegmt=True)
+
+    response = not_modified(_request(if_none_match=etag), etag, ACTUALIZADO)
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.headers["last-modified"] == fecha
+    assert "max-age=" in response.headers["cache-control"]
+
+    assert not_modified(_request(if_modified_since=fecha), etag, ACTUALIZADO) is not None
+    assert not_modified(_request(if_none_match='"otro"', if_modified_since=fecha), etag, ACTUALIZADO) is None
+    assert not_modified(_request(), etag, ACTUALIZADO) is None
@@ -1,7 +1,12 @@
 import pytest
-from datetime import datetime, timedelta
-from unittest.mock import Mock, patch
-from src.services.data_service import DataService
+from datetime import date, datetime, timedelta
+import pandas as pd
+from unittest.mock import Mock, AsyncMock, patch
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from src.database.models import Base
+from src.services.data_service import DataService, daily_transactions_query
+from src.services.async_data_service import AsyncDataService
 
 @pytest.fixture
 def mock_db():
@@ -11,7 +16,7 @@ def mock_db():
 @pytest.fixture
 def data_service(mock_db):
     """Fixture para el servicio de datos con DB mockeada"""
-    with patch('src.services.data_service.create_engine') as mock_engine:
+    with patch('src.services.data_service.get_engine') as mock_engine:
         mock_engine.return_value = mock_db
         service = DataService()
         service.engine = mock_db
@@ -87,4 +92,90 @@ def test_retry_mechanism(data_service, mock_db):
     
     # Assert
     assert result is not None
-    assert mock_db.execute.call_count == 3 
\ No newline at end of file
+    assert mock_db.execute.call_count == 3
+
+@pytest.mark.asyncio
+async def test_async_service_misma_forma():
+    """El servicio async devuelve lo mismo que el sync"""
+    # Arrange
+    with patch('src.services.async_data_service.get_async_engine'):
+        service = AsyncDataService()
+    service._rollup_coverage = AsyncMock(return_value=None)
+    service._update_control = AsyncMock()
+    service._execute_query = AsyncMock(return_value=pd.DataFrame([
+        {"fecha": datetime.now().date(), "cliente_id": 1, "cliente": "Juan Pérez", "monto_total": 1000.0},
+        {"fecha": datetime.now().date(), "cliente_id": 2, "cliente": "María López", "monto_total": 800.0},
+        {"fecha": datetime.now().date(), "cliente_id": 3, "cliente": "Ana Martínez", "monto_total": 100.0}
+    ]))
+    
+    # Act
+    result = await service.get_top_clients(limit=2)
+    
+    # Assert
+    assert result == [
+        {"cliente": "Juan Pérez", "monto_total": 1000.0},
+        {"cliente": "María López", "monto_total": 800.0}
+    ]
+    service._update_control.assert_awaited_once_with("top_clients", "success", "3")
+
+def test_control_registry_escribe_en_lote():
+    """Test del registro de control: lee en memoria y escribe todo junto"""
+    # Arrange
+    from sqlalchemy import create_engine, MetaData, text
+    from sqlalchemy.pool import StaticPool
+    from src.services.data_service import control_table
+    from src.services.control_registry import ControlRegistry
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    metadata = MetaData()
+    control_table(metadata)
+    metadata.create_all(engine)
+    registry = ControlRegistry(flush_interval=60)
+    
+    # Act
+    registry.update("top_clients_5", "success", "5")
+    registry.update("average_ticket", "success", "9")
+    registry.update("top_clients_5", "success", "4")
+    en_memoria = registry.get("top_clients_5")
+    escritos = registry.flush(engine)
+    
+    # Assert
+    assert en_memoria == ("success", "4")
+    assert escritos == 2
+    with engine.connect() as conn:
+        filas = conn.execute(text("SELECT job_name, records_processed FROM etl_control ORDER BY job_name")).fetchall()
+    assert [tuple(f) for f in filas] == [("average_ticket", "9"), ("top_clients_5", "4")]
+    
+    # Un registro nuevo arranca con lo del día
+    nuevo = ControlRegistry(flush_interval=60)
+    nuevo.load(engine)
+    assert nuevo.get("average_ticket") == ("success", "9")
+
+def test_control_en_success_no_reemplaza_los_datos():
+    """Test de que con el job en success y la caché vencida se vuelve a consultar"""
+    # Arrange
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO clientes (id, nombre, apellido) VALUES (1, 'Juan', 'Pérez')"))
+        conn.execute(text("INSERT INTO ventas (id, cliente_id, producto, fecha, monto) VALUES (1, 1, 'Producto A', '2024-03-21', 10.50)"))
+    with patch('src.services.data_service.get_engine', return_value=engine):
+        service = DataService()
+    service._rollup_coverage = lambda: None
+    primera = service.get_daily_transactions("Producto A", "2024-03-21")
+    service.cache.clear()
+
+    # Act
+    segunda = service.get_daily_transactions("Producto A", "2024-03-21")
+    service.control.stop(engine)
+
+    # Assert
+    assert segunda == primera
+    assert segunda["transacciones"] == [{"cliente": "Juan Pérez", "cantidad_transacciones": 1, "monto_total": 10.5}]
+
+def test_fecha_se_bindea_como_date():
+    """Test de que la fecha va como date a la query (asyncpg no castea texto a date)"""
+    _, params = daily_transactions_query("Producto A", "2024-03-21")
+    _, rollup_params = daily_transactions_query("Producto A", "2024-03-21", use_rollup=True)
+
+    assert params["date"] == date(2024, 3, 21)
+    assert rollup_params["date"] == date(2024, 3, 21)
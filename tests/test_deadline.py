@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from src.services.data_service import query_retrying, raise_if_deadline_passed
+from src.utils.deadline import (
+    DeadlineExceeded, DeadlineMiddleware, check_deadline, deadline, remaining, statement_timeout_ms
+)
+
+def test_statement_timeout_sale_del_deadline():
+    """Test de que el statement_timeout usa lo que queda del request"""
+    assert remaining() is None
+    assert statement_timeout_ms(300) == 300000
+
+    with deadline(2):
+        assert 1900 < statement_timeout_ms(300) <= 1950
+        # Uno anidado más largo no estira el de afuera
+        with deadline(60):
+            assert remaining() <= 2
+    assert remaining() is None
+
+def _query(fallas: int, intentos: list):
+    """Una query de mentira que falla las primeras `fallas` veces"""
+    for attempt in query_retrying():
+        with attempt:
+            check_deadline()
+            intentos.append(1)
+            if len(intentos) <= fallas:
+                raise ConnectionError("la base se fue")
+            return "ok"
+
+def test_reintenta_con_backoff_y_corta_en_el_deadline():
+    """Test de los reintentos: se recupera de una falla y no sigue con el tiempo vencido"""
+    intentos = []
+    assert _query(1, intentos) == "ok"
+    assert len(intentos) == 2
+
+    intentos = []
+    with deadline(-1):
+        with pytest.raises(DeadlineExceeded):
+            _query(0, intentos)
+    assert intentos == []
+
+    with deadline(-1):
+        with pytest.raises(DeadlineExceeded):
+            raise_if_deadline_passed(ConnectionError("canceling statement due to statement timeout"))
+
+def test_backoff_no_duerme_mas_que_el_deadline():
+    """Test de que la espera entre intentos nunca pasa lo que le queda al request"""
+    wait = query_retrying().wait
+    estado = type("Estado", (), {"attempt_number": 10})()
+
+    assert wait(estado) <= 2
+    with deadline(0.05):
+        assert wait(estado) <= 0.05
+    with deadline(-1):
+        assert wait(estado) == 0
+
+def test_middleware_respeta_x_request_timeout():
+    """Test de que el cliente puede pedir un deadline más corto, no uno más largo"""
+    vistos = []
+
+    async def app(scope, receive, send):
+        vistos.append(remaining())
+
+    middleware = DeadlineMiddleware(app, timeout=10)
+    for headers in ([], [(b"x-request-timeout", b"2")], [(b"x-request-timeout", b"999")]):
+        asyncio.run(middleware({"type": "http", "headers": headers}, None, None))
+
+    assert 9 < vistos[0] <= 10
+    assert 1 < vistos[1] <= 2
+    assert 9 < vistos[2] <= 10
@@ -0,0 +1,40 @@
+import sqlite3
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from src.database.engine import InstrumentedQueuePool, dispose_engines, get_engine, get_session
+
+@pytest.fixture(autouse=True)
+def limpiar_registro():
+    yield
+    dispose_engines()
+
+def test_un_engine_por_url(tmp_path):
+    """Test de que el registro devuelve siempre el mismo engine y pool"""
+    # Arrange
+    url = f"sqlite:///{tmp_path / 'a.db'}"
+
+    # Act & Assert
+    assert get_engine(url) is get_engine(url)
+    assert get_engine(url) is not get_engine(f"sqlite:///{tmp_path / 'b.db'}")
+    assert get_session(url).get_bind() is get_engine(url)
+
+def test_pool_mide_esperas_y_timeouts():
+    """Test de las métricas de checkout del pool instrumentado"""
+    # Arrange
+    pool = InstrumentedQueuePool(lambda: sqlite3.connect(":memory:"), pool_size=1, max_overflow=0, timeout=0.05)
+
+    # Act
+    conn = pool.connect()
+    ocupado = pool.stats()
+    with pytest.raises(PoolTimeoutError):
+        pool.connect()
+    conn.close()
+
+    # Assert
+    assert ocupado['checked_out'] == 1
+    assert ocupado['utilization'] == 1.0
+    stats = pool.stats()
+    assert stats['checkouts'] == 2
+    assert stats['timeouts'] == 1
+    assert stats['wait_max_ms'] >= 50
+    assert stats['checked_out'] == 0
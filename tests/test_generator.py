@@ -0,0 +1,53 @@
+import pytest
+from datetime import date
+from sqlalchemy import create_engine, text
+from src.config.settings import PRODUCTS_CONFIG
+from src.database.generator import VentasGenerator, load_synthetic_data
+
+@pytest.fixture
+def generator():
+    return VentasGenerator(clientes=1000, days=30, end=date(2024, 3, 31), seed=7)
+
+def test_ventas_en_orden_y_en_bloques(generator):
+    """Test de que los bloques respetan el tamaño, los ids y el orden de fecha"""
+    # Act
+    chunks = list(generator.ventas_chunks(25_000, chunk_size=10_000))
+
+    # Assert
+    assert [len(c) for c in chunks] == [10_000, 10_000, 5_000]
+    ids = [i for c in chunks for i in c['id']]
+    assert ids == list(range(1, 25_001))
+    fechas = [f for c in chunks for f in c['fecha']]
+    assert fechas == sorted(fechas)
+    assert fechas[0] >= date(2024, 3, 2) and fechas[-1] <= date(2024, 3, 31)
+
+def test_distribuciones_sesgadas(generator):
+    """Test de que pocos clientes concentran las ventas y los montos tienen cola"""
+    # Act
+    df = next(generator.ventas_chunks(50_000, chunk_size=50_000))
+
+    # Assert
+    por_cliente = df['cliente_id'].value_counts()
+    # Con Zipf el 1% de los clientes hace bastante más que el 1% de las ventas
+    assert por_cliente.head(10).sum() / len(df) > 0.2
+    assert df['monto'].min() >= 1
+    assert df['monto'].max() > 20 * df['monto'].median()
+    assert set(df['producto']) == set(PRODUCTS_CONFIG['enabled'])
+    assert df['momento'].dt.hour.value_counts()[12] > df['momento'].dt.hour.value_counts()[3]
+
+def test_carga_en_sqlite(tmp_path, generator):
+    """Test de la carga completa en un archivo SQLite, con rollup incluido"""
+    # Arrange
+    url = f"sqlite:///{tmp_path / 'bench.db'}"
+
+    # Act
+    stats = load_synthetic_data(url, 5_000, generator, chunk_size=2_000)
+    load_synthetic_data(url, 1_000, generator, chunk_size=2_000, refresh_rollup=False)
+
+    # Assert
+    assert stats['ventas'] == 5_000
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*), MAX(id) FROM ventas")).fetchone() == (6_000, 6_000)
+        assert conn.execute(text("SELECT COUNT(*) FROM clientes")).scalar() == 1000
+        assert conn.execute(text("SELECT SUM(cantidad_transacciones) FROM ventas_daily_rollup")).scalar() == 5_000
@@ -0,0 +1,131 @@
+import threading
+import pytest
+from src.utils.memory_cache import ROW_BYTES, VALUE_BYTES, MemoryCache, estimate_size
+
+class FakeTimer:
+    """Reloj manual para no tener que dormir en los tests"""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def timer():
+    return FakeTimer()
+
+@pytest.fixture
+def cache(timer):
+    """Caché chica con TTL distinto por prefijo"""
+    return MemoryCache(
+        max_entries=3,
+        max_bytes=10_000,
+        ttls={"top_clients_": 10},
+        default_ttl=100,
+        timer=timer
+    )
+
+def test_hit_y_miss(cache):
+    """Test de los contadores de aciertos y fallos"""
+    # Act
+    cache.set("average_ticket", {"ticket_promedio": 10.0})
+    hit = cache.get("average_ticket")
+    miss = cache.get("no_existe")
+    
+    # Assert
+    assert hit == {"ticket_promedio": 10.0}
+    assert miss is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_ttl_por_prefijo(cache, timer):
+    """Test de expiración según el prefijo de la clave"""
+    # Arrange
+    cache.set("top_clients_5", [1, 2])
+    cache.set("average_ticket", {"ticket_promedio": 10.0})
+    
+    # Act
+    timer.now = 11
+    
+    # Assert
+    assert cache.get("top_clients_5") is None
+    assert cache.get("average_ticket") is not None
+    assert cache.stats()["expirations"] == 1
+
+def test_desalojo_lru_por_entradas(cache):
+    """Test de desalojo del menos usado al pasarse de entradas"""
+    # Arrange
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    cache.get("a")
+    
+    # Act
+    cache.set("d", 4)
+    
+    # Assert
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+def test_limite_de_bytes(timer):
+    """Test de desalojo por tamaño y rechazo de valores enormes"""
+    # Arrange
+    cache = MemoryCache(max_entries=100, max_bytes=2_000, ttls={}, default_ttl=100, timer=timer)
+    
+    # Act
+    cache.set("a", "x" * 900)
+    cache.set("b", "x" * 900)
+    cache.set("c", "x" * 900)
+    guardado = cache.set("enorme", "x" * 5_000)
+    
+    # Assert
+    assert guardado is False
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] <= 2_000
+
+def test_stale_while_revalidate(timer):
+    """Test de que pasado el TTL blando se sirve lo viejo y se refresca atrás"""
+    # Arrange
+    cache = MemoryCache(
+        max_entries=10,
+        max_bytes=10_000,
+        ttls={"average_ticket": 100},
+        soft_ttls={"average_ticket": 10},
+        timer=timer
+    )
+    cache.set("average_ticket", {"ticket_promedio": 10.0})
+    timer.now = 11
+    refrescado = threading.Event()
+    seguir = threading.Event()
+    
+    def refrescar():
+        seguir.wait(timeout=5)
+        cache.set("average_ticket", {"ticket_promedio": 20.0})
+        refrescado.set()
+    
+    # Act
+    valor, viejo = cache.lookup("average_ticket")
+    agendado = cache.refresh_in_background("average_ticket", refrescar)
+    repetido = cache.refresh_in_background("average_ticket", refrescar)
+    seguir.set()
+    refrescado.wait(timeout=5)
+    
+    # Assert
+    assert valor == {"ticket_promedio": 10.0}
+    assert viejo is True
+    assert agendado is True
+    assert repetido is False
+    assert cache.lookup("average_ticket") == ({"ticket_promedio": 20.0}, False)
+
+def test_estimacion_de_tamano_sin_serializar():
+    """Test de que el tamaño sale de contar filas y no de serializar el valor"""
+    # Arrange
+    filas = [{"cliente": f"Cliente {i}", "monto_total": float(i)} for i in range(1_000)]
+
+    # Act
+    tamano = estimate_size({"producto": "Producto A", "fecha": None, "transacciones": filas})
+
+    # Assert
+    assert tamano == 3 * VALUE_BYTES + len("Producto A") + VALUE_BYTES + 1_000 * ROW_BYTES
+    assert estimate_size(b"x" * 10) == 10
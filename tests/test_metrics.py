@@ -0,0 +1,105 @@
+import asyncio
+import threading
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.utils.memory_cache import MemoryCache
+from src.utils.metrics import Registry, MetricsMiddleware, REGISTRY, SERVICE_LATENCY, timed, watch_cache
+
+def test_contador_suma_los_shards_de_cada_thread():
+    """Test de que cada thread escribe en su shard y el scrape los junta"""
+    # Arrange
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+
+    def pegar():
+        for _ in range(1000):
+            requests.inc("/a")
+
+    # Act
+    threads = [threading.Thread(target=pegar) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Assert
+    assert requests.value("/a") == 4000
+    assert 'requests_total{route="/a"} 4000.0' in registry.render().decode()
+
+def test_histograma_en_formato_prometheus():
+    """Test de buckets acumulados, suma y cuenta"""
+    registry = Registry()
+    latency = registry.histogram("latency_seconds", "Latencia", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, "/a")
+
+    text = registry.render().decode().splitlines()
+
+    assert text[:2] == ["# HELP latency_seconds Latencia", "# TYPE latency_seconds histogram"]
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in text
+    assert 'latency_seconds_sum{route="/a"} 3.65' in text
+    assert 'latency_seconds_count{route="/a"} 4' in text
+
+def test_timed_mide_metodos_sync_y_async():
+    """Test del decorador de DataService, con el resultado del método"""
+    class Servicio:
+        @timed
+        def get_algo(self):
+            return 1
+
+        @timed
+        async def get_async(self):
+            raise RuntimeError("se cayó")
+
+    Servicio().get_algo()
+    try:
+        asyncio.run(Servicio().get_async())
+    except RuntimeError:
+        pass
+
+    text = REGISTRY.render().decode()
+    assert 'dataservice_call_duration_seconds_count{service="Servicio",method="get_algo",outcome="ok"} 1' in text
+    assert 'dataservice_call_duration_seconds_count{service="Servicio",method="get_async",outcome="error"} 1' in text
+
+def test_middleware_usa_el_template_de_la_ruta():
+    """Test de que /items/1 y /items/2 cuentan como la misma ruta"""
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+
+    assert 'http_requests_total{route="/items/{item_id}",method="GET",status="200"} 2.0' in REGISTRY.render().decode()
+
+def test_exporta_la_cache():
+    """Test del colector de la caché en memoria"""
+    cache = MemoryCache()
+    watch_cache("prueba", cache)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    text = REGISTRY.render().decode()
+    assert 'cache_hits_total{cache="prueba"} 1' in text
+    assert 'cache_hit_ratio{cache="prueba"} 0.5' in text
+
+def test_middleware_avisa_cada_request():
+    """Test del hook que usa log_api_request"""
+    calls = []
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, on_request=lambda route, ms, status: calls.append((route, status)))
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    TestClient(app).get("/items/7")
+
+    assert calls == [("/items/{item_id}", 200)]
@@ -0,0 +1,153 @@
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from src.api import app as metricas_api
+from src.utils import monitoring
+from src.utils.monitoring import MAX_DATUMS_PER_CALL, MetricPublisher
+
+class StubCloudWatch:
+    """Guarda las llamadas a put_metric_data en vez de ir a AWS"""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def put_metric_data(self, Namespace, MetricData):
+        if self.fail:
+            raise ConnectionError("sin red")
+        self.calls.append((Namespace, list(MetricData)))
+
+@pytest.fixture
+def stub():
+    return StubCloudWatch()
+
+@pytest.fixture
+def publisher(stub):
+    publisher = MetricPublisher(
+        client_factory=lambda: stub,
+        flush_interval=3600,
+        max_series=100,
+        max_pending=100,
+        clock=lambda: 1_700_000_030.0
+    )
+    yield publisher
+    publisher.stop(flush=False)
+
+def test_agrupa_en_statistic_sets(publisher, stub):
+    """Test de que los puntos de la misma serie salen como un solo datum"""
+    # Arrange / Act
+    for value in (10.0, 30.0, 20.0):
+        publisher.put("PuntoRed/API", "APILatency", value, "Milliseconds", {"Endpoint": "/transacciones"})
+    publisher.put("PuntoRed/API", "APILatency", 5.0, "Milliseconds", {"Endpoint": "/top-clientes"})
+    sent = publisher.flush()
+
+    # Assert
+    assert sent == 2
+    assert len(stub.calls) == 1
+    namespace, data = stub.calls[0]
+    assert namespace == "PuntoRed/API"
+    datum = data[0]
+    assert datum["Dimensions"] == [{"Name": "Endpoint", "Value": "/transacciones"}]
+    assert datum["StatisticValues"] == {"SampleCount": 3, "Sum": 60.0, "Minimum": 10.0, "Maximum": 30.0}
+    assert datum["Timestamp"] == datetime.fromtimestamp(1_699_999_980, tz=timezone.utc)
+
+def test_sin_start_no_hay_thread_ni_envio(stub):
+    """Test de que put no prende el thread y stop sin start no llama a CloudWatch"""
+    publisher = MetricPublisher(client_factory=lambda: stub, flush_interval=3600)
+    publisher.put("PuntoRed/API", "RequestCount", 1, "Count")
+    publisher.stop()
+
+    assert publisher._thread is None
+    assert stub.calls == []
+
+def test_start_y_stop_explicitos(stub):
+    """Test de que stop frena el thread que prendió start y manda lo pendiente"""
+    publisher = MetricPublisher(client_factory=lambda: stub, flush_interval=3600)
+    publisher.start()
+    thread = publisher._thread
+    publisher.put("PuntoRed/API", "RequestCount", 1, "Count")
+    publisher.stop()
+
+    assert not thread.is_alive()
+    assert [(ns, len(data)) for ns, data in stub.calls] == [("PuntoRed/API", 1)]
+
+def test_no_hace_io_hasta_el_flush(publisher, stub):
+    """Test de que put no llama a CloudWatch"""
+    publisher.put("PuntoRed/Analytics", "ProcessedTransactions", 100, "Count")
+
+    assert stub.calls == []
+    assert publisher.stats()["series"] == 1
+
+def test_separa_por_namespace_y_por_lotes_de_1000(stub):
+    """Test del límite de datums por llamada"""
+    publisher = MetricPublisher(client_factory=lambda: stub, flush_interval=3600, max_series=5000, max_pending=5000)
+    try:
+        for i in range(MAX_DATUMS_PER_CALL + 5):
+            publisher.put("PuntoRed/API", "RequestCount", 1, "Count", {"Endpoint": f"/e{i}"})
+        publisher.put("PuntoRed/Analytics", "ProcessingErrors", 0, "Count")
+
+        assert publisher.flush() == MAX_DATUMS_PER_CALL + 6
+    finally:
+        publisher.stop(flush=False)
+
+    assert [(ns, len(data)) for ns, data in stub.calls] == [
+        ("PuntoRed/API", MAX_DATUMS_PER_CALL),
+        ("PuntoRed/API", 5),
+        ("PuntoRed/Analytics", 1)
+    ]
+
+def test_reintenta_y_descarta_los_mas_viejos():
+    """Test de que sin CloudWatch la cola queda acotada y se pierden primero los más viejos"""
+    stub = StubCloudWatch(fail=True)
+    publisher = MetricPublisher(client_factory=lambda: stub, flush_interval=3600, max_series=10, max_pending=3)
+    try:
+        for i in range(5):
+            publisher.put("PuntoRed/API", "RequestCount", 1, "Count", {"Endpoint": f"/e{i}"})
+        publisher.flush()
+        stats = publisher.stats()
+        assert stats["pending"] == 3
+        assert stats["dropped"] == 2
+        assert stats["failed_calls"] == 1
+
+        stub.fail = False
+        assert publisher.flush() == 3
+    finally:
+        publisher.stop(flush=False)
+
+    endpoints = [datum["Dimensions"][0]["Value"] for datum in stub.calls[0][1]]
+    assert endpoints == ["/e2", "/e3", "/e4"]
+
+def test_limite_de_series(publisher):
+    """Test de que con demasiadas series abiertas se descarta la más vieja"""
+    for i in range(101):
+        publisher.put("PuntoRed/API", "RequestCount", 1, "Count", {"Endpoint": f"/e{i}"})
+
+    assert publisher.stats()["series"] == 100
+    assert publisher.stats()["dropped"] == 1
+
+def test_flush_metrics_solo_con_monitoreo(stub):
+    """Test de que el flush del Lambda no habla con CloudWatch si el monitoreo está apagado"""
+    publisher = MetricPublisher(client_factory=lambda: stub, flush_interval=3600)
+    publisher.put("PuntoRed/Analytics", "ProcessedTransactions", 100, "Count")
+
+    with patch.object(monitoring, "publisher", publisher):
+        with patch.dict(monitoring.MONITORING_CONFIG, {"enabled": False}):
+            assert monitoring.flush_metrics() == 0
+        with patch.dict(monitoring.MONITORING_CONFIG, {"enabled": True}):
+            assert monitoring.flush_metrics() == 1
+
+    assert [ns for ns, _ in stub.calls] == ["PuntoRed/Analytics"]
+
+def test_api_de_metricas_arranca_y_frena_el_publicador(stub):
+    """Test de que app.py prende el thread en el startup y lo frena en el shutdown"""
+    publisher = MetricPublisher(client_factory=lambda: stub, flush_interval=3600)
+
+    with patch.object(metricas_api, "publisher", publisher), \
+            patch.dict(metricas_api.MONITORING_CONFIG, {"enabled": True}):
+        with TestClient(metricas_api.app):
+            thread = publisher._thread
+            assert thread.is_alive()
+
+    assert not thread.is_alive()
+    assert publisher._thread is None
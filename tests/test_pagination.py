@@ -0,0 +1,133 @@
+import asyncio
+import pandas as pd
+from datetime import date
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from src.api import app as metricas_api
+from src.api.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, validate_page_size
+from src.database.models import Base
+from src.database.rollup import refresh_daily_rollup
+from src.services.data_service import daily_transactions_page_query, transactions_page
+
+@pytest.fixture
+def engine():
+    """Base SQLite con siete clientes que compraron el mismo producto el mismo día"""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for i in range(1, 8):
+            conn.execute(text("INSERT INTO clientes (id, nombre, apellido) VALUES (:id, 'Cliente', :apellido)"),
+                         {"id": i, "apellido": str(i)})
+            conn.execute(text("""
+                INSERT INTO ventas (id, cliente_id, producto, fecha, monto)
+                VALUES (:id, :id, 'Producto A', '2024-03-21', 10)
+            """), {"id": i})
+    return engine
+
+def _recorrer(engine, use_rollup: bool, page_size: int):
+    paginas, after = [], 0
+    while after is not None:
+        query, params = daily_transactions_page_query("Producto A", "2024-03-21", after, page_size + 1, use_rollup)
+        with engine.connect() as conn:
+            result = pd.read_sql(text(query), conn, params=params)
+        page = transactions_page("Producto A", "2024-03-21", result, page_size)
+        paginas.append([int(r["cliente_id"]) for r in page["transacciones"]])
+        after = page["siguiente_cliente_id"]
+    return paginas
+
+@pytest.mark.parametrize("use_rollup", [False, True])
+def test_paginas_por_cliente_id_sin_huecos_ni_repetidos(engine, use_rollup):
+    """Test de recorrer todas las páginas, desde ventas y desde el rollup"""
+    # Arrange
+    if use_rollup:
+        refresh_daily_rollup(engine)
+
+    # Act
+    paginas = _recorrer(engine, use_rollup, page_size=3)
+
+    # Assert
+    assert paginas == [[1, 2, 3], [4, 5, 6], [7]]
+
+@pytest.mark.parametrize("use_rollup", [False, True])
+def test_pagina_bindea_la_fecha_como_date(use_rollup):
+    """Test de que la página manda la fecha como date, que es lo que acepta asyncpg"""
+    _, params = daily_transactions_page_query("Producto A", "2024-03-21", 0, 10, use_rollup)
+
+    assert params["date"] == date(2024, 3, 21)
+
+def test_cursor_ida_y_vuelta():
+    """Test de que el cursor es opaco pero se lee de vuelta igual"""
+    key = {"producto": "Producto A", "fecha": "2024-03-21", "cliente_id": 42}
+
+    cursor = encode_cursor(key)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == key
+    with pytest.raises(ValueError):
+        decode_cursor("esto-no-es-un-cursor")
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor([1, 2]))
+
+def test_page_size_fuera_de_rango():
+    """Test de los límites de page_size"""
+    assert validate_page_size(None) is None
+    assert validate_page_size(10) == 10
+    with pytest.raises(ValueError):
+        validate_page_size(0)
+    with pytest.raises(ValueError):
+        validate_page_size(10 ** 9)
+
+class FakeTable:
+    """Tabla de DynamoDB con `pages` páginas de un item; guarda las queries"""
+
+    def __init__(self, pages: int):
+        self.pages = pages
+        self.queries = []
+
+    def query(self, **kwargs):
+        self.queries.append(kwargs)
+        # boto3 bloquea, así que no tiene que correr en el thread del event loop
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()
+        n = len(self.queries)
+        page = {"Items": [{"id": f"1#{n}#2024-03-21", "num_transacciones": 2, "monto_total": "10.5"}]}
+        if n < self.pages:
+            page["LastEvaluatedKey"] = {"id": f"1#{n}#2024-03-21", "fecha": "2024-03-21"}
+        return page
+
+def _get_metricas(table: FakeTable, **params):
+    client = TestClient(metricas_api.app)
+    with patch.object(metricas_api, "get_table", return_value=table), \
+            patch.dict(metricas_api.API_KEYS, {"clave": 1}):
+        return client.get("/metricas", params={"fecha": "2024-03-21", **params}, headers={"X-API-Key": "clave"})
+
+def test_metricas_sin_page_size_trae_todas_las_paginas():
+    """Test de que /metricas sin page_size no corta en la primera página de DynamoDB"""
+    # Arrange
+    table = FakeTable(pages=3)
+
+    # Act
+    response = _get_metricas(table)
+
+    # Assert
+    assert response.status_code == 200
+    assert [m["cliente_id"] for m in response.json()] == ["1", "2", "3"]
+    assert "Limit" not in table.queries[0]
+    assert NEXT_CURSOR_HEADER.lower() not in response.headers
+
+def test_metricas_con_page_size_devuelve_una_pagina_y_el_cursor():
+    """Test de que con page_size se hace una sola query y la siguiente sale del cursor"""
+    # Arrange
+    table = FakeTable(pages=3)
+
+    # Act
+    response = _get_metricas(table, page_size=1)
+
+    # Assert
+    assert response.status_code == 200
+    assert len(table.queries) == 1
+    assert table.queries[0]["Limit"] == 1
+    assert decode_cursor(response.headers[NEXT_CURSOR_HEADER]) == {"id": "1#1#2024-03-21", "fecha": "2024-03-21"}
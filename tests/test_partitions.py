@@ -0,0 +1,57 @@
+import pytest
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from src.database.models import Base
+from src.database.partitions import (
+    archive_partitions,
+    create_partitions,
+    effective_retention_days,
+    expired_partitions,
+    months_to_create,
+    partition_month,
+    partition_name
+)
+
+def test_nombres_de_particion():
+    """Test de ida y vuelta entre mes y nombre de partición"""
+    assert partition_name(date(2024, 3, 1)) == "ventas_p2024_03"
+    assert partition_month("ventas_p2024_03") == date(2024, 3, 1)
+    assert partition_month("ventas_default") is None
+
+def test_meses_a_crear():
+    """Test de que se cubre desde la retención hasta los meses adelantados"""
+    # Act
+    meses = months_to_create(date(2024, 3, 15), retention_days=30, months_ahead=2)
+
+    # Assert
+    assert meses == [date(2024, 2, 1), date(2024, 3, 1), date(2024, 4, 1), date(2024, 5, 1)]
+
+def test_particiones_vencidas():
+    """Test de que solo se archivan meses enteros fuera de la retención"""
+    # Arrange
+    nombres = ["ventas_p2024_01", "ventas_p2024_02", "ventas_p2024_03", "ventas_default"]
+
+    # Act
+    vencidas = expired_partitions(nombres, date(2024, 3, 15), retention_days=30)
+
+    # Assert
+    # El corte es el 14/02, febrero todavía tiene días vigentes
+    assert vencidas == ["ventas_p2024_01"]
+
+def test_retencion_no_menor_que_la_ventana_de_los_servicios():
+    """Test de que no se archiva lo que el ticket promedio sin rollup todavía lee de ventas"""
+    # Act & Assert
+    assert effective_retention_days(date(2024, 3, 15), 30) == 366
+    assert effective_retention_days(date(2024, 3, 15), 500) == 500
+    assert expired_partitions(["ventas_p2023_03", "ventas_p2023_04"], date(2024, 3, 15), 366) == []
+
+def test_sin_postgres_no_hace_nada():
+    """Test de que en SQLite la tabla queda normal y no se intenta particionar"""
+    # Arrange
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+
+    # Act & Assert
+    assert create_partitions(engine) == []
+    assert archive_partitions(engine) == []
@@ -0,0 +1,97 @@
+import asyncio
+from src.api.rate_limit import RateLimiter, RateLimitMiddleware
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+def test_token_bucket_por_api_key():
+    """Test de la ráfaga, el relleno y que cada key tenga su balde"""
+    # Arrange
+    reloj = Reloj()
+    limiter = RateLimiter(per_minute=60, burst=2, clock=reloj)
+
+    # Act / Assert
+    assert limiter.allow("proveedor-1")[0]
+    assert limiter.allow("proveedor-1")[0]
+    permitido, retry_after = limiter.allow("proveedor-1")
+    assert not permitido and retry_after == 1.0
+    assert limiter.allow("proveedor-2")[0]
+
+    reloj.ahora = 1.0
+    assert limiter.allow("proveedor-1")[0]
+    assert limiter.rejected == 1
+
+def test_limiter_no_guarda_keys_sin_limite():
+    """Test de que las keys viejas se descartan pasado max_keys"""
+    limiter = RateLimiter(per_minute=60, burst=1, max_keys=2, clock=Reloj())
+    for key in ["a", "b", "c"]:
+        limiter.allow(key)
+
+    assert list(limiter._buckets) == ["b", "c"]
+
+def _call(middleware, api_key="k", ip="10.0.0.1"):
+    messages = []
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/transacciones",
+        "headers": [(b"x-api-key", api_key.encode())],
+        "client": (ip, 5000)
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    return scope, receive, send, messages
+
+def test_middleware_429_con_retry_after():
+    """Test de que se rechaza rápido cuando la key se quedó sin fichas"""
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    middleware = RateLimitMiddleware(
+        app,
+        limiter=RateLimiter(per_minute=60, burst=1, clock=Reloj()),
+        authenticate=lambda key: key in {"a", "b"}
+    )
+
+    async def escenario():
+        llamadas = [_call(middleware, "a"), _call(middleware, "b"), _call(middleware, "a")]
+        for llamada in llamadas:
+            await middleware(*llamada[:3])
+        return [llamada[3] for llamada in llamadas]
+
+    primera, otra_key, repetida = asyncio.run(escenario())
+
+    assert primera[0]["status"] == 200
+    assert otra_key[0]["status"] == 200
+    assert repetida[0]["status"] == 429
+    assert dict(repetida[0]["headers"])[b"retry-after"] == b"1"
+
+def test_keys_invalidas_usan_el_balde_de_la_ip():
+    """Test de que rotar keys inventadas no da baldes nuevos ni desplaza a las válidas"""
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    limiter = RateLimiter(per_minute=60, burst=1, max_keys=2, clock=Reloj())
+    middleware = RateLimitMiddleware(app, limiter=limiter, authenticate=lambda key: key == "valida")
+
+    async def escenario():
+        llamadas = [_call(middleware, "valida")] + [_call(middleware, f"falsa-{i}") for i in range(5)]
+        for llamada in llamadas:
+            await middleware(*llamada[:3])
+        return [llamada[3][0]["status"] for llamada in llamadas]
+
+    statuses = asyncio.run(escenario())
+
+    assert statuses == [200, 200, 429, 429, 429, 429]
+    assert list(limiter._buckets) == ["key:valida", "ip:10.0.0.1"]
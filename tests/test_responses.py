@@ -0,0 +1,28 @@
+import json
+from datetime import date
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from src.api.responses import FastJSONResponse
+
+def test_serializa_numpy_decimal_y_fechas():
+    """Test de que orjson maneja los tipos que salen de pandas y de Numeric"""
+    # Arrange
+    df = pd.DataFrame({"cliente": ["Juan Pérez"], "cantidad": np.array([5], dtype=np.int64), "monto": [np.nan]})
+    contenido = {
+        "transacciones": df.to_dict(orient="records"),
+        "total": Decimal("500.25"),
+        "fecha": date(2024, 3, 21),
+        "serie": np.array([1.5, 2.5])
+    }
+
+    # Act
+    body = json.loads(FastJSONResponse(contenido).body)
+
+    # Assert
+    assert body == {
+        "transacciones": [{"cliente": "Juan Pérez", "cantidad": 5, "monto": None}],
+        "total": 500.25,
+        "fecha": "2024-03-21",
+        "serie": [1.5, 2.5]
+    }
@@ -0,0 +1,75 @@
+import pytest
+from datetime import date, datetime
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from src.database.models import Base
+from src.database.rollup import refresh_daily_rollup, rollup_covered_until
+from src.services.data_service import rollup_covers, daily_transactions_query
+
+@pytest.fixture
+def engine():
+    """Base SQLite en memoria con un par de clientes y ventas"""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO clientes (id, nombre, apellido) VALUES (1, 'Juan', 'Pérez'), (2, 'María', 'Gómez')"))
+        conn.execute(text("""
+            INSERT INTO ventas (id, cliente_id, producto, fecha, monto) VALUES
+            (1, 1, 'Producto A', '2024-03-21', 100.50),
+            (2, 1, 'Producto A', '2024-03-21', 50.00),
+            (3, 2, 'Producto A', '2024-03-21', 150.25),
+            (4, 2, 'Producto B', '2024-03-22', 300.00)
+        """))
+    return engine
+
+def _rollup(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("""
+            SELECT producto, fecha, cliente, cantidad_transacciones, monto_total
+            FROM ventas_daily_rollup ORDER BY producto, fecha, cliente_id
+        """)).fetchall()
+
+def test_refresh_agrega_por_producto_fecha_cliente(engine):
+    """Test de la carga inicial del rollup"""
+    # Act
+    procesados = refresh_daily_rollup(engine, batch_size=3)
+    
+    # Assert
+    assert procesados == 4
+    filas = _rollup(engine)
+    assert [(f[0], f[2], f[3], float(f[4])) for f in filas] == [
+        ("Producto A", "Juan Pérez", 2, 150.5),
+        ("Producto A", "María Gómez", 1, 150.25),
+        ("Producto B", "María Gómez", 1, 300.0)
+    ]
+
+def test_refresh_incremental(engine):
+    """Test de que solo se suman las ventas nuevas"""
+    # Arrange
+    refresh_daily_rollup(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO ventas (id, cliente_id, producto, fecha, monto) VALUES (5, 1, 'Producto A', '2024-03-21', 9.50)"))
+    
+    # Act
+    procesados = refresh_daily_rollup(engine)
+    sin_cambios = refresh_daily_rollup(engine)
+    
+    # Assert
+    assert procesados == 1
+    assert sin_cambios == 0
+    juan = _rollup(engine)[0]
+    assert juan[3] == 3
+    assert float(juan[4]) == 160.0
+
+def test_cobertura_del_rollup():
+    """Test de qué días se leen del rollup"""
+    # Arrange
+    hasta = rollup_covered_until(datetime(2024, 3, 22, 2, 0))
+    
+    # Assert
+    assert hasta == date(2024, 3, 22)
+    assert rollup_covers("2024-03-21", hasta) is True
+    assert rollup_covers("2024-03-22", hasta) is False
+    assert rollup_covers(None, hasta) is False
+    assert "ventas_daily_rollup" in daily_transactions_query("Producto A", "2024-03-21", use_rollup=True)[0]
+    assert "GROUP BY" in daily_transactions_query("Producto A", "2024-03-22")[0]
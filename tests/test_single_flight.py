@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+import pytest
+from src.utils.single_flight import SingleFlight
+
+def test_hilos_comparten_una_consulta():
+    """Test de varios hilos pidiendo la misma clave a la vez"""
+    # Arrange
+    flight = SingleFlight()
+    llamadas = []
+    
+    def consulta_lenta():
+        llamadas.append(1)
+        time.sleep(0.1)
+        return {"ticket_promedio": 10.0}
+    
+    resultados = []
+    hilos = [
+        threading.Thread(target=lambda: resultados.append(flight.do("average_ticket", consulta_lenta)))
+        for _ in range(5)
+    ]
+    
+    # Act
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    
+    # Assert
+    assert len(llamadas) == 1
+    assert resultados == [{"ticket_promedio": 10.0}] * 5
+    assert flight.stats()["coalesced"] == 4
+
+def test_error_se_comparte():
+    """Test de que los que esperan reciben el mismo error"""
+    # Arrange
+    flight = SingleFlight()
+    
+    def consulta_con_error():
+        raise RuntimeError("DB Error")
+    
+    # Act & Assert
+    with pytest.raises(RuntimeError):
+        flight.do("top_clients_5", consulta_con_error)
+    assert flight.stats()["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_async_comparte_una_consulta():
+    """Test de corutinas concurrentes con la misma clave"""
+    # Arrange
+    flight = SingleFlight()
+    llamadas = []
+    
+    async def consulta_lenta():
+        llamadas.append(1)
+        await asyncio.sleep(0.05)
+        return [{"cliente": "Juan Pérez", "monto_total": 1000.0}]
+    
+    # Act
+    resultados = await asyncio.gather(
+        *(flight.do_async("top_clients_5", consulta_lenta) for _ in range(10))
+    )
+    
+    # Assert
+    assert len(llamadas) == 1
+    assert all(r == resultados[0] for r in resultados)
+    assert flight.stats() == {"executed": 1, "coalesced": 9, "in_flight": 0}
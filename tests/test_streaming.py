@@ -0,0 +1,131 @@
+import asyncio
+import json
+import time
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from src.database.models import Base
+from src.services.data_service import DataService
+from src.api.streaming import json_envelope, streaming_json_response
+from src.utils.deadline import DeadlineExceeded, deadline
+
+@pytest.fixture
+def data_service():
+    """DataService sobre SQLite con 5 clientes que compraron el mismo producto"""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for i in range(1, 6):
+            conn.execute(text(f"INSERT INTO clientes (id, nombre, apellido) VALUES ({i}, 'Cliente', '{i}')"))
+            conn.execute(text(
+                f"INSERT INTO ventas (id, cliente_id, producto, fecha, monto) VALUES ({i}, {i}, 'Producto A', '2024-03-21', {i}0.50)"
+            ))
+    with patch('src.services.data_service.get_engine', return_value=engine):
+        service = DataService()
+    service._rollup_coverage = lambda: None
+    yield service
+    service.control.stop(engine)
+
+def test_stream_de_a_lotes(data_service):
+    """Test de que el streaming entrega lotes del tamaño pedido con la forma de siempre"""
+    # Act
+    lotes = list(data_service.stream_daily_transactions("Producto A", "2024-03-21", batch_size=2))
+
+    # Assert
+    assert [len(l) for l in lotes] == [2, 2, 1]
+    filas = sorted((f for l in lotes for f in l), key=lambda f: f["cliente"])
+    assert filas[0] == {"cliente": "Cliente 1", "cantidad_transacciones": 1, "monto_total": 10.5}
+    assert data_service.control.get("daily_transactions_stream_Producto A_2024-03-21") == ("success", "5")
+
+def test_stream_y_despues_consulta_normal(data_service):
+    """Test de que después de un streaming la consulta normal devuelve las transacciones"""
+    # Arrange
+    list(data_service.stream_daily_transactions("Producto A", "2024-03-21"))
+
+    # Act
+    result = data_service.get_daily_transactions("Producto A", "2024-03-21")
+
+    # Assert
+    assert len(result["transacciones"]) == 5
+    assert data_service.control.get("daily_transactions_Producto A_2024-03-21") == ("success", "5")
+
+def test_stream_corta_entre_lotes_sin_deadline(data_service):
+    """Test de que si el request se queda sin tiempo a mitad del streaming no se sigue leyendo"""
+    # Arrange
+    lotes = []
+
+    # Act
+    with deadline(0.2):
+        with pytest.raises(DeadlineExceeded):
+            for lote in data_service.stream_daily_transactions("Producto A", "2024-03-21", batch_size=2):
+                lotes.append(lote)
+                time.sleep(0.25)
+
+    # Assert
+    assert len(lotes) == 1
+    assert data_service.control.get("daily_transactions_stream_Producto A_2024-03-21")[0] == "error"
+
+@pytest.mark.asyncio
+async def test_json_envelope_valido():
+    """Test de que los chunks concatenados forman el mismo JSON que la respuesta normal"""
+    # Arrange
+    async def lotes():
+        yield [{"cliente": "Juan Pérez", "monto_total": 10.5}]
+        yield []
+        yield [{"cliente": "Ana Díaz", "monto_total": 3.0}, {"cliente": "Luis Rojas", "monto_total": 1.0}]
+
+    # Act
+    body = b"".join([chunk async for chunk in json_envelope({"producto": "A", "fecha": None}, "transacciones", lotes())])
+
+    # Assert
+    respuesta = json.loads(body)
+    assert respuesta["status"] == "success"
+    assert respuesta["data"]["producto"] == "A"
+    assert [t["cliente"] for t in respuesta["data"]["transacciones"]] == ["Juan Pérez", "Ana Díaz", "Luis Rojas"]
+
+@pytest.mark.asyncio
+async def test_json_envelope_sin_filas():
+    """Test de que una respuesta vacía sigue siendo JSON válido"""
+    # Arrange
+    async def vacio():
+        return
+        yield
+
+    # Act
+    body = b"".join([chunk async for chunk in json_envelope({}, "transacciones", vacio())])
+
+    # Assert
+    assert json.loads(body)["data"] == {"transacciones": []}
+
+@pytest.mark.asyncio
+async def test_streaming_cierra_el_origen_si_el_cliente_se_va():
+    """Test de que si el cliente corta, el generador de la query se cierra sin esperar al GC"""
+    # Arrange
+    cerrado = []
+
+    async def lotes():
+        try:
+            yield [{"cliente": "Juan Pérez"}]
+            yield [{"cliente": "Ana Díaz"}]
+        finally:
+            cerrado.append(True)
+
+    primer_chunk = asyncio.Event()
+
+    async def receive():
+        await primer_chunk.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            primer_chunk.set()
+        await asyncio.sleep(0)
+
+    response = await streaming_json_response({}, "transacciones", lotes())
+
+    # Act
+    await response({"type": "http"}, receive, send)
+
+    # Assert
+    assert cerrado == [True]